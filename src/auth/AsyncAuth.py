@@ -0,0 +1,324 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from src.auth.Auth import CREDENTIALS_FIELDS, REFRESH_TOKEN_FIELDS
+from src.auth.exceptions import (
+    InvalidRefreshToken,
+    SignInWrongCredentials,
+    UserAlreadyExists,
+)
+from src.auth.hashing import password_hasher
+from src.auth.schemas import (
+    AuthResponse,
+    RefreshTokenRequest,
+    RevokeTokenResponse,
+    UserSignIn,
+    UserSignUp,
+)
+from src.auth.utils import (
+    create_access_token,
+    create_refresh_token,
+    get_refresh_token_hash,
+)
+from src.database.AsyncDatabase import AsyncDatabase
+from src.database.AsyncRepository import AsyncRepository
+from src.database.Database import DATABASE_NAME
+
+
+class AsyncAuth:
+    """
+    Async auth handler
+
+    Mirrors Auth on top of the async database client.
+    Password hashing is CPU bound, so it runs off the event loop
+    in the dedicated password hasher pool
+
+    Attributes
+    ----------
+    client : motor.motor_asyncio.AsyncIOMotorClient
+        Async database client
+    users : motor.motor_asyncio.AsyncIOMotorCollection
+        Users collection
+    users_repository : AsyncRepository
+        Projected reads on the users collection
+    refresh_tokens : motor.motor_asyncio.AsyncIOMotorCollection
+        Refresh tokens collection, stored by hash
+
+    Methods
+    -------
+    sign_up(user: UserSignUp) -> AuthResponse
+        Sign up user
+    sign_in(user: UserSignIn) -> AuthResponse
+        Sign in user
+    refresh(refresh_request: RefreshTokenRequest) -> AuthResponse
+        Exchange a refresh token for new tokens
+    revoke(refresh_request: RefreshTokenRequest) -> RevokeTokenResponse
+        Revoke a refresh token and its rotations
+    _issue_refresh_token(user_data: Dict[str, Any], family: Optional[ObjectId]) -> str
+        Store a new refresh token
+    _update_password_hash(user_data: Dict[str, Any], new_hash: str) -> None
+        Store the rehashed password of a user
+    _get_user_by_email(email: str, fields: Sequence[str]) -> Optional[Dict[str, Any]]
+        Get user by email
+    """
+
+    def __init__(self):
+        """
+        Initialize async auth handler
+        """
+
+        self.client = AsyncDatabase().get_client()
+        self.users = self.client[DATABASE_NAME]["users"]
+        self.users_repository = AsyncRepository(collection=self.users)
+        self.refresh_tokens = self.client[DATABASE_NAME]["refresh_tokens"]
+
+    async def sign_up(self, user: UserSignUp) -> AuthResponse:
+        """
+        Sign up user with a single insert, the unique email index
+        rejects an existing email, also under concurrent sign ups.
+        The password is hashed right before the insert, so a taken
+        email costs one hash instead of a read on every sign up
+
+        Parameters
+        ----------
+        user : UserSignUp
+            User data
+
+        Returns
+        -------
+        AuthResponse
+            Response detail
+
+        Raises
+        ------
+        UserAlreadyExists
+            If the email is already taken
+        """
+
+        user_data = {
+            "name": user.name,
+            "email": user.email,
+            "password": user.password.get_secret_value(),
+        }
+
+        user_data["password"] = await password_hasher.hash(user_data["password"])
+
+        try:
+            await self.users.insert_one(user_data)
+        except DuplicateKeyError:
+            raise UserAlreadyExists()
+
+        access_token = create_access_token()
+        refresh_token = await self._issue_refresh_token(user_data=user_data)
+
+        return AuthResponse(
+            name=user_data["name"],
+            email=user_data["email"],
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    async def sign_in(self, user: UserSignIn) -> AuthResponse:
+        """
+        Sign in user
+
+        Parameters
+        ----------
+        user : UserSignIn
+            User data
+
+        Returns
+        -------
+        AuthResponse
+            Response detail
+        """
+
+        user_data = await self._get_user_by_email(
+            email=user.email, fields=CREDENTIALS_FIELDS
+        )
+
+        if not user_data:
+            raise SignInWrongCredentials()
+
+        valid, new_hash = await password_hasher.verify_and_update(
+            user.password.get_secret_value(), user_data["password"]
+        )
+
+        if not valid:
+            raise SignInWrongCredentials()
+
+        if new_hash:
+            await self._update_password_hash(user_data=user_data, new_hash=new_hash)
+
+        access_token = create_access_token()
+        refresh_token = await self._issue_refresh_token(user_data=user_data)
+
+        return AuthResponse(
+            name=user_data["name"],
+            email=user_data["email"],
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    async def refresh(self, refresh_request: RefreshTokenRequest) -> AuthResponse:
+        """
+        Exchange a refresh token for a new access token and a
+        new refresh token, the used token is marked in the same
+        indexed write that reads it. Presenting a used token
+        again revokes every rotation of it, as it may be stolen
+
+        Parameters
+        ----------
+        refresh_request : RefreshTokenRequest
+            Refresh token
+
+        Returns
+        -------
+        AuthResponse
+            Response detail with the new tokens
+
+        Raises
+        ------
+        InvalidRefreshToken
+            If the token is unknown, expired or already used
+        """
+
+        token_hash = get_refresh_token_hash(refresh_request.refresh_token)
+        token_data = await self.refresh_tokens.find_one_and_update(
+            {
+                "token_hash": token_hash,
+                "used": False,
+                "expires_at": {"$gt": datetime.now(timezone.utc)},
+            },
+            {"$set": {"used": True}},
+            projection=REFRESH_TOKEN_FIELDS,
+        )
+
+        if token_data is None:
+            used_token = await self.refresh_tokens.find_one(
+                {"token_hash": token_hash, "used": True}, projection={"family": 1}
+            )
+
+            if used_token is not None:
+                await self.refresh_tokens.delete_many({"family": used_token["family"]})
+
+            raise InvalidRefreshToken()
+
+        access_token = create_access_token()
+        refresh_token = await self._issue_refresh_token(
+            user_data=token_data, family=token_data["family"]
+        )
+
+        return AuthResponse(
+            name=token_data["name"],
+            email=token_data["email"],
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    async def revoke(self, refresh_request: RefreshTokenRequest) -> RevokeTokenResponse:
+        """
+        Revoke a refresh token and every rotation of it,
+        unknown tokens are accepted so nothing is disclosed
+
+        Parameters
+        ----------
+        refresh_request : RefreshTokenRequest
+            Refresh token
+
+        Returns
+        -------
+        RevokeTokenResponse
+            Response detail
+        """
+
+        token_data = await self.refresh_tokens.find_one(
+            {"token_hash": get_refresh_token_hash(refresh_request.refresh_token)},
+            projection={"family": 1},
+        )
+
+        if token_data is not None:
+            await self.refresh_tokens.delete_many({"family": token_data["family"]})
+
+        return RevokeTokenResponse(detail="Token revoked")
+
+    async def _issue_refresh_token(
+        self, user_data: Dict[str, Any], family: Optional[ObjectId] = None
+    ) -> str:
+        """
+        Store a new refresh token of a user, only its hash is
+        stored and the tokens rotated from one sign in share
+        a family so they can be revoked together
+
+        Parameters
+        ----------
+        user_data : Dict[str, Any]
+            User name and email
+        family : Optional[ObjectId]
+            Family of the rotated token, a new one by default
+
+        Returns
+        -------
+        str
+            Refresh token
+        """
+
+        refresh_token, expires_at = create_refresh_token()
+
+        await self.refresh_tokens.insert_one(
+            {
+                "token_hash": get_refresh_token_hash(refresh_token),
+                "family": family or ObjectId(),
+                "name": user_data["name"],
+                "email": user_data["email"],
+                "used": False,
+                "expires_at": expires_at,
+            }
+        )
+
+        return refresh_token
+
+    async def _update_password_hash(
+        self, user_data: Dict[str, Any], new_hash: str
+    ) -> None:
+        """
+        Store the password of a user rehashed with the configured
+        bcrypt cost, the write only applies if the stored hash is
+        still the verified one so a concurrent password change wins
+
+        Parameters
+        ----------
+        user_data : Dict[str, Any]
+            User email and verified password hash
+        new_hash : str
+            Password hash with the configured cost
+        """
+
+        await self.users.update_one(
+            {"email": user_data["email"], "password": user_data["password"]},
+            {"$set": {"password": new_hash}},
+        )
+
+    async def _get_user_by_email(
+        self, email: str, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get user by email
+
+        Parameters
+        ----------
+        email : str
+            User email
+        fields : Sequence[str]
+            User fields to return
+
+        Returns
+        -------
+        Dict[str, str]
+            User data
+        """
+
+        return await self.users_repository.find_one({"email": email}, fields=fields)
@@ -1,9 +1,33 @@
-from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
 
-from src.auth.exceptions import SignInWrongCredentials, UserAlreadyExists
-from src.auth.schemas import AuthResponse, UserSignIn, UserSignUp
-from src.auth.utils import create_access_token, get_password_hash, verify_password
-from src.database.Database import Database
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from src.auth.exceptions import (
+    InvalidRefreshToken,
+    SignInWrongCredentials,
+    UserAlreadyExists,
+)
+from src.auth.schemas import (
+    AuthResponse,
+    RefreshTokenRequest,
+    RevokeTokenResponse,
+    UserSignIn,
+    UserSignUp,
+)
+from src.auth.utils import (
+    create_access_token,
+    create_refresh_token,
+    get_password_hash,
+    get_refresh_token_hash,
+    verify_and_update_password,
+)
+from src.database.Database import DATABASE_NAME, Database
+from src.database.Repository import Repository
+
+CREDENTIALS_FIELDS = ["name", "email", "password"]
+REFRESH_TOKEN_FIELDS = {"_id": 0, "name": 1, "email": 1, "family": 1}
 
 
 class Auth:
@@ -16,6 +40,10 @@ class Auth:
         Database client
     users : pymongo.collection.Collection
         Users collection
+    users_repository : Repository
+        Projected reads on the users collection
+    refresh_tokens : pymongo.collection.Collection
+        Refresh tokens collection, stored by hash
 
     Methods
     -------
@@ -23,7 +51,15 @@ class Auth:
         Sign up user
     sign_in(user: UserSignIn) -> AuthResponse
         Sign in user
-    _get_user_by_email(email: str) -> Optional[Dict[str, str]]
+    refresh(refresh_request: RefreshTokenRequest) -> AuthResponse
+        Exchange a refresh token for new tokens
+    revoke(refresh_request: RefreshTokenRequest) -> RevokeTokenResponse
+        Revoke a refresh token and its rotations
+    _issue_refresh_token(user_data: Dict[str, Any], family: Optional[ObjectId]) -> str
+        Store a new refresh token
+    _update_password_hash(user_data: Dict[str, Any], new_hash: str) -> None
+        Store the rehashed password of a user
+    _get_user_by_email(email: str, fields: Sequence[str]) -> Optional[Dict[str, Any]]
         Get user by email
     """
 
@@ -33,11 +69,16 @@ class Auth:
         """
 
         self.client = Database().get_client()
-        self.users = self.client["task-manager-db"]["users"]
+        self.users = self.client[DATABASE_NAME]["users"]
+        self.users_repository = Repository(collection=self.users)
+        self.refresh_tokens = self.client[DATABASE_NAME]["refresh_tokens"]
 
     def sign_up(self, user: UserSignUp) -> AuthResponse:
         """
-        Sign up user
+        Sign up user with a single insert, the unique email index
+        rejects an existing email, also under concurrent sign ups.
+        The password is hashed right before the insert, so a taken
+        email costs one hash instead of a read on every sign up
 
         Parameters
         ----------
@@ -48,10 +89,12 @@ class Auth:
         -------
         AuthResponse
             Response detail
-        """
 
-        if self._get_user_by_email(email=user.email):
-            raise UserAlreadyExists()
+        Raises
+        ------
+        UserAlreadyExists
+            If the email is already taken
+        """
 
         user_data = {
             "name": user.name,
@@ -61,11 +104,19 @@ class Auth:
 
         user_data["password"] = get_password_hash(user_data["password"])
 
-        self.users.insert_one(user_data)
+        try:
+            self.users.insert_one(user_data)
+        except DuplicateKeyError:
+            raise UserAlreadyExists()
+
         access_token = create_access_token()
+        refresh_token = self._issue_refresh_token(user_data=user_data)
 
         return AuthResponse(
-            name=user_data["name"], email=user_data["email"], access_token=access_token
+            name=user_data["name"],
+            email=user_data["email"],
+            access_token=access_token,
+            refresh_token=refresh_token,
         )
 
     def sign_in(self, user: UserSignIn) -> AuthResponse:
@@ -83,21 +134,171 @@ class Auth:
             Response detail
         """
 
-        user_data = self._get_user_by_email(email=user.email)
+        user_data = self._get_user_by_email(email=user.email, fields=CREDENTIALS_FIELDS)
 
         if not user_data:
             raise SignInWrongCredentials()
 
-        if not verify_password(user.password.get_secret_value(), user_data["password"]):
+        valid, new_hash = verify_and_update_password(
+            user.password.get_secret_value(), user_data["password"]
+        )
+
+        if not valid:
             raise SignInWrongCredentials()
 
+        if new_hash:
+            self._update_password_hash(user_data=user_data, new_hash=new_hash)
+
+        access_token = create_access_token()
+        refresh_token = self._issue_refresh_token(user_data=user_data)
+
+        return AuthResponse(
+            name=user_data["name"],
+            email=user_data["email"],
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    def refresh(self, refresh_request: RefreshTokenRequest) -> AuthResponse:
+        """
+        Exchange a refresh token for a new access token and a
+        new refresh token, the used token is marked in the same
+        indexed write that reads it. Presenting a used token
+        again revokes every rotation of it, as it may be stolen
+
+        Parameters
+        ----------
+        refresh_request : RefreshTokenRequest
+            Refresh token
+
+        Returns
+        -------
+        AuthResponse
+            Response detail with the new tokens
+
+        Raises
+        ------
+        InvalidRefreshToken
+            If the token is unknown, expired or already used
+        """
+
+        token_hash = get_refresh_token_hash(refresh_request.refresh_token)
+        token_data = self.refresh_tokens.find_one_and_update(
+            {
+                "token_hash": token_hash,
+                "used": False,
+                "expires_at": {"$gt": datetime.now(timezone.utc)},
+            },
+            {"$set": {"used": True}},
+            projection=REFRESH_TOKEN_FIELDS,
+        )
+
+        if token_data is None:
+            used_token = self.refresh_tokens.find_one(
+                {"token_hash": token_hash, "used": True}, projection={"family": 1}
+            )
+
+            if used_token is not None:
+                self.refresh_tokens.delete_many({"family": used_token["family"]})
+
+            raise InvalidRefreshToken()
+
         access_token = create_access_token()
+        refresh_token = self._issue_refresh_token(
+            user_data=token_data, family=token_data["family"]
+        )
 
         return AuthResponse(
-            name=user_data["name"], email=user_data["email"], access_token=access_token
+            name=token_data["name"],
+            email=token_data["email"],
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+    def revoke(self, refresh_request: RefreshTokenRequest) -> RevokeTokenResponse:
+        """
+        Revoke a refresh token and every rotation of it,
+        unknown tokens are accepted so nothing is disclosed
+
+        Parameters
+        ----------
+        refresh_request : RefreshTokenRequest
+            Refresh token
+
+        Returns
+        -------
+        RevokeTokenResponse
+            Response detail
+        """
+
+        token_data = self.refresh_tokens.find_one(
+            {"token_hash": get_refresh_token_hash(refresh_request.refresh_token)},
+            projection={"family": 1},
+        )
+
+        if token_data is not None:
+            self.refresh_tokens.delete_many({"family": token_data["family"]})
+
+        return RevokeTokenResponse(detail="Token revoked")
+
+    def _issue_refresh_token(
+        self, user_data: Dict[str, Any], family: Optional[ObjectId] = None
+    ) -> str:
+        """
+        Store a new refresh token of a user, only its hash is
+        stored and the tokens rotated from one sign in share
+        a family so they can be revoked together
+
+        Parameters
+        ----------
+        user_data : Dict[str, Any]
+            User name and email
+        family : Optional[ObjectId]
+            Family of the rotated token, a new one by default
+
+        Returns
+        -------
+        str
+            Refresh token
+        """
+
+        refresh_token, expires_at = create_refresh_token()
+
+        self.refresh_tokens.insert_one(
+            {
+                "token_hash": get_refresh_token_hash(refresh_token),
+                "family": family or ObjectId(),
+                "name": user_data["name"],
+                "email": user_data["email"],
+                "used": False,
+                "expires_at": expires_at,
+            }
+        )
+
+        return refresh_token
+
+    def _update_password_hash(self, user_data: Dict[str, Any], new_hash: str) -> None:
+        """
+        Store the password of a user rehashed with the configured
+        bcrypt cost, the write only applies if the stored hash is
+        still the verified one so a concurrent password change wins
+
+        Parameters
+        ----------
+        user_data : Dict[str, Any]
+            User email and verified password hash
+        new_hash : str
+            Password hash with the configured cost
+        """
+
+        self.users.update_one(
+            {"email": user_data["email"], "password": user_data["password"]},
+            {"$set": {"password": new_hash}},
         )
 
-    def _get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    def _get_user_by_email(
+        self, email: str, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
         """
         Get user by email
 
@@ -105,6 +306,8 @@ class Auth:
         ----------
         email : str
             User email
+        fields : Sequence[str]
+            User fields to return
 
         Returns
         -------
@@ -112,4 +315,4 @@ class Auth:
             User data
         """
 
-        return self.users.find_one({"email": email})
+        return self.users_repository.find_one({"email": email}, fields=fields)
@@ -29,6 +29,20 @@ class TokenVerificationError(HTTPException):
         super().__init__(status_code=401, detail="Token verification failed")
 
 
+class InvalidRefreshToken(HTTPException):
+    """
+    Exception that is raised when a refresh
+    token is unknown, expired or already used
+    """
+
+    def __init__(self):
+        """
+        Initialize exception
+        """
+
+        super().__init__(status_code=401, detail="Invalid refresh token")
+
+
 class UserAlreadyExists(HTTPException):
     """
     Exception that is raised
@@ -46,6 +60,24 @@ class UserAlreadyExists(HTTPException):
         )
 
 
+class PasswordHasherBusy(HTTPException):
+    """
+    Exception that is raised when
+    the password hasher is full
+    """
+
+    def __init__(self):
+        """
+        Initialize exception
+        """
+
+        super().__init__(
+            status_code=503,
+            detail="Too many sign in attempts, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+
 class SecretNotProvided(Exception):
     """
     Exception that is raised
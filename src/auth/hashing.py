@@ -0,0 +1,428 @@
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+from dotenv import load_dotenv
+from passlib.hash import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+from src.auth.exceptions import PasswordHasherBusy
+from src.auth.schemas import PasswordHasherStatsResponse
+from src.auth.utils import (
+    BCRYPT_ROUNDS,
+    get_password_hash,
+    set_bcrypt_rounds,
+    verify_and_update_password,
+)
+
+load_dotenv()
+
+
+DEFAULT_PASSWORD_HASHER_WORKERS = os.cpu_count() or 1
+DEFAULT_PASSWORD_HASHER_QUEUE_SIZE = 32
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+BCRYPT_TARGET_MS = os.getenv("BCRYPT_TARGET_MS")
+
+Result = TypeVar("Result")
+
+
+def _timed(function: Callable[..., Result], *args: str) -> Tuple[Result, float, float]:
+    """
+    Run a function and time it
+
+    Parameters
+    ----------
+    function : Callable[..., Result]
+        Function to run
+    *args : str
+        Positional arguments of the function
+
+    Returns
+    -------
+    Tuple[Result, float, float]
+        Result, start and end on the performance counter
+    """
+
+    started = time.perf_counter()
+    result = function(*args)
+
+    return result, started, time.perf_counter()
+
+
+class PasswordHasher:
+    """
+    Dedicated bounded thread pool for bcrypt
+
+    bcrypt releases the GIL while hashing, so its own threads
+    use every core without holding up the shared threadpool
+    that serves the sync routes. At most workers plus queue
+    size operations are pending, a request past that bound is
+    rejected at once instead of waiting behind the burst. An
+    operation holds its place until its thread is done, even
+    if the request awaiting it is cancelled
+
+    Attributes
+    ----------
+    workers : int
+        Number of hashing threads
+    queue_size : int
+        Maximum number of operations waiting for a thread
+
+    Methods
+    -------
+    hash(password: str) -> str
+        Hash a password
+    verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]
+        Verify a password and rehash it if its cost changed
+    stats() -> PasswordHasherStatsResponse
+        Get the pool counters
+    shutdown() -> None
+        Stop the hashing threads
+    _run(function: Callable[..., Result], *args: str) -> Result
+        Run a hashing function in the pool
+    _release(future: Future) -> None
+        Free the place of a finished operation
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_PASSWORD_HASHER_WORKERS,
+        queue_size: int = DEFAULT_PASSWORD_HASHER_QUEUE_SIZE,
+    ) -> None:
+        """
+        Initialize password hasher
+
+        Parameters
+        ----------
+        workers : int
+            Number of hashing threads
+        queue_size : int
+            Maximum number of operations waiting for a thread
+        """
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._hash_seconds = 0.0
+        self._max_hash_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password
+
+        Parameters
+        ----------
+        password : str
+            Password
+
+        Returns
+        -------
+        str
+            Password hash
+
+        Raises
+        ------
+        PasswordHasherBusy
+            If the pool is full
+        """
+
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against its hash and rehash
+        it when its hash does not use the configured cost
+
+        Parameters
+        ----------
+        plain_password : str
+            Plain password
+        hashed_password : str
+            Hashed password
+
+        Returns
+        -------
+        Tuple[bool, Optional[str]]
+            Whether password is valid and the new hash to store,
+            None if the stored hash is up to date
+
+        Raises
+        ------
+        PasswordHasherBusy
+            If the pool is full
+        """
+
+        return await self._run(
+            verify_and_update_password, plain_password, hashed_password
+        )
+
+    def stats(self) -> PasswordHasherStatsResponse:
+        """
+        Get the pool counters
+
+        Returns
+        -------
+        PasswordHasherStatsResponse
+            Pool size, queue depth and hash latency
+        """
+
+        with self._lock:
+            completed = self._completed or 1
+
+            return PasswordHasherStatsResponse(
+                workers=self.workers,
+                queue_size=self.queue_size,
+                running=min(self._pending, self.workers),
+                queued=max(self._pending - self.workers, 0),
+                completed=self._completed,
+                rejected=self._rejected,
+                average_wait_ms=self._wait_seconds / completed * 1000,
+                average_hash_ms=self._hash_seconds / completed * 1000,
+                max_hash_ms=self._max_hash_seconds * 1000,
+            )
+
+    def shutdown(self) -> None:
+        """
+        Stop the hashing threads, a later
+        operation starts them again
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, function: Callable[..., Result], *args: str) -> Result:
+        """
+        Run a hashing function in the pool
+
+        Parameters
+        ----------
+        function : Callable[..., Result]
+            Hashing function
+        *args : str
+            Positional arguments of the function
+
+        Returns
+        -------
+        Result
+            Result of the function
+
+        Raises
+        ------
+        PasswordHasherBusy
+            If the pool is full
+        """
+
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hasher"
+                )
+
+            self._pending += 1
+            submitted = time.perf_counter()
+            future = self._executor.submit(_timed, function, *args)
+
+        future.add_done_callback(self._release)
+        result, started, finished = await asyncio.wrap_future(future)
+
+        with self._lock:
+            self._completed += 1
+            self._wait_seconds += started - submitted
+            self._hash_seconds += finished - started
+            self._max_hash_seconds = max(self._max_hash_seconds, finished - started)
+
+        return result
+
+    def _release(self, future: Future) -> None:
+        """
+        Free the place of a finished operation
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            Finished operation
+        """
+
+        with self._lock:
+            self._pending -= 1
+
+
+def time_bcrypt_rounds(rounds: int, samples: int = 3) -> float:
+    """
+    Time a bcrypt hash at a cost on the current machine
+
+    Parameters
+    ----------
+    rounds : int
+        Base two logarithm of the bcrypt iterations
+    samples : int
+        Number of timed hashes
+
+    Returns
+    -------
+    float
+        Median hash time in milliseconds
+    """
+
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration password")
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+    timer: Callable[[int], float] = time_bcrypt_rounds,
+) -> int:
+    """
+    Pick the highest bcrypt cost whose hash time meets a
+    target on the current machine, never below the minimum
+    cost even if it misses the target. Each extra round
+    doubles the time, so the search stops at the first miss
+
+    Parameters
+    ----------
+    target_ms : float
+        Maximum hash time in milliseconds
+    min_rounds : int
+        Lowest cost to pick
+    max_rounds : int
+        Highest cost to pick
+    timer : Callable[[int], float]
+        Hash time in milliseconds of a cost
+
+    Returns
+    -------
+    int
+        Picked cost
+    """
+
+    rounds = min_rounds
+
+    while rounds < max_rounds and timer(rounds + 1) <= target_ms:
+        rounds += 1
+
+    return rounds
+
+
+def benchmark_bcrypt_rounds(
+    min_rounds: int, max_rounds: int, samples: int = 3
+) -> Dict[int, float]:
+    """
+    Time a bcrypt hash at every cost of a range
+
+    Parameters
+    ----------
+    min_rounds : int
+        Lowest timed cost
+    max_rounds : int
+        Highest timed cost
+    samples : int
+        Number of timed hashes per cost
+
+    Returns
+    -------
+    Dict[int, float]
+        Median hash time in milliseconds per cost
+    """
+
+    return {
+        rounds: time_bcrypt_rounds(rounds=rounds, samples=samples)
+        for rounds in range(min_rounds, max_rounds + 1)
+    }
+
+
+async def configure_bcrypt_rounds() -> Optional[int]:
+    """
+    Apply the bcrypt cost from the environment, BCRYPT_ROUNDS
+    is used as is, otherwise BCRYPT_TARGET_MS is calibrated on
+    the current machine off the event loop
+
+    Returns
+    -------
+    Optional[int]
+        Configured cost, None if the passlib default is kept
+    """
+
+    if BCRYPT_ROUNDS:
+        return int(BCRYPT_ROUNDS)
+
+    if not BCRYPT_TARGET_MS:
+        return None
+
+    rounds = await run_in_threadpool(calibrate_bcrypt_rounds, float(BCRYPT_TARGET_MS))
+    set_bcrypt_rounds(rounds=rounds)
+
+    return rounds
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Password hashing command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Password hashing")
+    parser.add_argument("command", choices=["calibrate", "benchmark"])
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--min-rounds", type=int, default=BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=BCRYPT_MAX_ROUNDS)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        rounds = calibrate_bcrypt_rounds(
+            target_ms=args.target_ms,
+            min_rounds=args.min_rounds,
+            max_rounds=args.max_rounds,
+        )
+        print(f"BCRYPT_ROUNDS={rounds}")
+
+        return
+
+    for rounds, milliseconds in benchmark_bcrypt_rounds(
+        min_rounds=args.min_rounds, max_rounds=args.max_rounds, samples=args.samples
+    ).items():
+        print(f"{rounds}: {milliseconds:.1f}ms")
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("PASSWORD_HASHER_WORKERS", DEFAULT_PASSWORD_HASHER_WORKERS)),
+    queue_size=int(
+        os.getenv("PASSWORD_HASHER_QUEUE_SIZE", DEFAULT_PASSWORD_HASHER_QUEUE_SIZE)
+    ),
+)
+
+
+if __name__ == "__main__":
+    main()
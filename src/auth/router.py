@@ -1,31 +1,112 @@
-from fastapi import APIRouter, Depends, status
+from typing import Annotated, Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
-from src.auth.Auth import Auth
-from src.auth.schemas import AuthResponse, UserSignIn, UserSignUp, VerifyTokenResponse
-from src.auth.utils import verify_access_token
+from src.auth.AsyncAuth import AsyncAuth
+from src.auth.hashing import password_hasher
+from src.auth.schemas import (
+    AuthResponse,
+    PasswordHasherStatsResponse,
+    RefreshTokenRequest,
+    RevokeTokenResponse,
+    UserSignIn,
+    UserSignUp,
+    VerifyTokenResponse,
+)
+from src.auth.utils import decode_access_token, verify_access_token
 
 auth_router = APIRouter(prefix="/auth")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+
+async def get_access_token_claims(
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> Dict[str, Any]:
+    """
+    Verify the request's access token and get its claims,
+    FastAPI solves a dependency once per request so every
+    dependent of a request shares one verification
+
+    Parameters
+    ----------
+    token : Annotated[str, Depends(oauth2_scheme)]
+        The access token
+
+    Returns
+    -------
+    Dict[str, Any]
+        Claims of the token
+
+    Raises
+    ------
+    TokenVerificationError
+        If the token is not valid
+    """
+
+    return decode_access_token(token=token)
 
 
-def get_auth() -> Auth:
+async def get_event_stream_claims(
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+    access_token: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Returns an Auth instance
+    Verify the access token of an event stream and get its
+    claims, the browser EventSource cannot set headers so the
+    token is also accepted in the access_token query parameter
+
+    Parameters
+    ----------
+    token : Annotated[Optional[str], Depends(optional_oauth2_scheme)]
+        The access token of the Authorization header
+    access_token : Optional[str]
+        The access token of the query string
 
     Returns
     -------
-    Auth
-        Auth instance
+    Dict[str, Any]
+        Claims of the token
+
+    Raises
+    ------
+    HTTPException
+        If no token is sent
+    TokenVerificationError
+        If the token is not valid
     """
 
-    return Auth()
+    token = token or access_token
+
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return decode_access_token(token=token)
+
+
+async def get_auth() -> AsyncAuth:
+    """
+    Returns an AsyncAuth instance
+
+    Returns
+    -------
+    AsyncAuth
+        AsyncAuth instance
+    """
+
+    return AsyncAuth()
 
 
 @auth_router.post("/token", status_code=status.HTTP_200_OK, response_model=AuthResponse)
-def sign_in(
-    form_data: OAuth2PasswordRequestForm = Depends(), auth: Auth = Depends(get_auth)
+async def sign_in(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    auth: AsyncAuth = Depends(get_auth),
 ) -> AuthResponse:
     """
     Sign in user and email and token
@@ -34,8 +115,8 @@ def sign_in(
     ----------
     form_data : OAuth2PasswordRequestForm
         Form data with username (email) and password
-    auth : Auth
-        Auth instance
+    auth : AsyncAuth
+        AsyncAuth instance
 
     Returns
     -------
@@ -45,13 +126,15 @@ def sign_in(
 
     user = UserSignIn(email=form_data.username, password=form_data.password)
 
-    return auth.sign_in(user=user)
+    return await auth.sign_in(user=user)
 
 
 @auth_router.post(
     "/sign-up", status_code=status.HTTP_201_CREATED, response_model=AuthResponse
 )
-def sign_up(user: UserSignUp, auth: Auth = Depends(get_auth)) -> AuthResponse:
+async def sign_up(
+    user: UserSignUp, auth: AsyncAuth = Depends(get_auth)
+) -> AuthResponse:
     """
     Sign up user
 
@@ -59,8 +142,8 @@ def sign_up(user: UserSignUp, auth: Auth = Depends(get_auth)) -> AuthResponse:
     ----------
     user : UserSignUp
         User data
-    auth : Auth
-        Auth instance
+    auth : AsyncAuth
+        AsyncAuth instance
 
     Returns
     -------
@@ -68,11 +151,61 @@ def sign_up(user: UserSignUp, auth: Auth = Depends(get_auth)) -> AuthResponse:
         Response detail
     """
 
-    return auth.sign_up(user=user)
+    return await auth.sign_up(user=user)
+
+
+@auth_router.post(
+    "/refresh", status_code=status.HTTP_200_OK, response_model=AuthResponse
+)
+async def refresh(
+    refresh_request: RefreshTokenRequest, auth: AsyncAuth = Depends(get_auth)
+) -> AuthResponse:
+    """
+    Exchange a refresh token for a new access token and refresh token
+
+    Parameters
+    ----------
+    refresh_request : RefreshTokenRequest
+        Refresh token
+    auth : AsyncAuth
+        AsyncAuth instance
+
+    Returns
+    -------
+    AuthResponse
+        Response detail with the new tokens
+    """
+
+    return await auth.refresh(refresh_request=refresh_request)
+
+
+@auth_router.post(
+    "/revoke", status_code=status.HTTP_200_OK, response_model=RevokeTokenResponse
+)
+async def revoke(
+    refresh_request: RefreshTokenRequest, auth: AsyncAuth = Depends(get_auth)
+) -> RevokeTokenResponse:
+    """
+    Revoke a refresh token and every rotation of it
+
+    Parameters
+    ----------
+    refresh_request : RefreshTokenRequest
+        Refresh token
+    auth : AsyncAuth
+        AsyncAuth instance
+
+    Returns
+    -------
+    RevokeTokenResponse
+        Response detail
+    """
+
+    return await auth.revoke(refresh_request=refresh_request)
 
 
 @auth_router.post("/verify-token", status_code=status.HTTP_200_OK)
-def verify_token(token: str) -> VerifyTokenResponse:
+async def verify_token(token: str) -> VerifyTokenResponse:
     """
     Verify access token
 
@@ -90,3 +223,28 @@ def verify_token(token: str) -> VerifyTokenResponse:
     verify_access_token(token=token)
 
     return VerifyTokenResponse(detail="Token is valid")
+
+
+@auth_router.get(
+    "/hasher-stats",
+    status_code=status.HTTP_200_OK,
+    response_model=PasswordHasherStatsResponse,
+)
+async def get_hasher_stats(
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+) -> PasswordHasherStatsResponse:
+    """
+    Get the password hasher counters
+
+    Parameters
+    ----------
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+
+    Returns
+    -------
+    PasswordHasherStatsResponse
+        Pool size, queue depth and hash latency
+    """
+
+    return password_hasher.stats()
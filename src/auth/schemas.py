@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, SecretStr
 
 
@@ -17,7 +19,28 @@ class AuthResponse(BaseModel):
     email: str
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class RevokeTokenResponse(BaseModel):
+    detail: str
 
 
 class VerifyTokenResponse(BaseModel):
     detail: str
+
+
+class PasswordHasherStatsResponse(BaseModel):
+    workers: int
+    queue_size: int
+    running: int
+    queued: int
+    completed: int
+    rejected: int
+    average_wait_ms: float
+    average_hash_ms: float
+    max_hash_ms: float
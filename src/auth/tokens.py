@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DEFAULT_ACCESS_TOKEN_CACHE_SIZE = 10_000
+
+Claims = Dict[str, Any]
+
+
+def get_token_digest(token: str, secret: str) -> bytes:
+    """
+    Get the cache key of a token, the secret is part of the
+    digest so rotating it invalidates every cached token
+
+    Parameters
+    ----------
+    token : str
+        Access token
+    secret : str
+        Key the token is verified with
+
+    Returns
+    -------
+    bytes
+        SHA-256 digest
+    """
+
+    return hashlib.sha256(f"{secret}.{token}".encode()).digest()
+
+
+class AccessTokenCache:
+    """
+    In-process LRU cache of verified access token claims
+
+    Tokens are keyed by digest so the cache never holds a
+    usable token, and each entry is valid until the expiration
+    of its token, so a cached token is never accepted past
+    the time a full verification would reject it
+
+    Attributes
+    ----------
+    max_size : int
+        Maximum number of cached tokens
+
+    Methods
+    -------
+    get(token: str, secret: str) -> Optional[Claims]
+        Get the claims of a verified token
+    set(token: str, secret: str, claims: Claims) -> None
+        Cache the claims of a verified token until it expires
+    clear() -> None
+        Drop every cached token
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_ACCESS_TOKEN_CACHE_SIZE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Initialize access token cache
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of cached tokens
+        clock : Callable[[], float]
+            Wall clock in seconds since the epoch
+        """
+
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens: "OrderedDict[bytes, Tuple[float, Claims]]" = OrderedDict()
+
+    def get(self, token: str, secret: str) -> Optional[Claims]:
+        """
+        Get the claims of a verified token
+
+        Parameters
+        ----------
+        token : str
+            Access token
+        secret : str
+            Key the token is verified with
+
+        Returns
+        -------
+        Optional[Claims]
+            Copy of the claims of the token, None if not cached or expired
+        """
+
+        key = get_token_digest(token=token, secret=secret)
+
+        with self._lock:
+            entry = self._tokens.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, claims = entry
+
+            if expires_at <= self._clock():
+                del self._tokens[key]
+                return None
+
+            self._tokens.move_to_end(key)
+
+            return dict(claims)
+
+    def set(self, token: str, secret: str, claims: Claims) -> None:
+        """
+        Cache a copy of the claims of a verified token until
+        it expires, tokens without expiration are not cached
+
+        Parameters
+        ----------
+        token : str
+            Access token
+        secret : str
+            Key the token was verified with
+        claims : Claims
+            Claims of the token
+        """
+
+        expires_at = claims.get("exp")
+
+        if not isinstance(expires_at, (int, float)):
+            return
+
+        key = get_token_digest(token=token, secret=secret)
+
+        with self._lock:
+            self._tokens[key] = (float(expires_at), dict(claims))
+            self._tokens.move_to_end(key)
+
+            if len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop every cached token
+        """
+
+        with self._lock:
+            self._tokens.clear()
+
+    def __len__(self) -> int:
+        """
+        Get the number of cached tokens
+
+        Returns
+        -------
+        int
+            Number of cached tokens
+        """
+
+        return len(self._tokens)
+
+
+access_token_cache = AccessTokenCache(
+    max_size=int(os.getenv("ACCESS_TOKEN_CACHE_SIZE", DEFAULT_ACCESS_TOKEN_CACHE_SIZE))
+)
@@ -1,21 +1,31 @@
+import hashlib
+import hmac
 import os
+import secrets
 from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 from jose import jwt
 from passlib.context import CryptContext
 
 from src.auth.exceptions import SecretNotProvided, TokenVerificationError
+from src.auth.tokens import access_token_cache
 
 load_dotenv()
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+
 
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_TIME_MINUTES = 30
 
+REFRESH_TOKEN_EXPIRATION_DAYS = 30
+REFRESH_TOKEN_BYTES = 32
+
 
 def get_password_hash(password: str) -> str:
     """
@@ -55,6 +65,48 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify password and rehash it when its hash
+    does not use the configured bcrypt cost
+
+    Parameters
+    ----------
+    plain_password : str
+        Plain password
+    hashed_password : str
+        Hashed password
+
+    Returns
+    -------
+    Tuple[bool, Optional[str]]
+        Whether password is valid and the new hash to store,
+        None if the stored hash is up to date
+    """
+
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    """
+    Set the bcrypt cost of new hashes, stored hashes
+    with another cost are rehashed on the next sign in
+
+    Parameters
+    ----------
+    rounds : int
+        Base two logarithm of the bcrypt iterations
+    """
+
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
 def create_access_token() -> str:
     """
     Create access token
@@ -84,9 +136,56 @@ def create_access_token() -> str:
     return jwt.encode(claims=token_props, key=JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
-def verify_access_token(token: str) -> bool:
+def create_refresh_token() -> Tuple[str, datetime]:
     """
-    Verify access token
+    Create refresh token, an opaque random string
+
+    Returns
+    -------
+    Tuple[str, datetime]
+        Refresh token and its expiration
+    """
+
+    return secrets.token_urlsafe(REFRESH_TOKEN_BYTES), datetime.now(
+        timezone.utc
+    ) + timedelta(days=REFRESH_TOKEN_EXPIRATION_DAYS)
+
+
+def get_refresh_token_hash(token: str) -> str:
+    """
+    Get the stored hash of a refresh token, refresh tokens
+    are random so a keyed SHA-256 is enough and keeps the
+    lookup to one indexed read instead of a password hash
+
+    Parameters
+    ----------
+    token : str
+        Refresh token
+
+    Returns
+    -------
+    str
+        HMAC-SHA256 of the token keyed by the JWT secret key
+
+    Raises
+    ------
+    SecretNotProvided
+        If JWT secret key is not provided
+    """
+
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+
+    if not JWT_SECRET_KEY:
+        raise SecretNotProvided("JWT secret key not provided")
+
+    return hmac.new(JWT_SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify access token and get its claims, tokens verified
+    before are read from the access token cache until they
+    expire so repeated requests skip the signature check
 
     Parameters
     ----------
@@ -95,13 +194,15 @@ def verify_access_token(token: str) -> bool:
 
     Returns
     -------
-    bool
-        Whether token is valid
+    Dict[str, Any]
+        Claims of the token
 
     Raises
     ------
     SecretNotProvided
         If JWT secret key is not provided
+    TokenVerificationError
+        If the token is not valid
     """
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -109,9 +210,47 @@ def verify_access_token(token: str) -> bool:
     if not JWT_SECRET_KEY:
         raise SecretNotProvided("JWT secret key not provided")
 
+    claims = access_token_cache.get(token=token, secret=JWT_SECRET_KEY)
+
+    if claims is not None:
+        return claims
+
     try:
-        jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
     except:
         raise TokenVerificationError()
 
+    access_token_cache.set(token=token, secret=JWT_SECRET_KEY, claims=claims)
+
+    return claims
+
+
+def verify_access_token(token: str) -> bool:
+    """
+    Verify access token
+
+    Parameters
+    ----------
+    token : str
+        Access token
+
+    Returns
+    -------
+    bool
+        Whether token is valid
+
+    Raises
+    ------
+    SecretNotProvided
+        If JWT secret key is not provided
+    TokenVerificationError
+        If the token is not valid
+    """
+
+    decode_access_token(token=token)
+
     return True
+
+
+if BCRYPT_ROUNDS:
+    set_bcrypt_rounds(rounds=int(BCRYPT_ROUNDS))
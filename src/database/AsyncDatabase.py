@@ -0,0 +1,93 @@
+import threading
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.database.Database import Database
+from src.database.exceptions import DatabaseResponseException
+
+
+class AsyncDatabase:
+    """
+    Async database handler
+
+    The client is created lazily on the first call to get_client
+    and shared by every async handler for the life of the process.
+    Creating it performs no I/O, so the connection is verified
+    once at application startup with test_connection
+
+    Attributes
+    ----------
+    _client : Optional[AsyncIOMotorClient]
+        Process-wide async database client
+    _client_lock : threading.Lock
+        Lock guarding the creation of the client
+
+    Methods
+    -------
+    get_client() -> AsyncIOMotorClient
+        Return the async database client
+    test_connection() -> None
+        Test connection to database
+    close_client() -> None
+        Close the process-wide async client
+    """
+
+    _client: Optional[AsyncIOMotorClient] = None
+    _client_lock = threading.Lock()
+
+    def get_client(self) -> AsyncIOMotorClient:
+        """
+        Return the async database client
+
+        Returns
+        -------
+        AsyncIOMotorClient
+            Async database client
+
+        Raises
+        ------
+        ConnectionStringException
+            If the connection string is not provided
+        DatabaseConnectionException
+            If there is an error creating the client
+        """
+
+        if AsyncDatabase._client is not None:
+            return AsyncDatabase._client
+
+        with AsyncDatabase._client_lock:
+            if AsyncDatabase._client is None:
+                AsyncDatabase._client = Database()._create_client(
+                    client_class=AsyncIOMotorClient
+                )
+
+        return AsyncDatabase._client
+
+    async def test_connection(self) -> None:
+        """
+        Test connection to database
+
+        Raises
+        ------
+        DatabaseResponseException
+            If there is an error in the database response
+        """
+
+        client = self.get_client()
+
+        try:
+            await client.admin.command("ping")
+        except:
+            raise DatabaseResponseException("Error in database response")
+
+    @classmethod
+    def close_client(cls) -> None:
+        """
+        Close the process-wide async client
+        """
+
+        with cls._client_lock:
+            if cls._client is not None:
+                cls._client.close()
+                cls._client = None
@@ -0,0 +1,74 @@
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from src.database.Repository import get_projection
+
+
+class AsyncRepository:
+    """
+    Async collection reader that projects every
+    lookup, so callers always name the fields they need
+
+    Attributes
+    ----------
+    collection : AsyncIOMotorCollection
+        Wrapped collection
+
+    Methods
+    -------
+    find_one(query: Mapping[str, Any], fields: Sequence[str]) -> Optional[Dict[str, Any]]
+        Find a document returning only the given fields
+    exists(query: Mapping[str, Any]) -> bool
+        Check if a document matches the query
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        """
+        Initialize async repository
+
+        Parameters
+        ----------
+        collection : AsyncIOMotorCollection
+            Wrapped collection
+        """
+
+        self.collection = collection
+
+    async def find_one(
+        self, query: Mapping[str, Any], fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a document returning only the given fields
+
+        Parameters
+        ----------
+        query : Mapping[str, Any]
+            Query filter
+        fields : Sequence[str]
+            Fields to return
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            Projected document
+        """
+
+        return await self.collection.find_one(query, projection=get_projection(fields))
+
+    async def exists(self, query: Mapping[str, Any]) -> bool:
+        """
+        Check if a document matches the query
+
+        Parameters
+        ----------
+        query : Mapping[str, Any]
+            Query filter
+
+        Returns
+        -------
+        bool
+            Whether a document matches
+        """
+
+        return await self.find_one(query, fields=[]) is not None
@@ -1,4 +1,6 @@
 import os
+import threading
+from typing import Any, Dict, Optional, Type, TypeVar
 
 from dotenv import load_dotenv
 from pymongo.mongo_client import MongoClient
@@ -8,30 +10,57 @@ from src.database.exceptions import (
     ConnectionStringException,
     DatabaseConnectionException,
     DatabaseResponseException,
+    PoolConfigurationException,
 )
 
 load_dotenv()
 
 
+ClientT = TypeVar("ClientT")
+
+
+DATABASE_NAME = "task-manager-db"
+
+DEFAULT_MAX_POOL_SIZE = 100
+DEFAULT_MIN_POOL_SIZE = 0
+DEFAULT_MAX_IDLE_TIME_MS = 60000
+
+
 class Database:
     """
     Database handler
 
+    The client is created lazily on the first call to get_client
+    and shared by every handler for the life of the process
+
     Attributes
     ----------
     __connection_string : str
         Connection string to connect to database
+    _client : Optional[MongoClient]
+        Process-wide database client
+    _client_lock : threading.Lock
+        Lock guarding the creation of the client
 
     Methods
     -------
     get_client() -> MongoClient
         Connect to database and return client
+    close_client() -> None
+        Close the process-wide client
+    _create_client(client_class: Type[ClientT]) -> ClientT
+        Create a pooled client of the given class
     _set_connection_string() -> None
         Set connection string to connect to database
+    _get_pool_options() -> Dict[str, int]
+        Get connection pool options
     _test_connection(client: MongoClient) -> None
         Test connection to database
     """
 
+    _client: Optional[MongoClient] = None
+    _client_lock = threading.Lock()
+
     def __init__(self) -> None:
         """
         Initialize database handler
@@ -54,17 +83,68 @@ class Database:
             If there is an error connecting to the database
         """
 
+        if Database._client is not None:
+            return Database._client
+
+        with Database._client_lock:
+            if Database._client is not None:
+                return Database._client
+
+            client = self._create_client(client_class=MongoClient)
+
+            try:
+                self._test_connection(client=client)
+            except:
+                client.close()
+                raise
+
+            Database._client = client
+
+        return client
+
+    @classmethod
+    def close_client(cls) -> None:
+        """
+        Close the process-wide client
+        """
+
+        with cls._client_lock:
+            if cls._client is not None:
+                cls._client.close()
+                cls._client = None
+
+    def _create_client(self, client_class: Type[ClientT]) -> ClientT:
+        """
+        Create a pooled client of the given class
+
+        Parameters
+        ----------
+        client_class : Type[ClientT]
+            Client class, either sync or async
+
+        Returns
+        -------
+        ClientT
+            Database client
+
+        Raises
+        ------
+        DatabaseConnectionException
+            If there is an error connecting to the database
+        """
+
         self._set_connection_string()
+        pool_options = self._get_pool_options()
 
         try:
-            client = MongoClient(self.__connection_string, server_api=ServerApi("1"))
+            return client_class(
+                self.__connection_string,
+                server_api=ServerApi("1"),
+                **pool_options,
+            )
         except:
             raise DatabaseConnectionException("Error connecting to database")
 
-        self._test_connection(client=client)
-
-        return client
-
     def _set_connection_string(self) -> None:
         """
         Set connection string to connect to database
@@ -82,6 +162,46 @@ class Database:
 
         self.__connection_string = connection_string
 
+    def _get_pool_options(self) -> Dict[str, Any]:
+        """
+        Get connection pool options from the environment
+
+        Returns
+        -------
+        Dict[str, Any]
+            Keyword arguments for the client
+
+        Raises
+        ------
+        PoolConfigurationException
+            If a pool option is not a non-negative integer
+        """
+
+        options = {
+            "maxPoolSize": ("MONGODB_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE),
+            "minPoolSize": ("MONGODB_MIN_POOL_SIZE", DEFAULT_MIN_POOL_SIZE),
+            "maxIdleTimeMS": ("MONGODB_MAX_IDLE_TIME_MS", DEFAULT_MAX_IDLE_TIME_MS),
+        }
+
+        pool_options = {}
+
+        for option, (variable, default) in options.items():
+            value = os.getenv(variable)
+
+            if value is None:
+                pool_options[option] = default
+                continue
+
+            try:
+                pool_options[option] = int(value)
+            except ValueError:
+                raise PoolConfigurationException(f"{variable} must be an integer")
+
+            if pool_options[option] < 0:
+                raise PoolConfigurationException(f"{variable} must not be negative")
+
+        return pool_options
+
     def _test_connection(self, client: MongoClient) -> None:
         """
         Test connection to database
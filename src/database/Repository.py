@@ -0,0 +1,90 @@
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from pymongo.collection import Collection
+
+
+def get_projection(fields: Sequence[str]) -> Dict[str, int]:
+    """
+    Build a projection that returns only the given fields
+
+    Parameters
+    ----------
+    fields : Sequence[str]
+        Fields to return, _id is always included
+
+    Returns
+    -------
+    Dict[str, int]
+        Projection document
+    """
+
+    return {field: 1 for field in fields} or {"_id": 1}
+
+
+class Repository:
+    """
+    Collection reader that projects every lookup,
+    so callers always name the fields they need
+
+    Attributes
+    ----------
+    collection : pymongo.collection.Collection
+        Wrapped collection
+
+    Methods
+    -------
+    find_one(query: Mapping[str, Any], fields: Sequence[str]) -> Optional[Dict[str, Any]]
+        Find a document returning only the given fields
+    exists(query: Mapping[str, Any]) -> bool
+        Check if a document matches the query
+    """
+
+    def __init__(self, collection: Collection) -> None:
+        """
+        Initialize repository
+
+        Parameters
+        ----------
+        collection : pymongo.collection.Collection
+            Wrapped collection
+        """
+
+        self.collection = collection
+
+    def find_one(
+        self, query: Mapping[str, Any], fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a document returning only the given fields
+
+        Parameters
+        ----------
+        query : Mapping[str, Any]
+            Query filter
+        fields : Sequence[str]
+            Fields to return
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            Projected document
+        """
+
+        return self.collection.find_one(query, projection=get_projection(fields))
+
+    def exists(self, query: Mapping[str, Any]) -> bool:
+        """
+        Check if a document matches the query
+
+        Parameters
+        ----------
+        query : Mapping[str, Any]
+            Query filter
+
+        Returns
+        -------
+        bool
+            Whether a document matches
+        """
+
+        return self.find_one(query, fields=[]) is not None
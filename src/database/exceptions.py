@@ -23,3 +23,12 @@ class DatabaseResponseException(Exception):
     """
 
     pass
+
+
+class PoolConfigurationException(Exception):
+    """
+    Exception that is raised when
+    the connection pool is misconfigured
+    """
+
+    pass
@@ -0,0 +1,185 @@
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.database import Database as MongoDatabase
+
+from src.database.Database import DATABASE_NAME, Database
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "tasks": [
+        IndexModel(
+            [("owner", ASCENDING), ("title", ASCENDING)],
+            name="owner_title_unique",
+            unique=True,
+        ),
+        IndexModel(
+            [("owner", ASCENDING), ("deadline", ASCENDING), ("title", ASCENDING)],
+            name="owner_deadline_title",
+        ),
+        IndexModel([("deadline", ASCENDING)], name="deadline"),
+        IndexModel(
+            [
+                ("owner", ASCENDING),
+                ("status", ASCENDING),
+                ("deadline", ASCENDING),
+                ("title", ASCENDING),
+            ],
+            name="owner_status_deadline_title",
+        ),
+        IndexModel(
+            [("owner", ASCENDING), ("version", ASCENDING)], name="owner_version"
+        ),
+        IndexModel(
+            [("owner", ASCENDING), ("pending", ASCENDING)],
+            name="owner_pending",
+            partialFilterExpression={"pending": {"$exists": True}},
+        ),
+        IndexModel(
+            [("owner", ASCENDING), ("title", TEXT), ("description", TEXT)],
+            name="owner_title_description_text",
+            weights={"title": 5, "description": 1},
+            default_language="none",
+        ),
+    ],
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], name="token_hash_unique", unique=True),
+        IndexModel([("family", ASCENDING)], name="family"),
+        IndexModel(
+            [("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0
+        ),
+    ],
+    "task_counters": [
+        IndexModel(
+            [("owner", ASCENDING), ("field", ASCENDING), ("value", ASCENDING)],
+            name="owner_field_value_unique",
+            unique=True,
+        ),
+    ],
+    "task_tombstones": [
+        IndexModel(
+            [("owner", ASCENDING), ("version", ASCENDING)], name="owner_version"
+        ),
+        IndexModel(
+            [("owner", ASCENDING), ("pending", ASCENDING)],
+            name="owner_pending",
+            partialFilterExpression={"pending": {"$exists": True}},
+        ),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+}
+
+
+def ensure_indexes(database: MongoDatabase) -> Dict[str, List[str]]:
+    """
+    Create the declared indexes, existing
+    indexes with the same spec are left untouched
+
+    Parameters
+    ----------
+    database : pymongo.database.Database
+        Database to create the indexes in
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        Names of the ensured indexes per collection
+    """
+
+    return {
+        collection: database[collection].create_indexes(indexes)
+        for collection, indexes in INDEXES.items()
+    }
+
+
+async def ensure_indexes_async(database: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """
+    Create the declared indexes with the async client,
+    existing indexes with the same spec are left untouched
+
+    Parameters
+    ----------
+    database : AsyncIOMotorDatabase
+        Database to create the indexes in
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        Names of the ensured indexes per collection
+    """
+
+    return {
+        collection: await database[collection].create_indexes(indexes)
+        for collection, indexes in INDEXES.items()
+    }
+
+
+def get_index_report(database: MongoDatabase) -> Dict[str, List[str]]:
+    """
+    Report declared indexes that are missing and existing
+    indexes that are undeclared or have not served any operation
+    since the server last reset its index statistics
+
+    Parameters
+    ----------
+    database : pymongo.database.Database
+        Database to inspect
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        Missing and unused indexes as "collection.index" names
+    """
+
+    report: Dict[str, List[str]] = {"missing": [], "unused": []}
+
+    for collection, indexes in INDEXES.items():
+        declared = {index.document["name"] for index in indexes}
+        existing = {index["name"] for index in database[collection].list_indexes()}
+        usage = {
+            stats["name"]: stats["accesses"]["ops"]
+            for stats in database[collection].aggregate([{"$indexStats": {}}])
+        }
+
+        for name in sorted(declared - existing):
+            report["missing"].append(f"{collection}.{name}")
+
+        for name in sorted(existing - {"_id_"}):
+            if name not in declared or not usage.get(name):
+                report["unused"].append(f"{collection}.{name}")
+
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Index management command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Manage database indexes")
+    parser.add_argument("command", choices=["ensure", "report"])
+    args = parser.parse_args(argv)
+
+    database = Database().get_client()[DATABASE_NAME]
+
+    if args.command == "ensure":
+        for collection, names in ensure_indexes(database=database).items():
+            print(f"{collection}: {', '.join(names)}")
+
+        return
+
+    for status, names in get_index_report(database=database).items():
+        print(f"{status}: {', '.join(names) if names else '-'}")
+
+
+if __name__ == "__main__":
+    main()
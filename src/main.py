@@ -1,14 +1,69 @@
+import asyncio
 import re
-from typing import Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
+from src.auth.hashing import configure_bcrypt_rounds, password_hasher
 from src.auth.router import auth_router
+from src.database.AsyncDatabase import AsyncDatabase
+from src.database.Database import DATABASE_NAME, Database
+from src.database.indexes import ensure_indexes_async
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.events import start_change_stream, task_events
+from src.tasks.reminders import TASK_REMINDERS_ENABLED, task_reminders
 from src.tasks.router import tasks_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Application lifespan, applies the bcrypt cost, verifies the
+    async database connection, ensures indexes and starts the
+    task change stream and, when
+    enabled, the deadline reminders on startup and stops them, the
+    password hasher threads and closes the clients on shutdown
+
+    Parameters
+    ----------
+    app : FastAPI
+        The application
+    """
+
+    await configure_bcrypt_rounds()
+    await AsyncDatabase().test_connection()
+
+    database = AsyncDatabase().get_client()[DATABASE_NAME]
+
+    await ensure_indexes_async(database=database)
+
+    change_stream = await start_change_stream(database=database, broker=task_events)
+    reminders = (
+        asyncio.create_task(
+            task_reminders.run(get_due_tasks=AsyncTasks().get_due_tasks)
+        )
+        if TASK_REMINDERS_ENABLED
+        else None
+    )
+
+    yield
+
+    if change_stream is not None:
+        change_stream.cancel()
+
+    if reminders is not None:
+        reminders.cancel()
+
+    password_hasher.shutdown()
+
+    AsyncDatabase.close_client()
+    Database.close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -52,7 +107,7 @@ async def custom_cors_middleware(
                 return Response(
                     headers={
                         "Access-Control-Allow-Origin": origin,
-                        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+                        "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, DELETE, OPTIONS",
                         "Access-Control-Allow-Headers": "*",
                         "Access-Control-Allow-Credentials": "true",
                     }
@@ -63,7 +118,7 @@ async def custom_cors_middleware(
             response.headers["Access-Control-Allow-Origin"] = origin
             response.headers[
                 "Access-Control-Allow-Methods"
-            ] = "GET, POST, PUT, DELETE, OPTIONS"
+            ] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
             response.headers["Access-Control-Allow-Headers"] = "*"
             response.headers["Access-Control-Allow-Credentials"] = "true"
 
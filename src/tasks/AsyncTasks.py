@@ -0,0 +1,1042 @@
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Mapping, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorCursor
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from src.database.AsyncDatabase import AsyncDatabase
+from src.database.AsyncRepository import AsyncRepository
+from src.database.Database import DATABASE_NAME
+from src.tasks.cache import get_page_key, tasks_cache
+from src.tasks.counters import (
+    COUNTED_PROJECTION,
+    build_tasks_summary,
+    get_count_deltas,
+    get_counter_writes,
+    get_overdue_query,
+)
+from src.tasks.events import task_events
+from src.tasks.exceptions import TaskAlreadyExists, TaskNotFound, UserNotFound
+from src.tasks.reminders import REMINDER_FIELDS, task_reminders
+from src.tasks.schemas import (
+    AddTask,
+    AddTaskOutcome,
+    AddTaskResponse,
+    AddTasks,
+    AddTasksResponse,
+    DeleteTaskResponse,
+    DueTask,
+    GetTasksResponse,
+    SearchTasksResponse,
+    StoredTask,
+    TaskChangesResponse,
+    TaskEvent,
+    TasksFilter,
+    TasksSummaryResponse,
+    UpcomingTasksResponse,
+    UpdateTask,
+    UpdateTaskResponse,
+)
+from src.tasks.search import (
+    DEFAULT_SEARCH_PAGE_SIZE,
+    SEARCH_PROJECTION,
+    SEARCH_SORT,
+    get_search_page,
+    get_search_query,
+)
+from src.tasks.utils import (
+    DEFAULT_TASKS_PAGE_SIZE,
+    DEFAULT_UPCOMING_HOURS,
+    EXPORT_BATCH_SIZE,
+    TASK_PROJECTION,
+    get_add_tasks_statuses,
+    get_changes_query,
+    get_deadline_window,
+    get_deadline_window_query,
+    get_next_cursor,
+    get_pending_stamp,
+    get_task_id,
+    get_tasks_page_query,
+    get_tasks_sort,
+    get_version_stamp,
+    mark_bulk_write_conflicts,
+)
+
+
+class AsyncTasks:
+    """
+    Async tasks handler
+
+    Mirrors Tasks on top of the async database client
+    so request handlers never block a worker thread. Writes
+    are published to the task event subscribers of the user
+    and reschedule the deadline reminders of the written tasks
+
+    Methods
+    -------
+    get_tasks(email: str, limit: int, cursor: Optional[str], tasks_filter: Optional[TasksFilter], version: Optional[int]) -> GetTasksResponse
+        Get a filtered page of a user's list of tasks
+    add_task(add_task_request: AddTask) -> AddTaskResponse
+        Add task
+    add_tasks(add_tasks_request: AddTasks) -> AddTasksResponse
+        Add a batch of tasks
+    update_task(update_task_request: UpdateTask) -> UpdateTaskResponse
+        Update fields of a task
+    get_task(email: str, task_id: str) -> StoredTask
+        Get a task by id
+    delete_task(email: str, task_id: str) -> DeleteTaskResponse
+        Delete a task
+    get_task_changes(email: str, since: int) -> TaskChangesResponse
+        Get the tasks written and deleted since a tasks version
+    get_tasks_summary(email: str) -> TasksSummaryResponse
+        Get the task counts of a user
+    get_upcoming_tasks(email: str, hours: float, limit: int) -> UpcomingTasksResponse
+        Get a user's tasks due in the next hours
+    search_tasks(email: str, text: str, limit: int, offset: int) -> SearchTasksResponse
+        Search a user's tasks by title and description
+    get_due_tasks(start: datetime, end: datetime) -> AsyncIterator[DueTask]
+        Get the tasks of every user due in a window
+    export_tasks(email: str) -> AsyncIterator[str]
+        Export a user's list of tasks as newline delimited JSON
+    get_tasks_version(email: str) -> int
+        Get the version of a user's list of tasks
+    _get_tombstones_version(email: str) -> int
+        Get the newest tasks version of a user's compacted tombstones
+    _bump_tasks_version(email: str) -> Optional[int]
+        Bump the version of a user's list of tasks
+    _stamp_write(collection: AsyncIOMotorCollection, email: str, write: ObjectId, version: int, change: str) -> None
+        Stamp the documents of a write with its tasks version
+    _count_tasks(email: str, deltas: Mapping[Tuple[str, str], int]) -> None
+        Apply changes to the task counters of a user
+    _encode_tasks(cursor: AsyncIOMotorCursor) -> AsyncIterator[str]
+        Encode the tasks of a cursor as JSON lines
+    _raise_task_not_found(email: str) -> None
+        Raise the error of a write that matched no task
+    _user_exists(email: str) -> bool
+        Check if a user exists
+    """
+
+    def __init__(self):
+        """
+        Initialize async tasks handler
+        """
+
+        self.client = AsyncDatabase().get_client()
+        self.users = self.client[DATABASE_NAME]["users"]
+        self.users_repository = AsyncRepository(collection=self.users)
+        self.tasks = self.client[DATABASE_NAME]["tasks"]
+        self.tombstones = self.client[DATABASE_NAME]["task_tombstones"]
+        self.task_counters = self.client[DATABASE_NAME]["task_counters"]
+        self.cache = tasks_cache
+        self.events = task_events
+        self.reminders = task_reminders
+
+    async def get_tasks(
+        self,
+        email: str,
+        limit: int = DEFAULT_TASKS_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        tasks_filter: Optional[TasksFilter] = None,
+        version: Optional[int] = None,
+    ) -> GetTasksResponse:
+        """
+        Get a filtered page of a user's list of tasks ordered by
+        deadline and title, the page is read from the tasks
+        collection through the (owner, deadline, title) indexes
+        and, given the tasks version, cached in process until a
+        write, its time to live or a change of that version
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        limit : int
+            Maximum number of tasks to return
+        cursor : Optional[str]
+            Cursor returned with the previous page
+        tasks_filter : Optional[TasksFilter]
+            Status, priority and deadline filters and order
+        version : Optional[int]
+            Tasks version read by the caller before the page, the
+            cache is bypassed when not given
+
+        Returns
+        -------
+        GetTasksResponse
+            The response body
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        InvalidCursor
+            If the cursor is malformed
+        """
+
+        page_key = get_page_key(limit=limit, cursor=cursor, tasks_filter=tasks_filter)
+        cached_response = (
+            self.cache.get(email=email, key=page_key, version=version)
+            if version is not None
+            else None
+        )
+
+        if cached_response is not None:
+            return cached_response
+
+        generation = self.cache.generation
+        query = get_tasks_page_query(
+            email=email, cursor=cursor, tasks_filter=tasks_filter
+        )
+        order = tasks_filter.order if tasks_filter else "asc"
+        tasks = (
+            await self.tasks.find(query, projection=TASK_PROJECTION)
+            .sort(get_tasks_sort(order=order))
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+
+        if not tasks and not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        next_cursor = get_next_cursor(tasks=tasks, limit=limit)
+        response = GetTasksResponse(tasks=tasks, next_cursor=next_cursor)
+
+        if version is not None:
+            self.cache.set(
+                email=email,
+                key=page_key,
+                response=response,
+                generation=generation,
+                version=version,
+            )
+
+        return response
+
+    async def add_task(self, add_task_request: AddTask) -> AddTaskResponse:
+        """
+        Add task to a user's list of tasks
+
+        The task is inserted as its own document marked as
+        pending, the unique (owner, title) index rejects duplicate
+        titles. Only then is the user's tasks version bumped, which
+        also checks that the user exists, and the task stamped
+        with it, so a reader never gets a version whose task
+        has not landed yet
+
+        Parameters
+        ----------
+        add_task_request : AddTask
+            The request body
+
+        Returns
+        -------
+        AddTaskResponse
+            The response body
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        TaskAlreadyExists
+            If the task already exists
+        """
+
+        email = add_task_request.email
+        write = ObjectId()
+        task = {
+            "owner": email,
+            **add_task_request.task.__dict__,
+            **get_pending_stamp(write=write),
+        }
+
+        try:
+            result = await self.tasks.insert_one(task)
+        except DuplicateKeyError:
+            raise TaskAlreadyExists()
+
+        self.cache.invalidate(email=email)
+        version = await self._bump_tasks_version(email=email)
+
+        if version is None:
+            await self.tasks.delete_one({"_id": result.inserted_id})
+            raise UserNotFound()
+
+        await self._stamp_write(
+            collection=self.tasks,
+            email=email,
+            write=write,
+            version=version,
+            change="added",
+        )
+        await self._count_tasks(
+            email=add_task_request.email,
+            deltas=get_count_deltas(before=None, after=task),
+        )
+        self.events.publish_write(
+            email=add_task_request.email,
+            event=TaskEvent(
+                type="added",
+                version=version,
+                id=str(result.inserted_id),
+                task=StoredTask.model_validate(
+                    {**task, "_id": result.inserted_id, "version": version}
+                ),
+            ),
+        )
+        self.reminders.schedule(
+            email=add_task_request.email, task_id=str(result.inserted_id), task=task
+        )
+
+        return AddTaskResponse(
+            detail="Task added successfully", id=str(result.inserted_id)
+        )
+
+    async def add_tasks(self, add_tasks_request: AddTasks) -> AddTasksResponse:
+        """
+        Add a batch of tasks to a user's list of tasks
+
+        Titles repeated in the batch or already in the list are
+        reported instead of inserted. The remaining tasks are
+        written as pending with a single unordered bulk insert, a
+        title added concurrently is caught by the unique
+        (owner, title) index and reported as already existing.
+        The added tasks are then stamped with a single new version,
+        or deleted again if the user was deleted meanwhile
+
+        Parameters
+        ----------
+        add_tasks_request : AddTasks
+            The request body
+
+        Returns
+        -------
+        AddTasksResponse
+            Number of added tasks and the outcome of each task
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        email = add_tasks_request.email
+
+        if not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        titles = [task.title for task in add_tasks_request.tasks]
+        existing_titles = {
+            task["title"]
+            async for task in self.tasks.find(
+                {"owner": email, "title": {"$in": list(set(titles))}},
+                projection={"_id": 0, "title": 1},
+            )
+        }
+        statuses = get_add_tasks_statuses(
+            titles=titles, existing_titles=existing_titles
+        )
+        task_ids = {
+            index: ObjectId()
+            for index, status in enumerate(statuses)
+            if status == "added"
+        }
+        pending = list(task_ids)
+
+        if pending:
+            write = ObjectId()
+            stamp = get_pending_stamp(write=write)
+            documents = [
+                {
+                    "_id": task_ids[index],
+                    "owner": email,
+                    **add_tasks_request.tasks[index].__dict__,
+                    **stamp,
+                }
+                for index in pending
+            ]
+
+            try:
+                await self.tasks.insert_many(documents, ordered=False)
+            except BulkWriteError as error:
+                mark_bulk_write_conflicts(
+                    statuses=statuses, pending=pending, error=error
+                )
+
+            if "added" in statuses:
+                self.cache.invalidate(email=email)
+                version = await self._bump_tasks_version(email=email)
+
+                if version is None:
+                    await self.tasks.delete_many({"owner": email, "pending": write})
+                    raise UserNotFound()
+
+                await self._stamp_write(
+                    collection=self.tasks,
+                    email=email,
+                    write=write,
+                    version=version,
+                    change="added",
+                )
+                await self._count_tasks(
+                    email=email,
+                    deltas=sum(
+                        (
+                            get_count_deltas(before=None, after=document)
+                            for index, document in zip(pending, documents)
+                            if statuses[index] == "added"
+                        ),
+                        Counter(),
+                    ),
+                )
+
+                for index, document in zip(pending, documents):
+                    if statuses[index] == "added":
+                        self.events.publish_write(
+                            email=email,
+                            event=TaskEvent(
+                                type="added",
+                                version=version,
+                                id=str(task_ids[index]),
+                                task=StoredTask.model_validate(
+                                    {**document, "version": version}
+                                ),
+                            ),
+                        )
+                        self.reminders.schedule(
+                            email=email, task_id=str(task_ids[index]), task=document
+                        )
+
+        return AddTasksResponse(
+            added=statuses.count("added"),
+            outcomes=[
+                AddTaskOutcome(
+                    title=title,
+                    id=str(task_ids[index]) if status == "added" else None,
+                    status=status,
+                )
+                for index, (title, status) in enumerate(zip(titles, statuses))
+            ],
+        )
+
+    async def get_task(self, email: str, task_id: str) -> StoredTask:
+        """
+        Get a task by id through the _id index
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        task_id : str
+            Id of the task
+
+        Returns
+        -------
+        StoredTask
+            The task
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        TaskNotFound
+            If the task is not found
+        """
+
+        task = await self.tasks.find_one(
+            {"_id": get_task_id(task_id), "owner": email}, projection=TASK_PROJECTION
+        )
+
+        if task is None:
+            await self._raise_task_not_found(email=email)
+
+        return StoredTask.model_validate(task)
+
+    async def update_task(self, update_task_request: UpdateTask) -> UpdateTaskResponse:
+        """
+        Update fields of a task in place, only the changed
+        fields and the pending mark of the task document are
+        written before the task is stamped with the bumped tasks
+        version. The previous task is returned by the same write
+        to move the task counters, reschedule the reminder of the
+        task and publish the updated task
+
+        Parameters
+        ----------
+        update_task_request : UpdateTask
+            The request body
+
+        Returns
+        -------
+        UpdateTaskResponse
+            The response body
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        TaskNotFound
+            If the task is not found
+        TaskAlreadyExists
+            If the new title is already taken
+        """
+
+        email = update_task_request.email
+        task_id = get_task_id(update_task_request.id)
+        write = ObjectId()
+        pending = get_pending_stamp(write=write)
+        changes = update_task_request.changes.model_dump(exclude_none=True)
+
+        try:
+            before = await self.tasks.find_one_and_update(
+                {"_id": task_id, "owner": email},
+                {"$set": {**changes, **pending}},
+                projection=TASK_PROJECTION,
+            )
+        except DuplicateKeyError:
+            raise TaskAlreadyExists()
+
+        if before is None:
+            await self._raise_task_not_found(email=email)
+
+        self.cache.invalidate(email=email)
+        version = await self._bump_tasks_version(email=email)
+
+        if version is None:
+            raise UserNotFound()
+
+        await self._stamp_write(
+            collection=self.tasks,
+            email=email,
+            write=write,
+            version=version,
+            change="updated",
+        )
+
+        after = {
+            **before,
+            **changes,
+            "updated_at": pending["updated_at"],
+            "version": version,
+        }
+
+        await self._count_tasks(
+            email=email, deltas=get_count_deltas(before=before, after=after)
+        )
+        self.events.publish_write(
+            email=email,
+            event=TaskEvent(
+                type="updated",
+                version=version,
+                id=str(task_id),
+                task=StoredTask.model_validate(after),
+            ),
+        )
+
+        if changes.keys() & set(REMINDER_FIELDS):
+            self.reminders.schedule(email=email, task_id=str(task_id), task=after)
+
+        return UpdateTaskResponse(detail="Task updated successfully")
+
+    async def delete_task(self, email: str, task_id: str) -> DeleteTaskResponse:
+        """
+        Delete a task from a user's list of tasks, a tombstone
+        written before the tasks version is bumped and stamped
+        with the new version records the deletion for
+        incremental sync
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        task_id : str
+            Id of the task
+
+        Returns
+        -------
+        DeleteTaskResponse
+            The response body
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        TaskNotFound
+            If the task is not found
+        """
+
+        task_object_id = get_task_id(task_id)
+        before = await self.tasks.find_one_and_delete(
+            {"_id": task_object_id, "owner": email}, projection=COUNTED_PROJECTION
+        )
+
+        if before is None:
+            await self._raise_task_not_found(email=email)
+
+        write = ObjectId()
+
+        await self.tombstones.insert_one(
+            {
+                "owner": email,
+                "task_id": task_object_id,
+                **get_pending_stamp(write=write),
+            }
+        )
+        self.cache.invalidate(email=email)
+        version = await self._bump_tasks_version(email=email)
+
+        if version is None:
+            raise UserNotFound()
+
+        await self._stamp_write(
+            collection=self.tombstones,
+            email=email,
+            write=write,
+            version=version,
+            change="deleted",
+        )
+        await self._count_tasks(
+            email=email, deltas=get_count_deltas(before=before, after=None)
+        )
+        self.events.publish_write(
+            email=email,
+            event=TaskEvent(type="deleted", version=version, id=str(task_object_id)),
+        )
+        self.reminders.cancel(task_id=str(task_object_id))
+
+        return DeleteTaskResponse(detail="Task deleted successfully")
+
+    async def get_task_changes(self, email: str, since: int) -> TaskChangesResponse:
+        """
+        Get the tasks written and the ids of the tasks deleted
+        since a tasks version, read through the (owner, version)
+        and (owner, pending) indexes so the cost follows the
+        number of changes. The version is read first, every write
+        it covers has landed as writes bump it after their
+        documents, and writes still pending are returned again
+        by the next sync
+
+        A client without a copy, with a version ahead of the
+        server or behind the tombstones version, whose deletes
+        may have been compacted, gets every task and must
+        replace its copy
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        since : int
+            Tasks version of the client copy, 0 for a full copy
+
+        Returns
+        -------
+        TaskChangesResponse
+            Current tasks version and the changes since the given one
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        version = await self.get_tasks_version(email=email)
+
+        if since and since <= version:
+            query = get_changes_query(email=email, since=since)
+            tasks = await self.tasks.find(query, projection=TASK_PROJECTION).to_list(
+                length=None
+            )
+            deleted = [
+                str(tombstone["task_id"])
+                async for tombstone in self.tombstones.find(
+                    query, projection={"_id": 0, "task_id": 1}
+                )
+            ]
+
+            if since >= await self._get_tombstones_version(email=email):
+                return TaskChangesResponse(
+                    version=version, full=False, tasks=tasks, deleted=deleted
+                )
+
+        tasks = await self.tasks.find(
+            get_changes_query(email=email, since=0), projection=TASK_PROJECTION
+        ).to_list(length=None)
+
+        return TaskChangesResponse(version=version, full=True, tasks=tasks, deleted=[])
+
+    async def get_tasks_summary(self, email: str) -> TasksSummaryResponse:
+        """
+        Get the task counts of a user, per status and priority
+        from the counters maintained on every write, overdue
+        from an indexed count on (owner, deadline)
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+
+        Returns
+        -------
+        TasksSummaryResponse
+            Counts per status and priority, total and overdue
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        counters = await self.task_counters.find(
+            {"owner": email}, projection={"_id": 0, "field": 1, "value": 1, "count": 1}
+        ).to_list(length=None)
+
+        if not counters and not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        overdue = await self.tasks.count_documents(get_overdue_query(email=email))
+
+        return build_tasks_summary(counters=counters, overdue=overdue)
+
+    async def get_upcoming_tasks(
+        self,
+        email: str,
+        hours: float = DEFAULT_UPCOMING_HOURS,
+        limit: int = DEFAULT_TASKS_PAGE_SIZE,
+    ) -> UpcomingTasksResponse:
+        """
+        Get a user's tasks that are not done and are due in the
+        next hours ordered by deadline, read through the
+        (owner, deadline, title) index
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        hours : float
+            Length of the window in hours
+        limit : int
+            Maximum number of tasks to return
+
+        Returns
+        -------
+        UpcomingTasksResponse
+            Window and its tasks
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        start, end = get_deadline_window(hours=hours)
+        query = get_deadline_window_query(start=start, end=end, email=email)
+        tasks = (
+            await self.tasks.find(query, projection=TASK_PROJECTION)
+            .sort(get_tasks_sort(order="asc"))
+            .limit(limit)
+            .to_list(length=limit)
+        )
+
+        if not tasks and not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        return UpcomingTasksResponse(start=start, end=end, tasks=tasks)
+
+    async def search_tasks(
+        self,
+        email: str,
+        text: str,
+        limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+        offset: int = 0,
+    ) -> SearchTasksResponse:
+        """
+        Search a user's tasks by the words of their title and
+        description through the (owner, text) index, hits are
+        ranked by relevance with title matches weighing more
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        text : str
+            Words to search
+        limit : int
+            Maximum number of hits to return
+        offset : int
+            Number of hits to skip
+
+        Returns
+        -------
+        SearchTasksResponse
+            Ranked hits and the offset of the next page
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        hits = (
+            await self.tasks.find(
+                get_search_query(email=email, text=text), projection=SEARCH_PROJECTION
+            )
+            .sort(SEARCH_SORT)
+            .skip(offset)
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+
+        if not hits and not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        return get_search_page(hits=hits, limit=limit, offset=offset)
+
+    async def get_due_tasks(
+        self, start: datetime, end: datetime
+    ) -> AsyncIterator[DueTask]:
+        """
+        Get the tasks of every user that are not done and are
+        due in a window ordered by deadline, read in batches
+        through the deadline index so only the window is scanned
+
+        Parameters
+        ----------
+        start : datetime
+            Start of the window, inclusive
+        end : datetime
+            End of the window, exclusive
+
+        Yields
+        ------
+        DueTask
+            Task and its owner
+        """
+
+        cursor = self.tasks.find(
+            get_deadline_window_query(start=start, end=end),
+            batch_size=EXPORT_BATCH_SIZE,
+        ).sort([("deadline", ASCENDING)])
+
+        async for task in cursor:
+            yield DueTask.model_validate(task)
+
+    async def export_tasks(self, email: str) -> AsyncIterator[str]:
+        """
+        Export a user's list of tasks as newline delimited JSON,
+        tasks are streamed from a database cursor in batches so
+        the whole list is never held in memory
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+
+        Returns
+        -------
+        AsyncIterator[str]
+            One JSON encoded task per line
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        if not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        cursor = self.tasks.find(
+            {"owner": email},
+            projection=TASK_PROJECTION,
+            batch_size=EXPORT_BATCH_SIZE,
+        ).sort(get_tasks_sort(order="asc"))
+
+        return self._encode_tasks(cursor=cursor)
+
+    async def get_tasks_version(self, email: str) -> int:
+        """
+        Get the version of a user's list of tasks, bumped after
+        every write to the list once its documents have landed
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+
+        Returns
+        -------
+        int
+            Tasks version
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        """
+
+        user = await self.users_repository.find_one(
+            {"email": email}, fields=["tasks_version"]
+        )
+
+        if user is None:
+            raise UserNotFound()
+
+        return user.get("tasks_version", 0)
+
+    async def _get_tombstones_version(self, email: str) -> int:
+        """
+        Get the newest tasks version of a user's compacted
+        tombstones, read after the tombstones of a sync so a
+        compaction that deleted some of them is always seen
+
+        Parameters
+        ----------
+        email : str
+            User email
+
+        Returns
+        -------
+        int
+            Tombstones version, 0 if none was compacted
+        """
+
+        user = await self.users_repository.find_one(
+            {"email": email}, fields=["tombstones_version"]
+        )
+
+        return user.get("tombstones_version", 0) if user is not None else 0
+
+    async def _bump_tasks_version(self, email: str) -> Optional[int]:
+        """
+        Bump the version of a user's list of tasks
+
+        Parameters
+        ----------
+        email : str
+            User email
+
+        Returns
+        -------
+        Optional[int]
+            Tasks version after the bump, None if the user is not found
+        """
+
+        user = await self.users.find_one_and_update(
+            {"email": email},
+            {"$inc": {"tasks_version": 1}},
+            projection={"_id": 0, "tasks_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return user["tasks_version"] if user is not None else None
+
+    async def _stamp_write(
+        self,
+        collection: AsyncIOMotorCollection,
+        email: str,
+        write: ObjectId,
+        version: int,
+        change: str,
+    ) -> None:
+        """
+        Stamp the documents of a write with the tasks version it
+        was given, a document written again since keeps the
+        pending mark of the newer write and is stamped by it
+
+        Parameters
+        ----------
+        collection : AsyncIOMotorCollection
+            Tasks or tombstones collection
+        email : str
+            User email
+        write : ObjectId
+            Id of the write
+        version : int
+            Tasks version after the write
+        change : str
+            Kind of change, added, updated or deleted
+        """
+
+        await collection.update_many(
+            {"owner": email, "pending": write},
+            get_version_stamp(version=version, change=change),
+        )
+
+    async def _count_tasks(
+        self, email: str, deltas: Mapping[Tuple[str, str], int]
+    ) -> None:
+        """
+        Apply changes to the task counters of a user
+        with a single unordered bulk write
+
+        Parameters
+        ----------
+        email : str
+            User email
+        deltas : Mapping[Tuple[str, str], int]
+            Change per (field, value) counter
+        """
+
+        if deltas:
+            await self.task_counters.bulk_write(
+                get_counter_writes(email=email, deltas=deltas), ordered=False
+            )
+
+    async def _encode_tasks(self, cursor: AsyncIOMotorCursor) -> AsyncIterator[str]:
+        """
+        Encode the tasks of a cursor as JSON lines
+
+        Parameters
+        ----------
+        cursor : AsyncIOMotorCursor
+            Tasks cursor
+
+        Yields
+        ------
+        str
+            JSON encoded task followed by a newline
+        """
+
+        async for task in cursor:
+            yield StoredTask.model_validate(task).model_dump_json() + "\n"
+
+    async def _raise_task_not_found(self, email: str) -> None:
+        """
+        Raise the error of a write that matched no task
+
+        Parameters
+        ----------
+        email : str
+            User email
+
+        Raises
+        ------
+        UserNotFound
+            If the user is not found
+        TaskNotFound
+            If the user exists
+        """
+
+        if not await self._user_exists(email=email):
+            raise UserNotFound()
+
+        raise TaskNotFound()
+
+    async def _user_exists(self, email: str) -> bool:
+        """
+        Check if a user exists
+
+        Parameters
+        ----------
+        email : str
+            User email
+
+        Returns
+        -------
+        bool
+            Whether the user exists
+        """
+
+        return await self.users_repository.exists({"email": email})
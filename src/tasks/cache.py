@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.tasks.schemas import CacheStatsResponse, GetTasksResponse, TasksFilter
+
+load_dotenv()
+
+
+DEFAULT_TASKS_CACHE_MAX_USERS = 1024
+DEFAULT_TASKS_CACHE_MAX_PAGES_PER_USER = 16
+DEFAULT_TASKS_CACHE_TTL_SECONDS = 5.0
+
+PageKey = Tuple[int, Optional[str], Optional[str]]
+CacheEntry = Tuple[float, int, GetTasksResponse]
+
+
+def get_page_key(
+    limit: int, cursor: Optional[str], tasks_filter: Optional[TasksFilter]
+) -> PageKey:
+    """
+    Get the cache key of a tasks page
+
+    Parameters
+    ----------
+    limit : int
+        Page size
+    cursor : Optional[str]
+        Cursor of the page
+    tasks_filter : Optional[TasksFilter]
+        Filter of the page
+
+    Returns
+    -------
+    PageKey
+        Hashable page key
+    """
+
+    return (
+        limit,
+        cursor,
+        tasks_filter.model_dump_json() if tasks_filter else None,
+    )
+
+
+class TasksCache:
+    """
+    In-process LRU cache of tasks pages with a time to live
+
+    Pages are grouped by user so a write invalidates every
+    page of that user at once. A global generation is bumped
+    on every invalidation and pages read before it are not
+    stored, so a slow read never caches a stale page. Each page
+    keeps the tasks version it was read at and is only served
+    at that version, so a write from another process, which
+    does not invalidate this cache, is never hidden
+
+    Attributes
+    ----------
+    max_users : int
+        Maximum number of cached users
+    max_pages_per_user : int
+        Maximum number of cached pages per user
+    ttl : float
+        Seconds a page stays valid
+    generation : int
+        Number of invalidations so far
+
+    Methods
+    -------
+    get(email: str, key: PageKey, version: int) -> Optional[GetTasksResponse]
+        Get a page cached at a tasks version
+    set(email: str, key: PageKey, response: GetTasksResponse, generation: int, version: int) -> None
+        Cache a page read at the given generation and tasks version
+    invalidate(email: str) -> None
+        Drop every cached page of a user
+    clear() -> None
+        Drop every cached page and reset the counters
+    stats() -> CacheStatsResponse
+        Get the cache counters
+    """
+
+    def __init__(
+        self,
+        max_users: int = DEFAULT_TASKS_CACHE_MAX_USERS,
+        max_pages_per_user: int = DEFAULT_TASKS_CACHE_MAX_PAGES_PER_USER,
+        ttl: float = DEFAULT_TASKS_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize tasks cache
+
+        Parameters
+        ----------
+        max_users : int
+            Maximum number of cached users
+        max_pages_per_user : int
+            Maximum number of cached pages per user
+        ttl : float
+            Seconds a page stays valid
+        clock : Callable[[], float]
+            Monotonic clock in seconds
+        """
+
+        self.max_users = max_users
+        self.max_pages_per_user = max_pages_per_user
+        self.ttl = ttl
+        self.generation = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, OrderedDict[PageKey, CacheEntry]]" = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, email: str, key: PageKey, version: int) -> Optional[GetTasksResponse]:
+        """
+        Get a page cached at a tasks version, a page cached at
+        another version is dropped
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        key : PageKey
+            Page key
+        version : int
+            Current tasks version of the user
+
+        Returns
+        -------
+        Optional[GetTasksResponse]
+            Cached page, None on a miss
+        """
+
+        with self._lock:
+            pages = self._users.get(email)
+            entry = pages.get(key) if pages is not None else None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, cached_version, response = entry
+
+            if expires_at <= self._clock():
+                del pages[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            if cached_version != version:
+                del pages[key]
+                self._misses += 1
+                return None
+
+            self._users.move_to_end(email)
+            pages.move_to_end(key)
+            self._hits += 1
+
+            return response
+
+    def set(
+        self,
+        email: str,
+        key: PageKey,
+        response: GetTasksResponse,
+        generation: int,
+        version: int,
+    ) -> None:
+        """
+        Cache a page read at the given generation and tasks version
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        key : PageKey
+            Page key
+        response : GetTasksResponse
+            Page to cache
+        generation : int
+            Generation read before querying the page
+        version : int
+            Tasks version read before querying the page
+        """
+
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            pages = self._users.setdefault(email, OrderedDict())
+            pages[key] = (self._clock() + self.ttl, version, response)
+            pages.move_to_end(key)
+            self._users.move_to_end(email)
+
+            if len(pages) > self.max_pages_per_user:
+                pages.popitem(last=False)
+                self._evictions += 1
+
+            if len(self._users) > self.max_users:
+                _, evicted_pages = self._users.popitem(last=False)
+                self._evictions += len(evicted_pages)
+
+    def invalidate(self, email: str) -> None:
+        """
+        Drop every cached page of a user
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        """
+
+        with self._lock:
+            self.generation += 1
+            self._users.pop(email, None)
+
+    def clear(self) -> None:
+        """
+        Drop every cached page and reset the counters
+        """
+
+        with self._lock:
+            self.generation += 1
+            self._users.clear()
+            self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def stats(self) -> CacheStatsResponse:
+        """
+        Get the cache counters
+
+        Returns
+        -------
+        CacheStatsResponse
+            Hits, misses, evictions, expirations and size
+        """
+
+        with self._lock:
+            return CacheStatsResponse(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                users=len(self._users),
+                pages=sum(len(pages) for pages in self._users.values()),
+            )
+
+
+tasks_cache = TasksCache(
+    max_users=int(os.getenv("TASKS_CACHE_MAX_USERS", DEFAULT_TASKS_CACHE_MAX_USERS)),
+    max_pages_per_user=int(
+        os.getenv(
+            "TASKS_CACHE_MAX_PAGES_PER_USER", DEFAULT_TASKS_CACHE_MAX_PAGES_PER_USER
+        )
+    ),
+    ttl=float(os.getenv("TASKS_CACHE_TTL_SECONDS", DEFAULT_TASKS_CACHE_TTL_SECONDS)),
+)
@@ -0,0 +1,209 @@
+import argparse
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from pymongo import UpdateOne
+from pymongo.database import Database as MongoDatabase
+
+from src.database.Database import DATABASE_NAME, Database
+from src.tasks.schemas import TasksSummaryResponse
+from src.tasks.utils import DONE_STATUSES
+
+COUNTED_FIELDS = ("status", "priority")
+COUNTED_PROJECTION = {"_id": 0, **{field: 1 for field in COUNTED_FIELDS}}
+
+CounterKey = Tuple[str, str]
+
+
+def get_count_deltas(
+    before: Optional[Mapping[str, Any]], after: Optional[Mapping[str, Any]]
+) -> Counter:
+    """
+    Get the counter changes of a task write
+
+    Parameters
+    ----------
+    before : Optional[Mapping[str, Any]]
+        Counted fields of the task before the write, None if added
+    after : Optional[Mapping[str, Any]]
+        Counted fields of the task after the write, None if deleted
+
+    Returns
+    -------
+    Counter
+        Change per (field, value) counter, without zero changes
+    """
+
+    deltas: Counter = Counter()
+
+    for field in COUNTED_FIELDS:
+        if before is not None:
+            deltas[(field, before[field])] -= 1
+
+        if after is not None:
+            deltas[(field, after[field])] += 1
+
+    return Counter({key: delta for key, delta in deltas.items() if delta})
+
+
+def get_counter_writes(email: str, deltas: Mapping[CounterKey, int]) -> List[UpdateOne]:
+    """
+    Get the counter upserts applying counter changes
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    deltas : Mapping[CounterKey, int]
+        Change per (field, value) counter
+
+    Returns
+    -------
+    List[UpdateOne]
+        One upsert per changed counter
+    """
+
+    return [
+        UpdateOne(
+            {"owner": email, "field": field, "value": value},
+            {"$inc": {"count": delta}},
+            upsert=True,
+        )
+        for (field, value), delta in deltas.items()
+    ]
+
+
+def get_overdue_query(email: str) -> Dict[str, Any]:
+    """
+    Build the query selecting a user's tasks past their
+    deadline that are not done, overdue depends on the time
+    of the read so it is counted instead of maintained
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+
+    Returns
+    -------
+    Dict[str, Any]
+        Query on the tasks collection
+    """
+
+    return {
+        "owner": email,
+        "deadline": {"$lt": datetime.now(timezone.utc)},
+        "status": {"$nin": DONE_STATUSES},
+    }
+
+
+def build_tasks_summary(
+    counters: Sequence[Mapping[str, Any]], overdue: int
+) -> TasksSummaryResponse:
+    """
+    Build a tasks summary from a user's counters
+
+    Parameters
+    ----------
+    counters : Sequence[Mapping[str, Any]]
+        Counter documents of the user
+    overdue : int
+        Number of overdue tasks
+
+    Returns
+    -------
+    TasksSummaryResponse
+        Counts per status and priority, total and overdue
+    """
+
+    counts: Dict[str, Dict[str, int]] = {field: {} for field in COUNTED_FIELDS}
+
+    for counter in counters:
+        if counter["count"] > 0:
+            counts[counter["field"]][counter["value"]] = counter["count"]
+
+    return TasksSummaryResponse(
+        total=sum(counts["status"].values()),
+        status=counts["status"],
+        priority=counts["priority"],
+        overdue=overdue,
+    )
+
+
+def rebuild_task_counters(database: MongoDatabase, email: Optional[str] = None) -> int:
+    """
+    Recount the task counters from the tasks collection,
+    run it while the tasks of the recounted users are not
+    written or counts written meanwhile may be lost
+
+    Parameters
+    ----------
+    database : pymongo.database.Database
+        Database to rebuild the counters in
+    email : Optional[str]
+        Only rebuild the counters of this user
+
+    Returns
+    -------
+    int
+        Number of counters written
+    """
+
+    match = {"owner": email} if email else {}
+    counters = []
+
+    for field in COUNTED_FIELDS:
+        groups = database["tasks"].aggregate(
+            [
+                {"$match": match},
+                {
+                    "$group": {
+                        "_id": {"owner": "$owner", "value": f"${field}"},
+                        "count": {"$sum": 1},
+                    }
+                },
+            ]
+        )
+
+        counters.extend(
+            {
+                "owner": group["_id"]["owner"],
+                "field": field,
+                "value": group["_id"]["value"],
+                "count": group["count"],
+            }
+            for group in groups
+        )
+
+    database["task_counters"].delete_many(match)
+
+    if counters:
+        database["task_counters"].insert_many(counters)
+
+    return len(counters)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Task counters command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Manage task counters")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--email", help="Only rebuild the counters of this user")
+    args = parser.parse_args(argv)
+
+    database = Database().get_client()[DATABASE_NAME]
+    rebuilt = rebuild_task_counters(database=database, email=args.email)
+
+    print(f"Rebuilt {rebuilt} task counters")
+
+
+if __name__ == "__main__":
+    main()
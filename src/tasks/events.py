@@ -0,0 +1,428 @@
+import asyncio
+import os
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorChangeStream, AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+from src.tasks.schemas import StoredTask, TaskEvent
+
+load_dotenv()
+
+
+DEFAULT_TASK_EVENTS_QUEUE_SIZE = 100
+DEFAULT_TASK_EVENTS_HEARTBEAT_SECONDS = 15.0
+
+TaskEventListener = Callable[[str, TaskEvent], None]
+
+CHANGE_STREAM_PIPELINE: List[Dict[str, Any]] = [
+    {
+        "$match": {
+            "$or": [
+                {
+                    "ns.coll": "tasks",
+                    "operationType": {"$in": ["insert", "update", "replace"]},
+                },
+                {
+                    "ns.coll": "task_tombstones",
+                    "operationType": {"$in": ["insert", "update"]},
+                },
+            ]
+        }
+    }
+]
+
+
+class TaskEventBroker:
+    """
+    In-process publish and subscribe of task events per user
+
+    Events come either from a database change stream, which
+    sees the writes of every process, or from the handlers
+    publishing their own writes when change streams are not
+    available. A subscriber that falls behind loses its oldest
+    events and can catch up with the sync endpoint. Listeners
+    receive the changes of every user, only from the change stream
+
+    Attributes
+    ----------
+    max_queue_size : int
+        Maximum number of pending events per subscriber
+    publish_writes : bool
+        Whether handlers publish their own writes
+
+    Methods
+    -------
+    subscribe(email: str) -> asyncio.Queue
+        Subscribe to the events of a user
+    unsubscribe(email: str, queue: asyncio.Queue) -> None
+        Stop receiving the events of a user
+    publish(email: str, event: TaskEvent) -> None
+        Deliver an event to the subscribers of a user
+    publish_write(email: str, event: TaskEvent) -> None
+        Deliver an event of a handler write
+    publish_change(email: str, event: TaskEvent) -> None
+        Deliver an event of the change stream
+    listen(listener: TaskEventListener) -> None
+        Receive the changes of the change stream of every user
+    unlisten(listener: TaskEventListener) -> None
+        Stop receiving the changes of the change stream
+    subscribers() -> int
+        Get the number of open subscriptions
+    """
+
+    def __init__(self, max_queue_size: int = DEFAULT_TASK_EVENTS_QUEUE_SIZE) -> None:
+        """
+        Initialize task event broker
+
+        Parameters
+        ----------
+        max_queue_size : int
+            Maximum number of pending events per subscriber
+        """
+
+        self.max_queue_size = max_queue_size
+        self.publish_writes = True
+        self._queues: Dict[str, Set[asyncio.Queue]] = {}
+        self._listeners: List[TaskEventListener] = []
+
+    def subscribe(self, email: str) -> asyncio.Queue:
+        """
+        Subscribe to the events of a user
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+
+        Returns
+        -------
+        asyncio.Queue
+            Queue receiving the user's events
+        """
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._queues.setdefault(email, set()).add(queue)
+
+        return queue
+
+    def unsubscribe(self, email: str, queue: asyncio.Queue) -> None:
+        """
+        Stop receiving the events of a user
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        queue : asyncio.Queue
+            Queue returned by subscribe
+        """
+
+        queues = self._queues.get(email)
+
+        if queues is None:
+            return
+
+        queues.discard(queue)
+
+        if not queues:
+            del self._queues[email]
+
+    def publish(self, email: str, event: TaskEvent) -> None:
+        """
+        Deliver an event to the subscribers of a user,
+        a full queue drops its oldest event
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        event : TaskEvent
+            Event to deliver
+        """
+
+        for queue in self._queues.get(email, ()):
+            if queue.full():
+                queue.get_nowait()
+
+            queue.put_nowait(event)
+
+    def publish_write(self, email: str, event: TaskEvent) -> None:
+        """
+        Deliver an event of a handler write, ignored
+        while a change stream is publishing the writes
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        event : TaskEvent
+            Event to deliver
+        """
+
+        if self.publish_writes:
+            self.publish(email=email, event=event)
+
+    def publish_change(self, email: str, event: TaskEvent) -> None:
+        """
+        Deliver an event of the change stream to the
+        subscribers of its user and to every listener
+
+        Parameters
+        ----------
+        email : str
+            The user's email
+        event : TaskEvent
+            Event to deliver
+        """
+
+        self.publish(email=email, event=event)
+
+        for listener in self._listeners:
+            listener(email, event)
+
+    def listen(self, listener: TaskEventListener) -> None:
+        """
+        Receive the changes of the change stream of every user
+
+        Parameters
+        ----------
+        listener : TaskEventListener
+            Function called with the owner and event of every change
+        """
+
+        self._listeners.append(listener)
+
+    def unlisten(self, listener: TaskEventListener) -> None:
+        """
+        Stop receiving the changes of the change stream
+
+        Parameters
+        ----------
+        listener : TaskEventListener
+            Function passed to listen
+        """
+
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def subscribers(self) -> int:
+        """
+        Get the number of open subscriptions
+
+        Returns
+        -------
+        int
+            Number of subscribed queues
+        """
+
+        return sum(len(queues) for queues in self._queues.values())
+
+
+def get_change_event(change: Mapping[str, Any]) -> Optional[Tuple[str, TaskEvent]]:
+    """
+    Get the task event of a change stream document, documents
+    of a write still waiting for its tasks version are skipped
+    and published once the write stamps them. The document of
+    an update is looked up when the change is read and may be
+    already stamped, so the update marking the document as
+    pending is skipped by its updated fields
+
+    Parameters
+    ----------
+    change : Mapping[str, Any]
+        Change on the tasks or tombstones collection
+
+    Returns
+    -------
+    Optional[Tuple[str, TaskEvent]]
+        Owner and event, None if the task is already gone or pending
+    """
+
+    document = change.get("fullDocument")
+    update_description = change.get("updateDescription", {})
+
+    if (
+        document is None
+        or "pending" in document
+        or "pending" in update_description.get("updatedFields", {})
+    ):
+        return None
+
+    if change["ns"]["coll"] == "task_tombstones":
+        return document["owner"], TaskEvent(
+            type="deleted", id=str(document["task_id"]), version=document["version"]
+        )
+
+    if "pending" in update_description.get("removedFields", ()):
+        event_type = document.get("change", "updated")
+    elif change["operationType"] == "insert":
+        event_type = "added"
+    else:
+        event_type = "updated"
+
+    return document["owner"], TaskEvent(
+        type=event_type,
+        id=str(document["_id"]),
+        version=document.get("version", 0),
+        task=StoredTask.model_validate(document),
+    )
+
+
+async def start_change_stream(
+    database: AsyncIOMotorDatabase, broker: TaskEventBroker
+) -> Optional["asyncio.Task[None]"]:
+    """
+    Feed the broker from a change stream on the tasks and
+    tombstones collections, handlers stop publishing their
+    own writes while it runs
+
+    Parameters
+    ----------
+    database : AsyncIOMotorDatabase
+        Database to watch
+    broker : TaskEventBroker
+        Broker to feed
+
+    Returns
+    -------
+    Optional[asyncio.Task[None]]
+        Task forwarding the changes, None if the deployment
+        does not support change streams
+    """
+
+    stream = database.watch(CHANGE_STREAM_PIPELINE, full_document="updateLookup")
+
+    try:
+        change = await stream.try_next()
+    except OperationFailure:
+        await stream.close()
+        return None
+
+    broker.publish_writes = False
+
+    if change is not None:
+        _publish_change(broker=broker, change=change)
+
+    return asyncio.create_task(_forward_changes(stream=stream, broker=broker))
+
+
+async def stream_task_events(
+    email: str,
+    version: int,
+    broker: TaskEventBroker,
+    heartbeat: float = DEFAULT_TASK_EVENTS_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """
+    Stream the events of a user as server-sent events, a
+    comment is sent while idle so proxies keep the connection
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    version : int
+        Tasks version when the stream opened, sent first
+    broker : TaskEventBroker
+        Broker to subscribe to
+    heartbeat : float
+        Seconds between comments while idle
+
+    Yields
+    ------
+    str
+        Server-sent event
+    """
+
+    queue = broker.subscribe(email=email)
+
+    try:
+        yield get_server_sent_event(event=TaskEvent(type="ready", version=version))
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield get_server_sent_event(event=event)
+    finally:
+        broker.unsubscribe(email=email, queue=queue)
+
+
+def get_server_sent_event(event: TaskEvent) -> str:
+    """
+    Encode a task event as a server-sent event
+
+    Parameters
+    ----------
+    event : TaskEvent
+        Event to encode
+
+    Returns
+    -------
+    str
+        Server-sent event
+    """
+
+    return f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+
+def _publish_change(broker: TaskEventBroker, change: Mapping[str, Any]) -> None:
+    """
+    Publish the task event of a change stream document
+
+    Parameters
+    ----------
+    broker : TaskEventBroker
+        Broker to publish to
+    change : Mapping[str, Any]
+        Change on the tasks or tombstones collection
+    """
+
+    owner_event = get_change_event(change=change)
+
+    if owner_event is not None:
+        broker.publish_change(email=owner_event[0], event=owner_event[1])
+
+
+async def _forward_changes(
+    stream: AsyncIOMotorChangeStream, broker: TaskEventBroker
+) -> None:
+    """
+    Publish every change of a change stream, handlers publish
+    their own writes again once the stream stops
+
+    Parameters
+    ----------
+    stream : AsyncIOMotorChangeStream
+        Initialized change stream
+    broker : TaskEventBroker
+        Broker to publish to
+    """
+
+    try:
+        async with stream:
+            async for change in stream:
+                _publish_change(broker=broker, change=change)
+    finally:
+        broker.publish_writes = True
+
+
+task_events = TaskEventBroker(
+    max_queue_size=int(
+        os.getenv("TASK_EVENTS_QUEUE_SIZE", DEFAULT_TASK_EVENTS_QUEUE_SIZE)
+    )
+)
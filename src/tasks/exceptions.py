@@ -18,6 +18,23 @@ class UserNotFound(HTTPException):
         )
 
 
+class TaskNotFound(HTTPException):
+    """
+    Exception that is raised
+    when task is not found
+    """
+
+    def __init__(self):
+        """
+        Initialize exception
+        """
+
+        super().__init__(
+            status_code=404,
+            detail="Task not found",
+        )
+
+
 class TaskAlreadyExists(HTTPException):
     """
     Exception that is raised
@@ -33,3 +50,20 @@ class TaskAlreadyExists(HTTPException):
             status_code=409,
             detail="Task already exists",
         )
+
+
+class InvalidCursor(HTTPException):
+    """
+    Exception that is raised
+    when a page cursor is malformed
+    """
+
+    def __init__(self):
+        """
+        Initialize exception
+        """
+
+        super().__init__(
+            status_code=400,
+            detail="Invalid cursor",
+        )
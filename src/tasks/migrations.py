@@ -0,0 +1,87 @@
+import argparse
+from typing import Optional, Sequence
+
+from pymongo import InsertOne
+from pymongo.database import Database as MongoDatabase
+from pymongo.errors import BulkWriteError
+
+from src.database.Database import DATABASE_NAME, Database
+from src.database.indexes import ensure_indexes
+from src.tasks.utils import DUPLICATE_KEY_ERROR_CODE
+
+
+def migrate_embedded_tasks(database: MongoDatabase) -> int:
+    """
+    Move tasks embedded in user documents to the tasks collection,
+    the indexes are ensured first so the unique (owner, title)
+    index skips tasks already moved when the migration is resumed.
+    The tasks version of each migrated user is bumped so cached
+    copies of its list of tasks are revalidated
+
+    Parameters
+    ----------
+    database : pymongo.database.Database
+        Database to migrate
+
+    Returns
+    -------
+    int
+        Number of users migrated
+
+    Raises
+    ------
+    BulkWriteError
+        If a task fails to insert for a reason other than a duplicate
+    """
+
+    ensure_indexes(database=database)
+
+    users = database["users"].find(
+        {"tasks": {"$exists": True}}, projection={"email": 1, "tasks": 1}
+    )
+    migrated = 0
+
+    for user in users:
+        requests = [
+            InsertOne({"owner": user["email"], **task}) for task in user["tasks"]
+        ]
+
+        if requests:
+            try:
+                database["tasks"].bulk_write(requests, ordered=False)
+            except BulkWriteError as error:
+                for write_error in error.details["writeErrors"]:
+                    if write_error["code"] != DUPLICATE_KEY_ERROR_CODE:
+                        raise
+
+        database["users"].update_one(
+            {"_id": user["_id"]},
+            {"$unset": {"tasks": ""}, "$inc": {"tasks_version": 1}},
+        )
+        migrated += 1
+
+    return migrated
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Tasks migration command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Migrate tasks")
+    parser.add_argument("command", choices=["embedded-to-collection"])
+    parser.parse_args(argv)
+
+    database = Database().get_client()[DATABASE_NAME]
+    migrated = migrate_embedded_tasks(database=database)
+
+    print(f"Migrated tasks of {migrated} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,557 @@
+import argparse
+import asyncio
+import heapq
+import logging
+import os
+import random
+import time
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+from dotenv import load_dotenv
+
+from src.tasks.events import TaskEventBroker, task_events
+from src.tasks.schemas import DueTask, TaskEvent, TaskReminder
+from src.tasks.utils import DONE_STATUSES
+
+load_dotenv()
+
+
+DEFAULT_TASK_REMINDERS_LEAD_MINUTES = 60.0
+DEFAULT_TASK_REMINDERS_HORIZON_HOURS = 24.0
+
+REMINDER_FIELDS = ("title", "status", "deadline")
+
+TASK_REMINDERS_ENABLED = os.getenv("TASK_REMINDERS_ENABLED", "false").lower() == "true"
+
+ReminderSink = Callable[[TaskReminder], Awaitable[None]]
+DueTasksReader = Callable[[datetime, datetime], AsyncIterator[DueTask]]
+
+logger = logging.getLogger(__name__)
+
+
+async def log_reminder(reminder: TaskReminder) -> None:
+    """
+    Default reminder sink, logs the reminder
+
+    Parameters
+    ----------
+    reminder : TaskReminder
+        Reminder to deliver
+    """
+
+    logger.info(
+        "Task %s of %s is due at %s",
+        reminder.id,
+        reminder.owner,
+        reminder.deadline.isoformat(),
+    )
+
+
+def get_timestamp(moment: datetime) -> float:
+    """
+    Get the POSIX timestamp of a datetime,
+    naive datetimes are read as UTC like the database stores them
+
+    Parameters
+    ----------
+    moment : datetime
+        Datetime to convert
+
+    Returns
+    -------
+    float
+        Seconds since the epoch
+    """
+
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+
+    return moment.timestamp()
+
+
+class ReminderScheduler:
+    """
+    In-process scheduler firing a reminder a lead time
+    before the deadline of every task that is not done
+
+    Only the reminders due within a horizon are held, in a
+    min-heap ordered by reminder time, so the next reminder is
+    found in constant time and a change costs O(log n). The
+    horizon is loaded with one indexed read of the deadline
+    window. Writes of this process reschedule their reminder
+    directly and, while the broker follows a change stream, the
+    writes of every other process arrive as its changes, so the
+    horizon is extended by reading only the newly covered part.
+    Without a change stream every extension re-reads the whole
+    horizon to pick up the writes made elsewhere.
+    Rescheduled and cancelled reminders are left in the heap
+    and skipped when they surface, the heap is rebuilt when
+    they outnumber the live reminders
+
+    Reminders are delivered at least once: reminders whose
+    deadline has not passed are fired again after a restart
+
+    Attributes
+    ----------
+    sink : ReminderSink
+        Coroutine function delivering the reminders
+    lead : float
+        Seconds between a reminder and its deadline
+    horizon : float
+        Seconds ahead of now the scheduled reminders cover
+    broker : Optional[TaskEventBroker]
+        Broker whose change stream reschedules the reminders
+
+    Methods
+    -------
+    schedule(email: str, task_id: str, task: Mapping[str, Any]) -> bool
+        Schedule or reschedule the reminder of a task
+    cancel(task_id: str) -> bool
+        Cancel the reminder of a task
+    apply(email: str, event: TaskEvent) -> None
+        Reschedule the reminder of a task changed elsewhere
+    pop_due(now: float) -> List[TaskReminder]
+        Remove and return the reminders due at a time
+    next_due() -> Optional[float]
+        Get the time of the next reminder
+    load(get_due_tasks: DueTasksReader, until: float, now: float) -> int
+        Schedule the reminders of the tasks due up to a horizon
+    run(get_due_tasks: DueTasksReader) -> None
+        Load the horizon and deliver the reminders as they fall due
+    clear() -> None
+        Drop every reminder and the loaded horizon
+    _follows_changes() -> bool
+        Check if the broker follows a change stream
+    """
+
+    def __init__(
+        self,
+        sink: ReminderSink = log_reminder,
+        lead: float = DEFAULT_TASK_REMINDERS_LEAD_MINUTES * 60,
+        horizon: float = DEFAULT_TASK_REMINDERS_HORIZON_HOURS * 3600,
+        clock: Callable[[], float] = time.time,
+        broker: Optional[TaskEventBroker] = None,
+    ) -> None:
+        """
+        Initialize reminder scheduler
+
+        Parameters
+        ----------
+        sink : ReminderSink
+            Coroutine function delivering the reminders
+        lead : float
+            Seconds between a reminder and its deadline
+        horizon : float
+            Seconds ahead of now the scheduled reminders cover
+        clock : Callable[[], float]
+            Wall clock in seconds since the epoch
+        broker : Optional[TaskEventBroker]
+            Broker whose change stream reschedules the reminders
+        """
+
+        self.sink = sink
+        self.lead = lead
+        self.horizon = horizon
+        self.broker = broker
+        self._clock = clock
+        self._heap: List[List[Any]] = []
+        self._entries: Dict[str, List[Any]] = {}
+        self._sequence = 0
+        self._loaded_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        """
+        Get the number of scheduled reminders
+
+        Returns
+        -------
+        int
+            Number of live reminders
+        """
+
+        return len(self._entries)
+
+    def schedule(self, email: str, task_id: str, task: Mapping[str, Any]) -> bool:
+        """
+        Schedule or reschedule the reminder of a task, tasks
+        that are done, past their deadline or with a reminder
+        beyond the loaded horizon are only unscheduled
+
+        Parameters
+        ----------
+        email : str
+            The owner's email
+        task_id : str
+            Id of the task
+        task : Mapping[str, Any]
+            Title, status and deadline of the task
+
+        Returns
+        -------
+        bool
+            Whether a reminder is scheduled
+        """
+
+        self.cancel(task_id=task_id)
+
+        deadline = get_timestamp(task["deadline"])
+        remind_at = deadline - self.lead
+
+        if (
+            task["status"] in DONE_STATUSES
+            or remind_at >= self._loaded_until
+            or deadline <= self._clock()
+        ):
+            return False
+
+        self._sequence += 1
+        entry = [
+            remind_at,
+            self._sequence,
+            task_id,
+            email,
+            task["title"],
+            task["deadline"],
+            True,
+        ]
+        self._entries[task_id] = entry
+        heapq.heappush(self._heap, entry)
+
+        if self._heap[0] is entry and self._wakeup is not None:
+            self._wakeup.set()
+
+        return True
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Cancel the reminder of a task
+
+        Parameters
+        ----------
+        task_id : str
+            Id of the task
+
+        Returns
+        -------
+        bool
+            Whether a reminder was scheduled
+        """
+
+        entry = self._entries.pop(task_id, None)
+
+        if entry is None:
+            return False
+
+        entry[-1] = False
+
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = [live for live in self._heap if live[-1]]
+            heapq.heapify(self._heap)
+
+        return True
+
+    def apply(self, email: str, event: TaskEvent) -> None:
+        """
+        Reschedule the reminder of a task changed elsewhere,
+        from a change of the change stream
+
+        Parameters
+        ----------
+        email : str
+            The owner's email
+        event : TaskEvent
+            Change of the task
+        """
+
+        if event.type == "deleted":
+            self.cancel(task_id=event.id)
+        elif event.task is not None:
+            self.schedule(email=email, task_id=event.id, task=event.task.__dict__)
+
+    def pop_due(self, now: float) -> List[TaskReminder]:
+        """
+        Remove and return the reminders due at a time
+
+        Parameters
+        ----------
+        now : float
+            Current time in seconds since the epoch
+
+        Returns
+        -------
+        List[TaskReminder]
+            Due reminders ordered by reminder time
+        """
+
+        reminders = []
+
+        while self._heap and self._heap[0][0] <= now:
+            remind_at, _, task_id, email, title, deadline, active = heapq.heappop(
+                self._heap
+            )
+
+            if not active:
+                continue
+
+            del self._entries[task_id]
+            reminders.append(
+                TaskReminder.model_construct(
+                    owner=email,
+                    id=task_id,
+                    title=title,
+                    deadline=deadline,
+                    remind_at=datetime.fromtimestamp(remind_at, tz=timezone.utc),
+                )
+            )
+
+        return reminders
+
+    def next_due(self) -> Optional[float]:
+        """
+        Get the time of the next reminder
+
+        Returns
+        -------
+        Optional[float]
+            Seconds since the epoch, None if nothing is scheduled
+        """
+
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+
+        return self._heap[0][0] if self._heap else None
+
+    async def load(
+        self, get_due_tasks: DueTasksReader, until: float, now: float
+    ) -> int:
+        """
+        Schedule the reminders of the tasks due up to a horizon,
+        only the part of the deadline window not loaded before is
+        read while a change stream keeps the loaded part current.
+        Otherwise the reminders not yet due are dropped and the
+        whole window is read again
+
+        Parameters
+        ----------
+        get_due_tasks : DueTasksReader
+            Reader of the tasks of every user due in a window
+        until : float
+            New horizon in seconds since the epoch
+        now : float
+            Current time in seconds since the epoch
+
+        Returns
+        -------
+        int
+            Number of reminders scheduled
+        """
+
+        if self._loaded_until and not self._follows_changes():
+            start = now + self.lead
+
+            for task_id, entry in list(self._entries.items()):
+                if entry[0] >= now:
+                    self.cancel(task_id=task_id)
+        else:
+            start = max(self._loaded_until + self.lead, now)
+
+        end = until + self.lead
+        self._loaded_until = max(self._loaded_until, until)
+
+        if start >= end:
+            return 0
+
+        scheduled = 0
+
+        async for task in get_due_tasks(
+            datetime.fromtimestamp(start, tz=timezone.utc),
+            datetime.fromtimestamp(end, tz=timezone.utc),
+        ):
+            scheduled += self.schedule(
+                email=task.owner, task_id=task.id, task=task.__dict__
+            )
+
+        return scheduled
+
+    async def run(self, get_due_tasks: DueTasksReader) -> None:
+        """
+        Load the horizon and deliver the reminders as they fall
+        due, the horizon is extended every half horizon. A sink
+        error is logged and does not stop the scheduler
+
+        Parameters
+        ----------
+        get_due_tasks : DueTasksReader
+            Reader of the tasks of every user due in a window
+        """
+
+        self._wakeup = asyncio.Event()
+
+        if self.broker is not None:
+            self.broker.listen(self.apply)
+
+        try:
+            while True:
+                now = self._clock()
+
+                if self._loaded_until - now < self.horizon / 2:
+                    await self.load(
+                        get_due_tasks=get_due_tasks, until=now + self.horizon, now=now
+                    )
+
+                for reminder in self.pop_due(now=self._clock()):
+                    try:
+                        await self.sink(reminder)
+                    except Exception:
+                        logger.exception("Task reminder %s failed", reminder.id)
+
+                next_due = self.next_due()
+                wake_at = self._loaded_until - self.horizon / 2
+
+                if next_due is not None:
+                    wake_at = min(wake_at, next_due)
+
+                self._wakeup.clear()
+
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=max(wake_at - self._clock(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self.broker is not None:
+                self.broker.unlisten(self.apply)
+
+            self._wakeup = None
+            self.clear()
+
+    def _follows_changes(self) -> bool:
+        """
+        Check if the broker follows a change stream
+
+        Returns
+        -------
+        bool
+            Whether the writes of every process reach the scheduler
+        """
+
+        return self.broker is not None and not self.broker.publish_writes
+
+    def clear(self) -> None:
+        """
+        Drop every reminder and the loaded horizon,
+        writes are not scheduled until the next load
+        """
+
+        self._heap.clear()
+        self._entries.clear()
+        self._loaded_until = 0.0
+
+
+def benchmark_reminders(count: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Time scheduling, rescheduling, cancelling and firing
+    reminders for tasks with deadlines spread over a horizon
+
+    Parameters
+    ----------
+    count : int
+        Number of scheduled deadlines
+    seed : int
+        Seed of the random deadlines
+
+    Returns
+    -------
+    Dict[str, float]
+        Seconds taken by each step
+    """
+
+    now = time.time()
+    generator = random.Random(seed)
+    scheduler = ReminderScheduler(lead=0.0, horizon=3600.0, clock=lambda: now)
+    scheduler._loaded_until = now + scheduler.horizon
+    tasks = [
+        {
+            "title": f"task {index}",
+            "status": "todo",
+            "deadline": datetime.fromtimestamp(
+                now + generator.uniform(1.0, scheduler.horizon), tz=timezone.utc
+            ),
+        }
+        for index in range(count)
+    ]
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    for index, task in enumerate(tasks):
+        scheduler.schedule(email="benchmark", task_id=str(index), task=task)
+    timings["schedule"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index in range(0, count, 10):
+        scheduler.schedule(email="benchmark", task_id=str(index), task=tasks[-index])
+    timings["reschedule 10%"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index in range(5, count, 10):
+        scheduler.cancel(task_id=str(index))
+    timings["cancel 10%"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scheduler.next_due()
+    timings["next due"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scheduler.pop_due(now=now + scheduler.horizon)
+    timings["fire all"] = time.perf_counter() - started
+
+    return timings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Task reminders command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Task reminders")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    for step, seconds in benchmark_reminders(count=args.count).items():
+        print(f"{step}: {seconds:.3f}s")
+
+
+task_reminders = ReminderScheduler(
+    lead=float(
+        os.getenv("TASK_REMINDERS_LEAD_MINUTES", DEFAULT_TASK_REMINDERS_LEAD_MINUTES)
+    )
+    * 60,
+    horizon=float(
+        os.getenv("TASK_REMINDERS_HORIZON_HOURS", DEFAULT_TASK_REMINDERS_HORIZON_HOURS)
+    )
+    * 3600,
+    broker=task_events,
+)
+
+
+if __name__ == "__main__":
+    main()
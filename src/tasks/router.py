@@ -1,61 +1,205 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
 
-from src.auth.router import oauth2_scheme
-from src.auth.utils import verify_access_token
-from src.tasks.schemas import AddTask, AddTaskResponse, GetTasksResponse
-from src.tasks.Tasks import Tasks
+from src.auth.router import get_access_token_claims, get_event_stream_claims
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.cache import get_page_key, tasks_cache
+from src.tasks.events import stream_task_events, task_events
+from src.tasks.schemas import (
+    AddTask,
+    AddTaskResponse,
+    AddTasks,
+    AddTasksResponse,
+    CacheStatsResponse,
+    DeleteTaskResponse,
+    GetTasksResponse,
+    SearchTasksResponse,
+    StoredTask,
+    TaskChangesResponse,
+    TasksFilter,
+    TasksSummaryResponse,
+    UpcomingTasksResponse,
+    UpdateTask,
+    UpdateTaskResponse,
+)
+from src.tasks.search import (
+    DEFAULT_SEARCH_PAGE_SIZE,
+    MAX_SEARCH_PAGE_SIZE,
+    MAX_SEARCH_QUERY_LENGTH,
+    MAX_SEARCH_RESULTS,
+)
+from src.tasks.utils import (
+    DEFAULT_TASKS_PAGE_SIZE,
+    DEFAULT_UPCOMING_HOURS,
+    MAX_TASKS_PAGE_SIZE,
+    MAX_UPCOMING_HOURS,
+    etag_matches,
+    get_tasks_etag,
+)
 
 tasks_router = APIRouter(prefix="/tasks")
 
 
-def get_tasks_instance() -> Tasks:
+async def get_tasks_instance() -> AsyncTasks:
     """
     Get tasks handler
 
     Returns
     -------
-    Tasks
-        The tasks handler
+    AsyncTasks
+        The async tasks handler
+    """
+
+    return AsyncTasks()
+
+
+async def get_tasks_filter(
+    status: Annotated[Optional[List[str]], Query()] = None,
+    priority: Annotated[Optional[List[str]], Query()] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    order: Literal["asc", "desc"] = "asc",
+) -> TasksFilter:
+    """
+    Get the tasks filter from the query parameters
+
+    Parameters
+    ----------
+    status : Optional[List[str]]
+        Statuses to keep
+    priority : Optional[List[str]]
+        Priorities to keep
+    deadline_from : Optional[datetime]
+        Earliest deadline, inclusive
+    deadline_to : Optional[datetime]
+        Latest deadline, exclusive
+    order : Literal["asc", "desc"]
+        Deadline order
+
+    Returns
+    -------
+    TasksFilter
+        The tasks filter
     """
 
-    return Tasks()
+    return TasksFilter(
+        status=status,
+        priority=priority,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+        order=order,
+    )
 
 
 @tasks_router.get(
     "/get-tasks", status_code=status.HTTP_200_OK, response_model=GetTasksResponse
 )
-def get_tasks(
+async def get_tasks(
     email: str,
-    token: Annotated[str, Depends(oauth2_scheme)],
-    tasks: Tasks = Depends(get_tasks_instance),
-) -> GetTasksResponse:
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    response: Response,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_TASKS_PAGE_SIZE)
+    ] = DEFAULT_TASKS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    tasks_filter: TasksFilter = Depends(get_tasks_filter),
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> Union[GetTasksResponse, Response]:
     """
-    Get a user's list of tasks
+    Get a filtered page of a user's list of tasks
+
+    The page carries an ETag derived from the user's tasks
+    version, a matching If-None-Match is answered with
+    304 Not Modified without reading any task
 
     Parameters
     ----------
     email : str
         The user's email
-    token : Annotated[str, Depends(oauth2_scheme)]
-        The access token
-    tasks : Tasks
-        The tasks handler
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    response : Response
+        The response, used to set the ETag header
+    limit : int
+        Maximum number of tasks to return
+    cursor : Optional[str]
+        Cursor returned with the previous page
+    tasks_filter : TasksFilter
+        Status, priority and deadline filters and order
+    if_none_match : Optional[str]
+        Entity tags of the client copy
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    Union[GetTasksResponse, Response]
+        The response body, or an empty 304 response
     """
 
-    verify_access_token(token=token)
+    version = await tasks.get_tasks_version(email=email)
+    page_key = get_page_key(limit=limit, cursor=cursor, tasks_filter=tasks_filter)
+    etag = get_tasks_etag(version=version, page_key=page_key)
 
-    return tasks.get_tasks(email=email)
+    if etag_matches(if_none_match=if_none_match, etag=etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    response.headers["ETag"] = etag
+
+    return await tasks.get_tasks(
+        email=email,
+        limit=limit,
+        cursor=cursor,
+        tasks_filter=tasks_filter,
+        version=version,
+    )
+
+
+@tasks_router.get(
+    "/get-task", status_code=status.HTTP_200_OK, response_model=StoredTask
+)
+async def get_task(
+    email: str,
+    id: str,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> StoredTask:
+    """
+    Get a task by id
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    id : str
+        Id of the task
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    StoredTask
+        The task
+    """
+
+    return await tasks.get_task(email=email, task_id=id)
 
 
 @tasks_router.post(
     "/add-task", status_code=status.HTTP_201_CREATED, response_model=AddTaskResponse
 )
-def add_task(
+async def add_task(
     AddTaskRequest: AddTask,
-    token: Annotated[str, Depends(oauth2_scheme)],
-    tasks: Tasks = Depends(get_tasks_instance),
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
 ) -> AddTaskResponse:
     """
     Add a task to a user's list of tasks
@@ -64,10 +208,10 @@ def add_task(
     ----------
     AddTaskRequest : AddTask
         The request body
-    token : Annotated[str, Depends(oauth2_scheme)]
-        The access token
-    tasks : Tasks
-        The tasks handler
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
 
     Returns
     -------
@@ -75,8 +219,326 @@ def add_task(
         The response body
     """
 
-    verify_access_token(token=token)
+    return await tasks.add_task(add_task_request=AddTaskRequest)
 
-    tasks.add_task(add_task_request=AddTaskRequest)
 
-    return AddTaskResponse(detail="Task added successfully")
+@tasks_router.post(
+    "/add-tasks", status_code=status.HTTP_200_OK, response_model=AddTasksResponse
+)
+async def add_tasks(
+    AddTasksRequest: AddTasks,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> AddTasksResponse:
+    """
+    Add a batch of tasks to a user's list of tasks
+
+    Parameters
+    ----------
+    AddTasksRequest : AddTasks
+        The request body
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    AddTasksResponse
+        Number of added tasks and the outcome of each task
+    """
+
+    return await tasks.add_tasks(add_tasks_request=AddTasksRequest)
+
+
+@tasks_router.patch(
+    "/update-task", status_code=status.HTTP_200_OK, response_model=UpdateTaskResponse
+)
+async def update_task(
+    UpdateTaskRequest: UpdateTask,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> UpdateTaskResponse:
+    """
+    Update fields of a task
+
+    Parameters
+    ----------
+    UpdateTaskRequest : UpdateTask
+        The request body
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    UpdateTaskResponse
+        The response body
+    """
+
+    return await tasks.update_task(update_task_request=UpdateTaskRequest)
+
+
+@tasks_router.delete(
+    "/delete-task", status_code=status.HTTP_200_OK, response_model=DeleteTaskResponse
+)
+async def delete_task(
+    email: str,
+    id: str,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> DeleteTaskResponse:
+    """
+    Delete a task from a user's list of tasks
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    id : str
+        Id of the task
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    DeleteTaskResponse
+        The response body
+    """
+
+    return await tasks.delete_task(email=email, task_id=id)
+
+
+@tasks_router.get(
+    "/sync-tasks", status_code=status.HTTP_200_OK, response_model=TaskChangesResponse
+)
+async def sync_tasks(
+    email: str,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    since: Annotated[int, Query(ge=0)] = 0,
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> TaskChangesResponse:
+    """
+    Get the changes to a user's list of tasks since a tasks version
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    since : int
+        Tasks version of the client copy, 0 for a full copy
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    TaskChangesResponse
+        Current tasks version, written tasks and deleted task ids
+    """
+
+    return await tasks.get_task_changes(email=email, since=since)
+
+
+@tasks_router.get(
+    "/summary", status_code=status.HTTP_200_OK, response_model=TasksSummaryResponse
+)
+async def get_tasks_summary(
+    email: str,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> TasksSummaryResponse:
+    """
+    Get the task counts of a user
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    TasksSummaryResponse
+        Counts per status and priority, total and overdue
+    """
+
+    return await tasks.get_tasks_summary(email=email)
+
+
+@tasks_router.get(
+    "/upcoming-tasks",
+    status_code=status.HTTP_200_OK,
+    response_model=UpcomingTasksResponse,
+)
+async def get_upcoming_tasks(
+    email: str,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    hours: Annotated[
+        float, Query(gt=0, le=MAX_UPCOMING_HOURS)
+    ] = DEFAULT_UPCOMING_HOURS,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_TASKS_PAGE_SIZE)
+    ] = DEFAULT_TASKS_PAGE_SIZE,
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> UpcomingTasksResponse:
+    """
+    Get a user's tasks that are not done and are due in the next hours
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    hours : float
+        Length of the window in hours
+    limit : int
+        Maximum number of tasks to return
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    UpcomingTasksResponse
+        Window and its tasks ordered by deadline
+    """
+
+    return await tasks.get_upcoming_tasks(email=email, hours=hours, limit=limit)
+
+
+@tasks_router.get(
+    "/search-tasks",
+    status_code=status.HTTP_200_OK,
+    response_model=SearchTasksResponse,
+)
+async def search_tasks(
+    email: str,
+    text: Annotated[str, Query(min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH)],
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_SEARCH_PAGE_SIZE)
+    ] = DEFAULT_SEARCH_PAGE_SIZE,
+    offset: Annotated[int, Query(ge=0, lt=MAX_SEARCH_RESULTS)] = 0,
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> SearchTasksResponse:
+    """
+    Search a user's tasks by title and description
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    text : str
+        Words to search
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    limit : int
+        Maximum number of hits to return
+    offset : int
+        Number of hits to skip, next_offset of the previous page
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    SearchTasksResponse
+        Hits ranked by relevance and the offset of the next page
+    """
+
+    return await tasks.search_tasks(email=email, text=text, limit=limit, offset=offset)
+
+
+@tasks_router.get("/export-tasks", status_code=status.HTTP_200_OK)
+async def export_tasks(
+    email: str,
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> StreamingResponse:
+    """
+    Stream a user's list of tasks as newline delimited JSON
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    StreamingResponse
+        One JSON encoded task per line
+    """
+
+    lines = await tasks.export_tasks(email=email)
+
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@tasks_router.get("/events", status_code=status.HTTP_200_OK)
+async def get_task_events(
+    email: str,
+    claims: Annotated[Dict[str, Any], Depends(get_event_stream_claims)],
+    tasks: AsyncTasks = Depends(get_tasks_instance),
+) -> StreamingResponse:
+    """
+    Stream the changes to a user's list of tasks as server-sent
+    events, the first event carries the current tasks version.
+    The access token is read from the Authorization header or,
+    for a browser EventSource, the access_token query parameter
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    claims : Annotated[Dict[str, Any], Depends(get_event_stream_claims)]
+        Claims of the verified access token
+    tasks : AsyncTasks
+        The async tasks handler
+
+    Returns
+    -------
+    StreamingResponse
+        Server-sent events stream
+    """
+
+    version = await tasks.get_tasks_version(email=email)
+
+    return StreamingResponse(
+        stream_task_events(email=email, version=version, broker=task_events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@tasks_router.get(
+    "/cache-stats", status_code=status.HTTP_200_OK, response_model=CacheStatsResponse
+)
+async def get_cache_stats(
+    claims: Annotated[Dict[str, Any], Depends(get_access_token_claims)],
+) -> CacheStatsResponse:
+    """
+    Get the tasks cache counters
+
+    Parameters
+    ----------
+    claims : Annotated[Dict[str, Any], Depends(get_access_token_claims)]
+        Claims of the verified access token
+
+    Returns
+    -------
+    CacheStatsResponse
+        Hits, misses, evictions, expirations and size
+    """
+
+    return tasks_cache.stats()
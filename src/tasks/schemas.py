@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Dict, List
+from typing import Annotated, Dict, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, BeforeValidator, Field, model_validator
+
+MAX_ADD_TASKS_BATCH_SIZE = 5000
 
 
 class Task(BaseModel):
@@ -12,8 +14,66 @@ class Task(BaseModel):
     deadline: datetime
 
 
+class StoredTask(Task):
+    id: Annotated[str, BeforeValidator(str)] = Field(
+        validation_alias=AliasChoices("_id", "id")
+    )
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class TaskEvent(BaseModel):
+    type: Literal["ready", "added", "updated", "deleted"]
+    version: int
+    id: Optional[str] = None
+    task: Optional[StoredTask] = None
+
+
+class DueTask(StoredTask):
+    owner: str
+
+
+class TaskReminder(BaseModel):
+    owner: str
+    id: str
+    title: str
+    deadline: datetime
+    remind_at: datetime
+
+
+class UpcomingTasksResponse(BaseModel):
+    start: datetime
+    end: datetime
+    tasks: List[StoredTask]
+
+
+class TaskSearchHit(StoredTask):
+    score: float
+
+
+class SearchTasksResponse(BaseModel):
+    hits: List[TaskSearchHit]
+    next_offset: Optional[int] = None
+
+
+class TasksFilter(BaseModel):
+    status: Optional[List[str]] = None
+    priority: Optional[List[str]] = None
+    deadline_from: Optional[datetime] = None
+    deadline_to: Optional[datetime] = None
+    order: Literal["asc", "desc"] = "asc"
+
+
 class GetTasksResponse(BaseModel):
-    tasks: List[Task]
+    tasks: List[StoredTask]
+    next_cursor: Optional[str] = None
+
+
+class TaskChangesResponse(BaseModel):
+    version: int
+    full: bool
+    tasks: List[StoredTask]
+    deleted: List[str]
 
 
 class AddTask(BaseModel):
@@ -23,3 +83,65 @@ class AddTask(BaseModel):
 
 class AddTaskResponse(BaseModel):
     detail: str
+    id: Optional[str] = None
+
+
+class TaskChanges(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    deadline: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self) -> "TaskChanges":
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("At least one field must be changed")
+
+        return self
+
+
+class UpdateTask(BaseModel):
+    email: str
+    id: str
+    changes: TaskChanges
+
+
+class UpdateTaskResponse(BaseModel):
+    detail: str
+
+
+class DeleteTaskResponse(BaseModel):
+    detail: str
+
+
+class AddTasks(BaseModel):
+    email: str
+    tasks: List[Task] = Field(min_length=1, max_length=MAX_ADD_TASKS_BATCH_SIZE)
+
+
+class AddTaskOutcome(BaseModel):
+    title: str
+    id: Optional[str] = None
+    status: Literal["added", "duplicate_in_batch", "already_exists"]
+
+
+class AddTasksResponse(BaseModel):
+    added: int
+    outcomes: List[AddTaskOutcome]
+
+
+class TasksSummaryResponse(BaseModel):
+    total: int
+    status: Dict[str, int]
+    priority: Dict[str, int]
+    overdue: int
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    users: int
+    pages: int
@@ -0,0 +1,208 @@
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.database import Database as MongoDatabase
+
+from src.database.Database import DATABASE_NAME, Database
+from src.database.indexes import ensure_indexes
+from src.tasks.schemas import SearchTasksResponse
+from src.tasks.utils import TASK_PROJECTION
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_SEARCH_RESULTS = 1000
+MAX_SEARCH_QUERY_LENGTH = 200
+
+SEARCH_SCORE = {"$meta": "textScore"}
+SEARCH_PROJECTION = {**TASK_PROJECTION, "score": SEARCH_SCORE}
+SEARCH_SORT = [("score", SEARCH_SCORE), ("_id", ASCENDING)]
+
+
+def get_search_query(email: str, text: str) -> Dict[str, Any]:
+    """
+    Build the query matching a user's tasks whose title or
+    description contain any of the words of a search, the
+    owner equality lets the (owner, text) index only read the
+    entries of the user
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    text : str
+        Words to search, quoted phrases and negated words
+        follow the MongoDB text search syntax
+
+    Returns
+    -------
+    Dict[str, Any]
+        Query on the tasks collection
+    """
+
+    return {"owner": email, "$text": {"$search": text}}
+
+
+def get_search_page(
+    hits: List[Dict[str, Any]], limit: int, offset: int
+) -> SearchTasksResponse:
+    """
+    Trim the extra hit fetched by the search and build the
+    page, ranked results are paginated by offset up to a
+    maximum number of results
+
+    Parameters
+    ----------
+    hits : List[Dict[str, Any]]
+        Hits returned by the search, trimmed in place
+    limit : int
+        Page size
+    offset : int
+        Number of hits skipped before the page
+
+    Returns
+    -------
+    SearchTasksResponse
+        Hits and the offset of the next page
+    """
+
+    next_offset = None
+
+    if len(hits) > limit:
+        del hits[limit:]
+
+        if offset + limit < MAX_SEARCH_RESULTS:
+            next_offset = offset + limit
+
+    return SearchTasksResponse(hits=hits, next_offset=next_offset)
+
+
+def benchmark_search(
+    database: MongoDatabase,
+    count: int,
+    queries: int = 200,
+    limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Time the first page of searches over the tasks of a
+    throwaway user, words follow a Zipf distribution so
+    searches mix common and rare words. The tasks are deleted
+    afterwards and never touch the counters of real users
+
+    Parameters
+    ----------
+    database : pymongo.database.Database
+        Database to benchmark
+    count : int
+        Number of tasks of the user
+    queries : int
+        Number of timed searches
+    limit : int
+        Page size
+    seed : int
+        Seed of the random words
+
+    Returns
+    -------
+    Dict[str, float]
+        Insert seconds and search latency percentiles in milliseconds
+    """
+
+    generator = random.Random(seed)
+    vocabulary = [f"word{rank}" for rank in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    owner = f"search-benchmark-{ObjectId()}"
+    deadline = datetime.now(timezone.utc)
+    tasks = database["tasks"]
+
+    def get_words(size: int) -> str:
+        return " ".join(generator.choices(vocabulary, weights=weights, k=size))
+
+    ensure_indexes(database=database)
+
+    try:
+        started = time.perf_counter()
+
+        for batch_start in range(0, count, 10_000):
+            tasks.insert_many(
+                [
+                    {
+                        "owner": owner,
+                        "title": f"{get_words(4)} {index}",
+                        "description": get_words(20),
+                        "status": "todo",
+                        "priority": "medium",
+                        "deadline": deadline,
+                    }
+                    for index in range(batch_start, min(batch_start + 10_000, count))
+                ],
+                ordered=False,
+            )
+
+        timings = {"insert": time.perf_counter() - started}
+        latencies = []
+
+        for _ in range(queries):
+            text = get_words(generator.choice([1, 2]))
+            started = time.perf_counter()
+            list(
+                tasks.find(
+                    get_search_query(email=owner, text=text),
+                    projection=SEARCH_PROJECTION,
+                )
+                .sort(SEARCH_SORT)
+                .limit(limit + 1)
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        percentiles = statistics.quantiles(latencies, n=100)
+        timings.update(
+            {"p50": percentiles[49], "p95": percentiles[94], "max": max(latencies)}
+        )
+
+        return timings
+    finally:
+        tasks.delete_many({"owner": owner})
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Task search command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Task search")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument(
+        "--count",
+        type=int,
+        action="append",
+        help="Number of tasks of the benchmark user, repeatable",
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    database = Database().get_client()[DATABASE_NAME]
+
+    for count in args.count or [10_000, 100_000]:
+        timings = benchmark_search(database=database, count=count, queries=args.queries)
+
+        print(
+            f"{count} tasks: insert {timings['insert']:.1f}s, "
+            f"p50 {timings['p50']:.1f}ms, p95 {timings['p95']:.1f}ms, "
+            f"max {timings['max']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
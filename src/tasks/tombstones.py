@@ -0,0 +1,88 @@
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
+
+from pymongo.database import Database as MongoDatabase
+
+from src.database.Database import DATABASE_NAME, Database
+
+DEFAULT_TASK_TOMBSTONES_RETENTION_DAYS = 30.0
+
+
+def compact_tombstones(database: MongoDatabase, before: datetime) -> int:
+    """
+    Delete the tombstones of deletes stamped before a date, the
+    tombstones version of each user is raised to the newest one
+    deleted before deleting, so a client synced before it gets a
+    full copy instead of missing deletes. Meant to run periodically
+
+    Parameters
+    ----------
+    database : pymongo.database.Database
+        Database to compact
+    before : datetime
+        Tombstones written before this date are deleted
+
+    Returns
+    -------
+    int
+        Number of tombstones deleted
+    """
+
+    floors = database["task_tombstones"].aggregate(
+        [
+            {"$match": {"updated_at": {"$lt": before}, "version": {"$exists": True}}},
+            {"$group": {"_id": "$owner", "version": {"$max": "$version"}}},
+        ]
+    )
+    deleted = 0
+
+    for floor in floors:
+        database["users"].update_one(
+            {"email": floor["_id"]},
+            {"$max": {"tombstones_version": floor["version"]}},
+        )
+        deleted += (
+            database["task_tombstones"]
+            .delete_many({"owner": floor["_id"], "version": {"$lte": floor["version"]}})
+            .deleted_count
+        )
+
+    return deleted
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Tombstones compaction command line
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Compact task tombstones")
+    parser.add_argument(
+        "--retention-days",
+        type=float,
+        default=float(
+            os.getenv(
+                "TASK_TOMBSTONES_RETENTION_DAYS",
+                DEFAULT_TASK_TOMBSTONES_RETENTION_DAYS,
+            )
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    database = Database().get_client()[DATABASE_NAME]
+    deleted = compact_tombstones(
+        database=database,
+        before=datetime.now(timezone.utc) - timedelta(days=args.retention_days),
+    )
+
+    print(f"Deleted {deleted} task tombstones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+import base64
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from src.tasks.cache import PageKey
+from src.tasks.exceptions import InvalidCursor, TaskNotFound
+from src.tasks.schemas import TasksFilter
+
+load_dotenv()
+
+DEFAULT_TASKS_PAGE_SIZE = 100
+MAX_TASKS_PAGE_SIZE = 500
+
+EXPORT_BATCH_SIZE = 500
+
+TASK_PROJECTION = {"owner": 0, "pending": 0, "change": 0}
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+DEFAULT_UPCOMING_HOURS = 24
+MAX_UPCOMING_HOURS = 24 * 31
+
+DONE_STATUSES = os.getenv("TASKS_DONE_STATUSES", "done").split(",")
+
+
+def encode_cursor(task: Mapping[str, Any]) -> str:
+    """
+    Encode the position of a task as an opaque cursor
+
+    Parameters
+    ----------
+    task : Mapping[str, Any]
+        Last task of a page
+
+    Returns
+    -------
+    str
+        Opaque cursor
+    """
+
+    position = {"deadline": task["deadline"].isoformat(), "title": task["title"]}
+
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode an opaque cursor into a task position
+
+    Parameters
+    ----------
+    cursor : str
+        Opaque cursor
+
+    Returns
+    -------
+    Dict[str, Any]
+        Deadline and title of the last task of the previous page
+
+    Raises
+    ------
+    InvalidCursor
+        If the cursor is malformed
+    """
+
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+        return {
+            "deadline": datetime.fromisoformat(position["deadline"]),
+            "title": str(position["title"]),
+        }
+    except Exception:
+        raise InvalidCursor()
+
+
+def get_task_id(task_id: str) -> ObjectId:
+    """
+    Parse the id of a task
+
+    Parameters
+    ----------
+    task_id : str
+        Task id as returned by the API
+
+    Returns
+    -------
+    ObjectId
+        Task document id
+
+    Raises
+    ------
+    TaskNotFound
+        If the id is malformed, no task can have it
+    """
+
+    try:
+        return ObjectId(task_id)
+    except (InvalidId, TypeError):
+        raise TaskNotFound()
+
+
+def get_pending_stamp(write: ObjectId) -> Dict[str, Any]:
+    """
+    Get the fields marking a document written before its write
+    got a tasks version, the mark is replaced by the version
+    once the user's tasks version has been bumped
+
+    Parameters
+    ----------
+    write : ObjectId
+        Id of the write
+
+    Returns
+    -------
+    Dict[str, Any]
+        Pending write and update time of the document
+    """
+
+    return {"pending": write, "updated_at": datetime.now(timezone.utc)}
+
+
+def get_version_stamp(version: int, change: str) -> Dict[str, Any]:
+    """
+    Get the update replacing the pending mark of a write
+    with the tasks version the write was given
+
+    Parameters
+    ----------
+    version : int
+        Tasks version of the user after the write
+    change : str
+        Kind of change, added, updated or deleted
+
+    Returns
+    -------
+    Dict[str, Any]
+        Update of the documents of the write
+    """
+
+    return {"$set": {"version": version, "change": change}, "$unset": {"pending": ""}}
+
+
+def get_changes_query(email: str, since: int) -> Dict[str, Any]:
+    """
+    Build the query selecting a user's documents written
+    after a tasks version, documents of a write still waiting
+    for its version are always selected as their version
+    may end up above the one handed to the client
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    since : int
+        Tasks version of the client copy, 0 for every document
+
+    Returns
+    -------
+    Dict[str, Any]
+        Query on the tasks or tombstones collection
+    """
+
+    if not since:
+        return {"owner": email}
+
+    return {
+        "owner": email,
+        "$or": [{"version": {"$gt": since}}, {"pending": {"$exists": True}}],
+    }
+
+
+def get_deadline_window(
+    hours: float, now: Optional[datetime] = None
+) -> Tuple[datetime, datetime]:
+    """
+    Get the deadline window starting now
+
+    Parameters
+    ----------
+    hours : float
+        Length of the window in hours
+    now : Optional[datetime]
+        Start of the window, the current time by default
+
+    Returns
+    -------
+    Tuple[datetime, datetime]
+        Start, inclusive, and end, exclusive, of the window
+    """
+
+    start = now or datetime.now(timezone.utc)
+
+    return start, start + timedelta(hours=hours)
+
+
+def get_deadline_window_query(
+    start: datetime, end: datetime, email: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build the query selecting the tasks that are not done
+    with a deadline in a window, of one user or of every user
+
+    Parameters
+    ----------
+    start : datetime
+        Start of the window, inclusive
+    end : datetime
+        End of the window, exclusive
+    email : Optional[str]
+        Only select the tasks of this user
+
+    Returns
+    -------
+    Dict[str, Any]
+        Query on the tasks collection
+    """
+
+    query = {
+        "deadline": {"$gte": start, "$lt": end},
+        "status": {"$nin": DONE_STATUSES},
+    }
+
+    return {"owner": email, **query} if email else query
+
+
+def get_tasks_sort(order: str) -> List[Tuple[str, int]]:
+    """
+    Get the sort specification of a tasks page
+
+    Parameters
+    ----------
+    order : str
+        Deadline order, asc or desc
+
+    Returns
+    -------
+    List[Tuple[str, int]]
+        Sort by deadline with title as tie breaker
+    """
+
+    direction = ASCENDING if order == "asc" else DESCENDING
+
+    return [("deadline", direction), ("title", direction)]
+
+
+def get_tasks_filter_match(tasks_filter: TasksFilter) -> Dict[str, Any]:
+    """
+    Get the match conditions of a tasks filter
+
+    Parameters
+    ----------
+    tasks_filter : TasksFilter
+        Status, priority and deadline filters
+
+    Returns
+    -------
+    Dict[str, Any]
+        Match conditions, empty when nothing is filtered
+    """
+
+    match: Dict[str, Any] = {}
+
+    if tasks_filter.status:
+        match["status"] = {"$in": tasks_filter.status}
+
+    if tasks_filter.priority:
+        match["priority"] = {"$in": tasks_filter.priority}
+
+    deadline: Dict[str, datetime] = {}
+
+    if tasks_filter.deadline_from:
+        deadline["$gte"] = tasks_filter.deadline_from
+
+    if tasks_filter.deadline_to:
+        deadline["$lt"] = tasks_filter.deadline_to
+
+    if deadline:
+        match["deadline"] = deadline
+
+    return match
+
+
+def get_cursor_match(cursor: str, order: str) -> Dict[str, Any]:
+    """
+    Get the match conditions of the tasks after a cursor
+
+    Parameters
+    ----------
+    cursor : str
+        Cursor returned with the previous page
+    order : str
+        Deadline order, asc or desc
+
+    Returns
+    -------
+    Dict[str, Any]
+        Match conditions
+
+    Raises
+    ------
+    InvalidCursor
+        If the cursor is malformed
+    """
+
+    position = decode_cursor(cursor)
+    after = "$gt" if order == "asc" else "$lt"
+
+    return {
+        "$or": [
+            {"deadline": {after: position["deadline"]}},
+            {"deadline": position["deadline"], "title": {after: position["title"]}},
+        ]
+    }
+
+
+def get_tasks_page_query(
+    email: str,
+    cursor: Optional[str] = None,
+    tasks_filter: Optional[TasksFilter] = None,
+) -> Dict[str, Any]:
+    """
+    Build the query selecting a user's tasks after
+    the cursor position that match the filter
+
+    Parameters
+    ----------
+    email : str
+        The user's email
+    cursor : Optional[str]
+        Cursor returned with the previous page
+    tasks_filter : Optional[TasksFilter]
+        Status, priority and deadline filters and order
+
+    Returns
+    -------
+    Dict[str, Any]
+        Query on the tasks collection
+    """
+
+    tasks_filter = tasks_filter or TasksFilter()
+
+    query = {"owner": email, **get_tasks_filter_match(tasks_filter=tasks_filter)}
+
+    if cursor:
+        query.update(get_cursor_match(cursor=cursor, order=tasks_filter.order))
+
+    return query
+
+
+def get_next_cursor(tasks: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """
+    Trim the extra task fetched by the page pipeline
+    and return the cursor of the next page
+
+    Parameters
+    ----------
+    tasks : List[Dict[str, Any]]
+        Tasks returned by the page pipeline, trimmed in place
+    limit : int
+        Page size
+
+    Returns
+    -------
+    Optional[str]
+        Cursor of the next page, None on the last page
+    """
+
+    if len(tasks) <= limit:
+        return None
+
+    del tasks[limit:]
+
+    return encode_cursor(tasks[-1])
+
+
+def get_tasks_etag(version: int, page_key: PageKey) -> str:
+    """
+    Get the strong entity tag of a tasks page
+
+    Parameters
+    ----------
+    version : int
+        Version of the user's list of tasks
+    page_key : PageKey
+        Key of the requested page
+
+    Returns
+    -------
+    str
+        Quoted entity tag
+    """
+
+    digest = hashlib.sha256(repr((version, page_key)).encode()).hexdigest()
+
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check if an If-None-Match header matches an entity tag
+
+    Parameters
+    ----------
+    if_none_match : Optional[str]
+        If-None-Match header value
+    etag : str
+        Current entity tag
+
+    Returns
+    -------
+    bool
+        Whether the client copy is still current
+    """
+
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+
+    return False
+
+
+def get_add_tasks_statuses(
+    titles: Sequence[str], existing_titles: Set[str]
+) -> List[str]:
+    """
+    Get the outcome of each task of a batch before writing it,
+    a title repeated in the batch is only added the first time
+
+    Parameters
+    ----------
+    titles : Sequence[str]
+        Titles of the batch in request order
+    existing_titles : Set[str]
+        Titles of the batch already in the user's list of tasks
+
+    Returns
+    -------
+    List[str]
+        Outcome of each task, added for the tasks to insert
+    """
+
+    seen: Set[str] = set()
+    statuses = []
+
+    for title in titles:
+        if title in seen:
+            statuses.append("duplicate_in_batch")
+        elif title in existing_titles:
+            statuses.append("already_exists")
+        else:
+            statuses.append("added")
+
+        seen.add(title)
+
+    return statuses
+
+
+def mark_bulk_write_conflicts(
+    statuses: List[str], pending: Sequence[int], error: BulkWriteError
+) -> None:
+    """
+    Mark the tasks rejected by the unique (owner, title) index
+    during an unordered bulk insert as already existing
+
+    Parameters
+    ----------
+    statuses : List[str]
+        Outcome of each task of the batch, updated in place
+    pending : Sequence[int]
+        Batch index of each inserted document
+    error : BulkWriteError
+        Error raised by the bulk insert
+
+    Raises
+    ------
+    BulkWriteError
+        If a write failed for another reason than a duplicate key
+    """
+
+    for write_error in error.details.get("writeErrors", []):
+        if write_error["code"] != DUPLICATE_KEY_ERROR_CODE:
+            raise error
+
+        statuses[pending[write_error["index"]]] = "already_exists"
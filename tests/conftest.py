@@ -1,25 +1,71 @@
+from typing import Iterator
+
 import pytest
 from pytest import MonkeyPatch
 
+from src.database.AsyncDatabase import AsyncDatabase
 from src.database.Database import Database
 
 
 @pytest.fixture
-def database(monkeypatch: MonkeyPatch) -> Database:
+def database(monkeypatch: MonkeyPatch) -> Iterator[Database]:
     """
-    Returns a Database instance
+    Returns a Database instance with
+    no process-wide client cached
 
     Parameters
     ----------
     monkeypatch : MonkeyPatch
         A pytest fixture for monkeypatching items
 
-    Returns
-    -------
+    Yields
+    ------
     Database
         Database instance
     """
 
     monkeypatch.setenv("MONGODB_CONNECTION_STRING", "fake_connection_string")
+    monkeypatch.setattr(Database, "_client", None)
+
+    yield Database()
+
+    Database._client = None
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """
+    Returns the backend used to run async tests
+
+    Returns
+    -------
+    str
+        Backend name
+    """
+
+    return "asyncio"
+
+
+@pytest.fixture
+def async_database(monkeypatch: MonkeyPatch) -> Iterator[AsyncDatabase]:
+    """
+    Returns an AsyncDatabase instance with
+    no process-wide client cached
+
+    Parameters
+    ----------
+    monkeypatch : MonkeyPatch
+        A pytest fixture for monkeypatching items
+
+    Yields
+    ------
+    AsyncDatabase
+        AsyncDatabase instance
+    """
+
+    monkeypatch.setenv("MONGODB_CONNECTION_STRING", "fake_connection_string")
+    monkeypatch.setattr(AsyncDatabase, "_client", None)
+
+    yield AsyncDatabase()
 
-    return Database()
+    AsyncDatabase._client = None
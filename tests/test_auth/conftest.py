@@ -1,9 +1,12 @@
-from unittest.mock import patch
+from collections import defaultdict
+from typing import Dict
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from bson import ObjectId
 from pytest import MonkeyPatch
 
+from src.auth.AsyncAuth import AsyncAuth
 from src.auth.Auth import Auth
 from src.auth.schemas import AuthResponse, UserSignIn, UserSignUp, VerifyTokenResponse
 from tests.test_auth.types import FakeFindOneResponse
@@ -105,7 +108,40 @@ def auth(monkeypatch: MonkeyPatch) -> Auth:
 
     monkeypatch.setenv("JWT_SECRET_KEY", "fake_jwt_secret_key")
 
-    with patch("src.auth.Auth.Database.get_client"):
+    collections: Dict[str, MagicMock] = defaultdict(MagicMock)
+
+    with patch("src.auth.Auth.Database.get_client") as get_client_mock:
+        database_mock = get_client_mock.return_value.__getitem__.return_value
+        database_mock.__getitem__.side_effect = collections.__getitem__
+
         auth = Auth()
 
     return auth
+
+
+@pytest.fixture
+def async_auth(monkeypatch: MonkeyPatch) -> AsyncAuth:
+    """
+    Returns an AsyncAuth instance
+    with mocked collections
+
+    Parameters
+    ----------
+    monkeypatch : MonkeyPatch
+        A pytest fixture for monkeypatching items
+
+    Returns
+    -------
+    AsyncAuth
+        AsyncAuth instance
+    """
+
+    monkeypatch.setenv("JWT_SECRET_KEY", "fake_jwt_secret_key")
+
+    with patch("src.auth.AsyncAuth.AsyncDatabase.get_client") as get_client_mock:
+        database_mock = get_client_mock.return_value.__getitem__.return_value
+        database_mock.__getitem__.side_effect = defaultdict(AsyncMock).__getitem__
+
+        async_auth = AsyncAuth()
+
+    return async_auth
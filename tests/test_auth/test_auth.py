@@ -1,24 +1,45 @@
+import asyncio
 import os
+import threading
 from unittest.mock import patch
 
 import pytest
+from bson import ObjectId
 from fastapi.testclient import TestClient
 from jose import jwt
+from passlib.hash import bcrypt
+from pymongo.errors import DuplicateKeyError
 from pytest import MonkeyPatch
 
-from src.auth.Auth import Auth
+from src.auth.AsyncAuth import AsyncAuth
+from src.auth.Auth import CREDENTIALS_FIELDS, Auth
 from src.auth.exceptions import (
+    InvalidRefreshToken,
+    PasswordHasherBusy,
     SecretNotProvided,
     SignInWrongCredentials,
     TokenVerificationError,
     UserAlreadyExists,
 )
-from src.auth.schemas import AuthResponse, UserSignIn, UserSignUp, VerifyTokenResponse
+from src.auth.hashing import PasswordHasher, calibrate_bcrypt_rounds, main
+from src.auth.schemas import (
+    AuthResponse,
+    RefreshTokenRequest,
+    UserSignIn,
+    UserSignUp,
+    VerifyTokenResponse,
+)
+from src.auth.tokens import AccessTokenCache, access_token_cache
 from src.auth.utils import (
     JWT_ALGORITHM,
     create_access_token,
+    decode_access_token,
     get_password_hash,
+    get_refresh_token_hash,
+    pwd_context,
+    set_bcrypt_rounds,
     verify_access_token,
+    verify_and_update_password,
     verify_password,
 )
 from src.main import app
@@ -166,9 +187,30 @@ def test_auth_get_user_by_email_find_one_called(
         UserSignUp instance
     """
 
-    auth._get_user_by_email(email=fake_user_sign_up.email)
+    auth._get_user_by_email(email=fake_user_sign_up.email, fields=CREDENTIALS_FIELDS)
+
+    auth.users.find_one.assert_called_once_with(
+        {"email": fake_user_sign_up.email},
+        projection={"name": 1, "email": 1, "password": 1},
+    )
+
 
-    auth.users.find_one.assert_called_once_with({"email": fake_user_sign_up.email})
+def test_auth_sign_up_single_insert(auth: Auth, fake_user_sign_up: UserSignUp) -> None:
+    """
+    Test if sign_up writes the user without reading it first
+
+    Parameters
+    ----------
+    auth : Auth
+        Auth instance
+    fake_user_sign_up : UserSignUp
+        UserSignUp instance
+    """
+
+    auth.sign_up(user=fake_user_sign_up)
+
+    auth.users.find_one.assert_not_called()
+    auth.users.insert_one.assert_called_once()
 
 
 def test_auth_sign_in_user_not_found(auth: Auth, fake_user_sign_in: UserSignIn) -> None:
@@ -235,22 +277,23 @@ def test_auth_sign_in_returns_response(
 
     auth.users.find_one.return_value = fake_find_one_response
 
-    with patch("src.auth.Auth.verify_password") as verify_password_mock:
-        verify_password_mock.return_value = True
+    with patch("src.auth.Auth.verify_and_update_password") as verify_password_mock:
+        verify_password_mock.return_value = (True, None)
 
         response = auth.sign_in(user=fake_user_sign_in)
 
     assert isinstance(response, AuthResponse)
+    auth.users.update_one.assert_not_called()
 
 
-def test_auth_sign_up_user_already_exists(
+def test_auth_sign_in_rehashes_outdated_password(
     auth: Auth,
     fake_find_one_response: FakeFindOneResponse,
-    fake_user_sign_up: UserSignUp,
+    fake_user_sign_in: UserSignIn,
 ) -> None:
     """
-    Test if UserAlreadyExists exception
-    is raised when user already exists
+    Test if sign_in stores the rehashed password
+    only if the stored hash was not changed
 
     Parameters
     ----------
@@ -258,11 +301,148 @@ def test_auth_sign_up_user_already_exists(
         Auth instance
     fake_find_one_response : FakeFindOneResponse
         Dict with the expected response from find_one method
+    fake_user_sign_in : UserSignIn
+        UserSignIn instance
+    """
+
+    auth.users.find_one.return_value = fake_find_one_response
+
+    with patch("src.auth.Auth.verify_and_update_password") as verify_password_mock:
+        verify_password_mock.return_value = (True, "fake_new_hash")
+
+        auth.sign_in(user=fake_user_sign_in)
+
+    auth.users.update_one.assert_called_once_with(
+        {"email": "fake_email", "password": fake_find_one_response["password"]},
+        {"$set": {"password": "fake_new_hash"}},
+    )
+
+
+def test_auth_sign_in_stores_refresh_token_hash(
+    auth: Auth,
+    fake_find_one_response: FakeFindOneResponse,
+    fake_user_sign_in: UserSignIn,
+) -> None:
+    """
+    Test if sign_in issues a refresh token stored by its hash
+
+    Parameters
+    ----------
+    auth : Auth
+        Auth instance
+    fake_find_one_response : FakeFindOneResponse
+        Dict with the expected response from find_one method
+    fake_user_sign_in : UserSignIn
+        UserSignIn instance
+    """
+
+    auth.users.find_one.return_value = fake_find_one_response
+
+    with patch("src.auth.Auth.verify_and_update_password") as verify_password_mock:
+        verify_password_mock.return_value = (True, None)
+
+        response = auth.sign_in(user=fake_user_sign_in)
+
+    stored_token = auth.refresh_tokens.insert_one.call_args.args[0]
+
+    assert response.refresh_token
+    assert stored_token["token_hash"] == get_refresh_token_hash(response.refresh_token)
+    assert response.refresh_token not in stored_token.values()
+    assert stored_token["used"] is False
+
+
+def test_auth_refresh_rotates_token(auth: Auth) -> None:
+    """
+    Test if refresh marks the token used and issues one of the same family
+
+    Parameters
+    ----------
+    auth : Auth
+        Auth instance
+    """
+
+    family = ObjectId()
+    auth.refresh_tokens.find_one_and_update.return_value = {
+        "name": "fake_name",
+        "email": "fake_email",
+        "family": family,
+    }
+
+    response = auth.refresh(
+        refresh_request=RefreshTokenRequest(refresh_token="fake_refresh_token")
+    )
+
+    query, update = auth.refresh_tokens.find_one_and_update.call_args.args
+    stored_token = auth.refresh_tokens.insert_one.call_args.args[0]
+
+    assert query["token_hash"] == get_refresh_token_hash("fake_refresh_token")
+    assert query["used"] is False
+    assert update == {"$set": {"used": True}}
+    assert stored_token["family"] == family
+    assert stored_token["token_hash"] == get_refresh_token_hash(response.refresh_token)
+    assert response.email == "fake_email"
+    auth.users.find_one.assert_not_called()
+
+
+def test_auth_refresh_reused_token_revokes_family(auth: Auth) -> None:
+    """
+    Test if presenting a used refresh token revokes its family
+
+    Parameters
+    ----------
+    auth : Auth
+        Auth instance
+    """
+
+    family = ObjectId()
+    auth.refresh_tokens.find_one_and_update.return_value = None
+    auth.refresh_tokens.find_one.return_value = {"family": family}
+
+    with pytest.raises(InvalidRefreshToken):
+        auth.refresh(
+            refresh_request=RefreshTokenRequest(refresh_token="fake_refresh_token")
+        )
+
+    auth.refresh_tokens.delete_many.assert_called_once_with({"family": family})
+
+
+def test_auth_refresh_unknown_token(auth: Auth) -> None:
+    """
+    Test if an unknown refresh token is rejected without revoking anything
+
+    Parameters
+    ----------
+    auth : Auth
+        Auth instance
+    """
+
+    auth.refresh_tokens.find_one_and_update.return_value = None
+    auth.refresh_tokens.find_one.return_value = None
+
+    with pytest.raises(InvalidRefreshToken):
+        auth.refresh(
+            refresh_request=RefreshTokenRequest(refresh_token="fake_refresh_token")
+        )
+
+    auth.refresh_tokens.delete_many.assert_not_called()
+
+
+def test_auth_sign_up_user_already_exists(
+    auth: Auth, fake_user_sign_up: UserSignUp
+) -> None:
+    """
+    Test if UserAlreadyExists exception is raised
+    when the unique email index rejects the insert
+
+    Parameters
+    ----------
+    auth : Auth
+        Auth instance
     fake_user_sign_up : UserSignUp
         UserSignUp instance
     """
 
-    auth.users.find_one.return_value = fake_find_one_response
+    auth.users.insert_one.side_effect = DuplicateKeyError("duplicate key")
 
     with pytest.raises(UserAlreadyExists):
         auth.sign_up(user=fake_user_sign_up)
@@ -312,6 +492,138 @@ def test_auth_sign_up_returns_response(
     assert isinstance(response, AuthResponse)
 
 
+@pytest.mark.anyio
+async def test_async_auth_sign_in_password_not_valid(
+    async_auth: AsyncAuth,
+    fake_find_one_response: FakeFindOneResponse,
+    fake_user_sign_in: UserSignIn,
+) -> None:
+    """
+    Test if the async sign_in raises
+    SignInWrongCredentials when password not valid
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    fake_find_one_response : FakeFindOneResponse
+        Dict with the expected response from find_one method
+    fake_user_sign_in : UserSignIn
+        UserSignIn instance
+    """
+
+    async_auth.users.find_one.return_value = fake_find_one_response
+
+    with pytest.raises(SignInWrongCredentials):
+        await async_auth.sign_in(user=fake_user_sign_in)
+
+
+@pytest.mark.anyio
+async def test_async_auth_sign_in_returns_response(
+    async_auth: AsyncAuth,
+    fake_find_one_response: FakeFindOneResponse,
+    fake_user_sign_in: UserSignIn,
+) -> None:
+    """
+    Test if the async sign_in method returns the expected response
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    fake_find_one_response : FakeFindOneResponse
+        Dict with the expected response from find_one method
+    fake_user_sign_in : UserSignIn
+        UserSignIn instance
+    """
+
+    async_auth.users.find_one.return_value = fake_find_one_response
+
+    with patch("src.auth.hashing.verify_and_update_password") as verify_password_mock:
+        verify_password_mock.return_value = (True, None)
+
+        response = await async_auth.sign_in(user=fake_user_sign_in)
+
+    assert isinstance(response, AuthResponse)
+    async_auth.users.update_one.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_async_auth_sign_in_rehashes_outdated_password(
+    async_auth: AsyncAuth,
+    fake_find_one_response: FakeFindOneResponse,
+    fake_user_sign_in: UserSignIn,
+) -> None:
+    """
+    Test if the async sign_in stores the rehashed password
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    fake_find_one_response : FakeFindOneResponse
+        Dict with the expected response from find_one method
+    fake_user_sign_in : UserSignIn
+        UserSignIn instance
+    """
+
+    async_auth.users.find_one.return_value = fake_find_one_response
+
+    with patch("src.auth.hashing.verify_and_update_password") as verify_password_mock:
+        verify_password_mock.return_value = (True, "fake_new_hash")
+
+        await async_auth.sign_in(user=fake_user_sign_in)
+
+    async_auth.users.update_one.assert_awaited_once_with(
+        {"email": "fake_email", "password": fake_find_one_response["password"]},
+        {"$set": {"password": "fake_new_hash"}},
+    )
+
+
+@pytest.mark.anyio
+async def test_async_auth_sign_up_user_already_exists(
+    async_auth: AsyncAuth, fake_user_sign_up: UserSignUp
+) -> None:
+    """
+    Test if the async sign_up raises UserAlreadyExists
+    when the unique email index rejects the insert
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    fake_user_sign_up : UserSignUp
+        UserSignUp instance
+    """
+
+    async_auth.users.insert_one.side_effect = DuplicateKeyError("duplicate key")
+
+    with pytest.raises(UserAlreadyExists):
+        await async_auth.sign_up(user=fake_user_sign_up)
+
+
+@pytest.mark.anyio
+async def test_async_auth_sign_up_insert_one_called(
+    async_auth: AsyncAuth, fake_user_sign_up: UserSignUp
+) -> None:
+    """
+    Test if insert_one method is awaited in the async sign_up method
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    fake_user_sign_up : UserSignUp
+        UserSignUp instance
+    """
+
+    async_auth.users.find_one.return_value = None
+
+    await async_auth.sign_up(user=fake_user_sign_up)
+
+    async_auth.users.insert_one.assert_awaited_once()
+
+
 def test_auth_sign_in_route_200(
     fake_response: AuthResponse, fake_user_sign_in: UserSignIn
 ) -> None:
@@ -326,7 +638,7 @@ def test_auth_sign_in_route_200(
         UserSignIn instance
     """
 
-    with patch("src.auth.router.Auth") as auth_mock:
+    with patch("src.auth.router.AsyncAuth", autospec=True) as auth_mock:
         auth_mock.return_value.sign_in.return_value = fake_response
 
         response = client.post(
@@ -341,6 +653,31 @@ def test_auth_sign_in_route_200(
     assert response.json() == fake_response.__dict__
 
 
+def test_auth_sign_in_route_503(fake_user_sign_in: UserSignIn) -> None:
+    """
+    Test the sign_in route with status code 503 when the hasher is full
+
+    Parameters
+    ----------
+    fake_user_sign_in : UserSignIn
+        UserSignIn instance
+    """
+
+    with patch("src.auth.router.AsyncAuth", autospec=True) as auth_mock:
+        auth_mock.return_value.sign_in.side_effect = PasswordHasherBusy()
+
+        response = client.post(
+            "/auth/token",
+            data={
+                "username": fake_user_sign_in.email,
+                "password": fake_user_sign_in.password.get_secret_value(),
+            },
+        )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 def test_auth_sign_up_route_201(
     fake_response: AuthResponse, fake_user_sign_up: UserSignUp
 ) -> None:
@@ -355,7 +692,7 @@ def test_auth_sign_up_route_201(
         UserSignUp instance
     """
 
-    with patch("src.auth.router.Auth") as auth_mock:
+    with patch("src.auth.router.AsyncAuth", autospec=True) as auth_mock:
         auth_mock.return_value.sign_up.return_value = fake_response
 
         fake_user_dict = fake_user_sign_up.__dict__
@@ -386,3 +723,293 @@ def test_auth_verify_token_route_200(
 
     assert response.status_code == 200
     assert response.json() == fake_verify_token_response.__dict__
+
+
+@pytest.mark.anyio
+async def test_password_hasher_hashes_and_verifies() -> None:
+    """
+    Test if the password hasher hashes and verifies in its pool
+    """
+
+    hasher = PasswordHasher(workers=2, queue_size=2)
+
+    password_hash = await hasher.hash("fake_password")
+
+    assert await hasher.verify_and_update("fake_password", password_hash) == (
+        True,
+        None,
+    )
+    assert not (await hasher.verify_and_update("wrong_password", password_hash))[0]
+
+    stats = hasher.stats()
+
+    assert stats.completed == 3
+    assert stats.running == stats.queued == 0
+    assert stats.average_hash_ms > 0
+
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_password_hasher_rejects_when_full() -> None:
+    """
+    Test if the password hasher rejects operations past its bound
+    """
+
+    hasher = PasswordHasher(workers=1, queue_size=1)
+    release = threading.Event()
+    operations = [asyncio.create_task(hasher._run(release.wait)) for _ in range(2)]
+
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHasherBusy):
+        await hasher._run(release.wait)
+
+    stats = hasher.stats()
+
+    assert (stats.running, stats.queued, stats.rejected) == (1, 1, 1)
+
+    release.set()
+    await asyncio.gather(*operations)
+
+    assert hasher.stats().completed == 2
+
+    hasher.shutdown()
+
+
+def test_auth_set_bcrypt_rounds_rehashes_other_costs() -> None:
+    """
+    Test if hashes of another bcrypt cost are rehashed with the configured one
+    """
+
+    settings = pwd_context.to_dict()
+    outdated_hash = bcrypt.using(rounds=5).hash("fake_password")
+
+    try:
+        set_bcrypt_rounds(rounds=4)
+
+        valid, new_hash = verify_and_update_password("fake_password", outdated_hash)
+        wrong = verify_and_update_password("wrong_password", outdated_hash)
+        current = verify_and_update_password("fake_password", new_hash)
+    finally:
+        pwd_context.load(settings)
+
+    assert valid
+    assert new_hash.startswith("$2b$04$")
+    assert wrong == (False, None)
+    assert current == (True, None)
+
+
+def test_calibrate_bcrypt_rounds() -> None:
+    """
+    Test if calibration picks the highest cost meeting the target, within bounds
+    """
+
+    def timer(rounds: int) -> float:
+        return 100 * 2 ** (rounds - 10)
+
+    assert calibrate_bcrypt_rounds(target_ms=450, timer=timer) == 12
+    assert calibrate_bcrypt_rounds(target_ms=10, timer=timer) == 10
+    assert calibrate_bcrypt_rounds(target_ms=10_000, max_rounds=14, timer=timer) == 14
+
+
+def test_hashing_benchmark_command(capsys: pytest.CaptureFixture) -> None:
+    """
+    Test if the benchmark command prints the hash time of every cost
+
+    Parameters
+    ----------
+    capsys : pytest.CaptureFixture
+        Captured output
+    """
+
+    main(["benchmark", "--min-rounds", "4", "--max-rounds", "5", "--samples", "1"])
+
+    lines = capsys.readouterr().out.splitlines()
+
+    assert [line.split(":")[0] for line in lines] == ["4", "5"]
+
+
+def test_auth_hasher_stats_route_200(monkeypatch: MonkeyPatch) -> None:
+    """
+    Test the hasher_stats route with status code 200
+
+    Parameters
+    ----------
+    monkeypatch : MonkeyPatch
+        A pytest fixture for monkeypatching items
+    """
+
+    monkeypatch.setenv("JWT_SECRET_KEY", "fake_jwt_secret_key")
+
+    response = client.get(
+        "/auth/hasher-stats",
+        headers={"Authorization": f"Bearer {create_access_token()}"},
+    )
+
+    assert response.status_code == 200
+    assert set(response.json()) >= {"running", "queued", "rejected", "max_hash_ms"}
+
+
+def test_auth_hasher_stats_route_401() -> None:
+    """
+    Test the hasher_stats route with status code 401
+    """
+
+    with patch.dict(os.environ, {"JWT_SECRET_KEY": "fake_jwt_secret_key"}):
+        response = client.get(
+            "/auth/hasher-stats", headers={"Authorization": "Bearer fake_token"}
+        )
+
+    assert response.status_code == 401
+
+
+def test_auth_decode_access_token_caches_claims(monkeypatch: MonkeyPatch) -> None:
+    """
+    Test if a token is only decoded on its first verification
+
+    Parameters
+    ----------
+    monkeypatch : MonkeyPatch
+        A pytest fixture for monkeypatching items
+    """
+
+    monkeypatch.setenv("JWT_SECRET_KEY", "fake_jwt_secret_key")
+
+    token = create_access_token()
+    access_token_cache.clear()
+
+    with patch("src.auth.utils.jwt.decode", wraps=jwt.decode) as decode_mock:
+        claims = decode_access_token(token=token)
+
+        assert decode_access_token(token=token) == claims
+        assert verify_access_token(token=token)
+
+    decode_mock.assert_called_once()
+    assert "exp" in claims
+
+
+def test_auth_access_token_cache_expires_and_evicts() -> None:
+    """
+    Test if cached tokens expire with the token, are keyed by
+    secret and are evicted past the maximum size
+    """
+
+    now = 1_000.0
+    cache = AccessTokenCache(max_size=1, clock=lambda: now)
+
+    cache.set(token="fake_token", secret="fake_secret", claims={"exp": now + 10})
+
+    assert cache.get(token="fake_token", secret="fake_secret") == {"exp": now + 10}
+    assert cache.get(token="fake_token", secret="other_secret") is None
+
+    cache.set(token="other_token", secret="fake_secret", claims={"exp": now + 20})
+
+    assert cache.get(token="fake_token", secret="fake_secret") is None
+
+    now += 30
+
+    assert cache.get(token="other_token", secret="fake_secret") is None
+    assert len(cache) == 0
+
+
+def test_auth_access_token_cache_copies_claims() -> None:
+    """
+    Test if mutating the claims given to or returned by the cache leaves it intact
+    """
+
+    cache = AccessTokenCache(clock=lambda: 1_000.0)
+    claims = {"exp": 2_000.0}
+
+    cache.set(token="fake_token", secret="fake_secret", claims=claims)
+    claims["sub"] = "fake_email"
+    cache.get(token="fake_token", secret="fake_secret")["sub"] = "fake_email"
+
+    assert cache.get(token="fake_token", secret="fake_secret") == {"exp": 2_000.0}
+
+
+@pytest.mark.anyio
+async def test_async_auth_refresh_rotates_token(async_auth: AsyncAuth) -> None:
+    """
+    Test if the async refresh issues new tokens of the same family
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    """
+
+    family = ObjectId()
+    async_auth.refresh_tokens.find_one_and_update.return_value = {
+        "name": "fake_name",
+        "email": "fake_email",
+        "family": family,
+    }
+
+    response = await async_auth.refresh(
+        refresh_request=RefreshTokenRequest(refresh_token="fake_refresh_token")
+    )
+
+    assert response.refresh_token != "fake_refresh_token"
+    assert async_auth.refresh_tokens.insert_one.call_args.args[0]["family"] == family
+
+
+@pytest.mark.anyio
+async def test_async_auth_revoke_deletes_family(async_auth: AsyncAuth) -> None:
+    """
+    Test if the async revoke deletes every rotation of the token
+
+    Parameters
+    ----------
+    async_auth : AsyncAuth
+        AsyncAuth instance
+    """
+
+    family = ObjectId()
+    async_auth.refresh_tokens.find_one.return_value = {"family": family}
+
+    response = await async_auth.revoke(
+        refresh_request=RefreshTokenRequest(refresh_token="fake_refresh_token")
+    )
+
+    assert response.detail == "Token revoked"
+    async_auth.refresh_tokens.delete_many.assert_awaited_once_with({"family": family})
+
+
+def test_auth_refresh_route_200(fake_response: AuthResponse) -> None:
+    """
+    Test the refresh route with status code 200
+
+    Parameters
+    ----------
+    fake_response : AuthResponse
+        AuthResponse instance
+    """
+
+    with patch("src.auth.router.AsyncAuth", autospec=True) as auth_mock:
+        auth_mock.return_value.refresh.return_value = fake_response
+
+        response = client.post(
+            "/auth/refresh", json={"refresh_token": "fake_refresh_token"}
+        )
+
+    assert response.status_code == 200
+    auth_mock.return_value.refresh.assert_awaited_once_with(
+        refresh_request=RefreshTokenRequest(refresh_token="fake_refresh_token")
+    )
+
+
+def test_auth_refresh_route_401() -> None:
+    """
+    Test the refresh route with status code 401
+    """
+
+    with patch("src.auth.router.AsyncAuth", autospec=True) as auth_mock:
+        auth_mock.return_value.refresh.side_effect = InvalidRefreshToken()
+
+        response = client.post(
+            "/auth/refresh", json={"refresh_token": "fake_refresh_token"}
+        )
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Invalid refresh token"}
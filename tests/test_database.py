@@ -1,13 +1,15 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from pytest import MonkeyPatch
 
-from src.database.Database import Database
+from src.database.AsyncDatabase import AsyncDatabase
+from src.database.Database import DEFAULT_MAX_IDLE_TIME_MS, Database
 from src.database.exceptions import (
     ConnectionStringException,
     DatabaseConnectionException,
     DatabaseResponseException,
+    PoolConfigurationException,
 )
 
 
@@ -86,6 +88,26 @@ def test_database_response_error(database: Database) -> None:
         assert str(exception.value) == "Error in database response"
 
 
+def test_database_get_client_closes_unreachable_client(database: Database) -> None:
+    """
+    Test if a client whose connection test fails is closed and not shared
+
+    Parameters
+    ----------
+    database : Database
+        Database instance
+    """
+
+    with patch("src.database.Database.MongoClient") as mock_client:
+        mock_client.return_value.admin.command.side_effect = Exception
+
+        with pytest.raises(DatabaseResponseException):
+            database.get_client()
+
+    mock_client.return_value.close.assert_called_once_with()
+    assert Database._client is None
+
+
 def test_database_get_client_returns_client(database: Database) -> None:
     """
     Test if the client is returned in get_client
@@ -127,3 +149,146 @@ def test_database_get_client_methods_are_called(database: Database) -> None:
     mock_client.assert_called_once()
     mock_set_connection_string.assert_called_once()
     mock_test_connection.assert_called_once()
+
+
+def test_database_get_client_reuses_client(database: Database) -> None:
+    """
+    Test if the client is created and pinged
+    only once across handler instances
+
+    Parameters
+    ----------
+    database : Database
+        Database instance
+    """
+
+    with patch("src.database.Database.MongoClient") as mock_client:
+        first_client = database.get_client()
+        second_client = Database().get_client()
+
+    assert first_client is second_client
+    mock_client.assert_called_once()
+    mock_client.return_value.admin.command.assert_called_once_with("ping")
+
+
+def test_database_get_client_pool_options(
+    database: Database, monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Test if the pool options are passed to the client
+
+    Parameters
+    ----------
+    database : Database
+        Database instance
+    monkeypatch : MonkeyPatch
+        A pytest fixture for monkeypatching items
+    """
+
+    monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "25")
+    monkeypatch.setenv("MONGODB_MIN_POOL_SIZE", "5")
+
+    with patch("src.database.Database.MongoClient") as mock_client:
+        database.get_client()
+
+    assert mock_client.call_args.kwargs["maxPoolSize"] == 25
+    assert mock_client.call_args.kwargs["minPoolSize"] == 5
+    assert mock_client.call_args.kwargs["maxIdleTimeMS"] == DEFAULT_MAX_IDLE_TIME_MS
+
+
+def test_database_pool_options_error(
+    database: Database, monkeypatch: MonkeyPatch
+) -> None:
+    """
+    Test if a non integer pool option is rejected
+
+    Parameters
+    ----------
+    database : Database
+        Database instance
+    monkeypatch : MonkeyPatch
+        A pytest fixture for monkeypatching items
+    """
+
+    monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "many")
+
+    with pytest.raises(PoolConfigurationException) as exception:
+        database._get_pool_options()
+
+    assert str(exception.value) == "MONGODB_MAX_POOL_SIZE must be an integer"
+
+
+def test_database_close_client(database: Database) -> None:
+    """
+    Test if close_client closes and forgets the client
+
+    Parameters
+    ----------
+    database : Database
+        Database instance
+    """
+
+    with patch("src.database.Database.MongoClient") as mock_client:
+        database.get_client()
+        Database.close_client()
+
+    mock_client.return_value.close.assert_called_once()
+    assert Database._client is None
+
+
+def test_async_database_get_client_reuses_client(
+    async_database: AsyncDatabase,
+) -> None:
+    """
+    Test if the async client is created only once
+
+    Parameters
+    ----------
+    async_database : AsyncDatabase
+        AsyncDatabase instance
+    """
+
+    with patch("src.database.AsyncDatabase.AsyncIOMotorClient") as mock_client:
+        first_client = async_database.get_client()
+        second_client = AsyncDatabase().get_client()
+
+    assert first_client is second_client
+    mock_client.assert_called_once()
+
+
+@pytest.mark.anyio
+async def test_async_database_response_error(async_database: AsyncDatabase) -> None:
+    """
+    Test if there is an error in the response from the async database
+
+    Parameters
+    ----------
+    async_database : AsyncDatabase
+        AsyncDatabase instance
+    """
+
+    with patch("src.database.AsyncDatabase.AsyncIOMotorClient") as mock_client:
+        mock_client.return_value.admin.command = AsyncMock(side_effect=Exception)
+
+        with pytest.raises(DatabaseResponseException) as exception:
+            await async_database.test_connection()
+
+    assert str(exception.value) == "Error in database response"
+
+
+def test_async_database_close_client(async_database: AsyncDatabase) -> None:
+    """
+    Test if close_client closes and forgets the async client
+
+    Parameters
+    ----------
+    async_database : AsyncDatabase
+        AsyncDatabase instance
+    """
+
+    with patch("src.database.AsyncDatabase.AsyncIOMotorClient") as mock_client:
+        async_database.get_client()
+        AsyncDatabase.close_client()
+
+    mock_client.return_value.close.assert_called_once()
+    assert AsyncDatabase._client is None
@@ -0,0 +1,134 @@
+from typing import Dict
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.database.indexes import (
+    INDEXES,
+    ensure_indexes,
+    ensure_indexes_async,
+    get_index_report,
+    main,
+)
+
+
+def get_healthy_collections() -> Dict[str, MagicMock]:
+    """
+    Returns mocked collections holding every declared
+    index, each of them used once
+
+    Returns
+    -------
+    Dict[str, MagicMock]
+        Mocked collections by name
+    """
+
+    collections = {}
+
+    for collection, indexes in INDEXES.items():
+        collections[collection] = MagicMock()
+        collections[collection].list_indexes.return_value = [
+            {"name": "_id_"},
+            *[index.document for index in indexes],
+        ]
+        collections[collection].aggregate.return_value = [
+            {"name": index.document["name"], "accesses": {"ops": 1}}
+            for index in indexes
+        ]
+
+    return collections
+
+
+def test_indexes_ensure_indexes_creates_declared_indexes() -> None:
+    """
+    Test if ensure_indexes creates every declared index
+    """
+
+    collections = {collection: MagicMock() for collection in INDEXES}
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    ensure_indexes(database=database)
+
+    for collection, indexes in INDEXES.items():
+        collections[collection].create_indexes.assert_called_once_with(indexes)
+
+
+@pytest.mark.anyio
+async def test_indexes_ensure_indexes_async_creates_declared_indexes() -> None:
+    """
+    Test if ensure_indexes_async creates every declared index
+    """
+
+    collections = {collection: AsyncMock() for collection in INDEXES}
+    collections["users"].create_indexes.return_value = ["email_unique"]
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    names = await ensure_indexes_async(database=database)
+
+    collections["tasks"].create_indexes.assert_awaited_once_with(INDEXES["tasks"])
+    assert names["users"] == ["email_unique"]
+
+
+def test_indexes_report_missing_index() -> None:
+    """
+    Test if a declared index that does not exist is reported missing
+    """
+
+    collections = get_healthy_collections()
+    collections["users"].list_indexes.return_value = [{"name": "_id_"}]
+    collections["users"].aggregate.return_value = []
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    report = get_index_report(database=database)
+
+    assert report == {"missing": ["users.email_unique"], "unused": []}
+
+
+def test_indexes_report_unused_index() -> None:
+    """
+    Test if undeclared and never used indexes are reported unused
+    """
+
+    collections = get_healthy_collections()
+    collections["users"].list_indexes.return_value = [
+        {"name": "_id_"},
+        {"name": "email_unique"},
+        {"name": "name_1"},
+    ]
+    collections["users"].aggregate.return_value = [
+        {"name": "email_unique", "accesses": {"ops": 0}},
+        {"name": "name_1", "accesses": {"ops": 10}},
+    ]
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    report = get_index_report(database=database)
+
+    assert report == {"missing": [], "unused": ["users.email_unique", "users.name_1"]}
+
+
+def test_indexes_main_report(capsys: pytest.CaptureFixture) -> None:
+    """
+    Test if the report command prints the index report
+
+    Parameters
+    ----------
+    capsys : pytest.CaptureFixture
+        A pytest fixture capturing standard output
+    """
+
+    with (
+        patch("src.database.indexes.Database"),
+        patch("src.database.indexes.get_index_report") as get_index_report_mock,
+    ):
+        get_index_report_mock.return_value = {
+            "missing": ["users.email_unique"],
+            "unused": [],
+        }
+
+        main(["report"])
+
+    assert capsys.readouterr().out == "missing: users.email_unique\nunused: -\n"
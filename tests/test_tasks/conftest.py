@@ -1,10 +1,15 @@
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict, List
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from bson import ObjectId
 from pytest import MonkeyPatch
 
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.cache import TasksCache
+from src.tasks.reminders import ReminderScheduler
 from src.tasks.schemas import AddTask, AddTaskResponse, Task
 from src.tasks.Tasks import Tasks
 
@@ -32,50 +37,6 @@ def fake_add_task() -> AddTask:
     )
 
 
-@pytest.fixture
-def fake_user_tasks_existing_task() -> List[Dict[str, str]]:
-    """
-    Returns a list with a task that already exists
-
-    Returns
-    -------
-    List[Dict[str, str]]
-        List with a task
-    """
-
-    return [
-        {
-            "title": "fake_title",
-            "description": "fake_description",
-            "status": "fake_status",
-            "priority": "fake_priority",
-            "deadline": datetime(2021, 1, 1),
-        }
-    ]
-
-
-@pytest.fixture
-def fake_user_tasks_not_existing_task() -> List[Dict[str, str]]:
-    """
-    Returns a list with a task that does not exist
-
-    Returns
-    -------
-    List[Dict[str, str]]
-        List with a task
-    """
-
-    return [
-        {
-            "title": "fake_title_different",
-            "description": "fake_description_different",
-            "status": "fake_status_different",
-            "priority": "fake_priority_different",
-            "deadline": datetime(2021, 1, 1),
-        }
-    ]
-
-
 @pytest.fixture
 def fake_add_task_response() -> AddTaskResponse:
     """
@@ -95,7 +56,7 @@ def fake_add_task_response() -> AddTaskResponse:
 @pytest.fixture
 def fake_tasks() -> List[Dict[str, str]]:
     """
-    Returns a list with a task
+    Returns a list with a task as stored in the tasks collection
 
     Returns
     -------
@@ -105,6 +66,7 @@ def fake_tasks() -> List[Dict[str, str]]:
 
     return [
         {
+            "_id": ObjectId("65a000000000000000000001"),
             "title": "fake_title",
             "description": "fake_description",
             "status": "fake_status",
@@ -114,10 +76,28 @@ def fake_tasks() -> List[Dict[str, str]]:
     ]
 
 
+def get_async_collection() -> AsyncMock:
+    """
+    Returns an async collection mock whose
+    cursor returning methods are not awaitable
+
+    Returns
+    -------
+    AsyncMock
+        Async collection mock
+    """
+
+    collection = AsyncMock()
+    collection.find = MagicMock()
+
+    return collection
+
+
 @pytest.fixture
 def tasks(monkeypatch: MonkeyPatch) -> Tasks:
     """
-    Returns a Tasks instance
+    Returns a Tasks instance with
+    mocked collections
 
     Parameters
     ----------
@@ -132,7 +112,39 @@ def tasks(monkeypatch: MonkeyPatch) -> Tasks:
 
     monkeypatch.setenv("JWT_SECRET_KEY", "fake_jwt_secret_key")
 
-    with patch("src.auth.Auth.Database.get_client"):
+    collections: Dict[str, MagicMock] = defaultdict(MagicMock)
+
+    with patch("src.tasks.Tasks.Database.get_client") as get_client_mock:
+        database_mock = get_client_mock.return_value.__getitem__.return_value
+        database_mock.__getitem__.side_effect = collections.__getitem__
+
         tasks = Tasks()
 
+    tasks.cache = TasksCache()
+
     return tasks
+
+
+@pytest.fixture
+def async_tasks() -> AsyncTasks:
+    """
+    Returns an AsyncTasks instance with mocked collections
+
+    Returns
+    -------
+    AsyncTasks
+        AsyncTasks instance
+    """
+
+    collections: Dict[str, AsyncMock] = defaultdict(get_async_collection)
+
+    with patch("src.tasks.AsyncTasks.AsyncDatabase.get_client") as get_client_mock:
+        database_mock = get_client_mock.return_value.__getitem__.return_value
+        database_mock.__getitem__.side_effect = collections.__getitem__
+
+        async_tasks = AsyncTasks()
+
+    async_tasks.cache = TasksCache()
+    async_tasks.reminders = ReminderScheduler()
+
+    return async_tasks
@@ -1,10 +1,11 @@
-from typing import Dict, List
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 import pytest
 from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError
 
 from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
 from src.tasks.exceptions import TaskAlreadyExists, UserNotFound
 from src.tasks.schemas import AddTask, AddTaskResponse
 from src.tasks.Tasks import Tasks
@@ -24,17 +25,18 @@ def test_add_task_user_not_found(tasks: Tasks, fake_add_task: AddTask) -> None:
         AddTask instance
     """
 
-    tasks.users.find_one.return_value = None
+    tasks.users.find_one_and_update.return_value = None
 
     with pytest.raises(UserNotFound):
         tasks.add_task(add_task_request=fake_add_task)
 
+    tasks.tasks.delete_one.assert_called_once_with(
+        {"_id": tasks.tasks.insert_one.return_value.inserted_id}
+    )
+    tasks.tasks.update_many.assert_not_called()
 
-def test_add_task_task_already_exists(
-    tasks: Tasks,
-    fake_add_task: AddTask,
-    fake_user_tasks_existing_task: List[Dict[str, str]],
-) -> None:
+
+def test_add_task_task_already_exists(tasks: Tasks, fake_add_task: AddTask) -> None:
     """
     Test add_task method when task already exists
 
@@ -44,27 +46,15 @@ def test_add_task_task_already_exists(
         Tasks instance
     fake_add_task : AddTask
         AddTask instance
-    fake_user_tasks_existing_task : List[Dict[str, str]]
-        List with a task
     """
 
-    tasks.users.find_one.return_value = {
-        "_id": "fake_id",
-        "name": "fake_name",
-        "email": "fake_email",
-        "password": "fake_password",
-        "tasks": fake_user_tasks_existing_task,
-    }
+    tasks.tasks.insert_one.side_effect = DuplicateKeyError("duplicate key")
 
     with pytest.raises(TaskAlreadyExists):
         tasks.add_task(add_task_request=fake_add_task)
 
 
-def test_add_task_new_task(
-    tasks: Tasks,
-    fake_add_task: AddTask,
-    fake_user_tasks_not_existing_task: List[Dict[str, str]],
-) -> None:
+def test_add_task_new_task(tasks: Tasks, fake_add_task: AddTask) -> None:
     """
     Test add_task method when task is new
 
@@ -74,21 +64,102 @@ def test_add_task_new_task(
         Tasks instance
     fake_add_task : AddTask
         AddTask instance
-    fake_user_tasks_not_existing_task : List[Dict[str, str]]
-        List with a task
     """
 
-    tasks.users.find_one.return_value = {
-        "_id": "fake_id",
-        "name": "fake_name",
-        "email": "fake_email",
-        "password": "fake_password",
-        "tasks": fake_user_tasks_not_existing_task,
-    }
+    tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
 
     tasks.add_task(add_task_request=fake_add_task)
 
-    tasks.users.update_one.assert_called_once()
+    tasks.tasks.insert_one.assert_called_once_with(
+        {
+            "owner": fake_add_task.email,
+            **fake_add_task.task.__dict__,
+            "pending": ANY,
+            "updated_at": ANY,
+        }
+    )
+    assert tasks.users.find_one_and_update.call_args.args == (
+        {"email": fake_add_task.email},
+        {"$inc": {"tasks_version": 1}},
+    )
+    tasks.tasks.update_many.assert_called_once_with(
+        {
+            "owner": fake_add_task.email,
+            "pending": tasks.tasks.insert_one.call_args.args[0]["pending"],
+        },
+        {
+            "$set": {"version": 2, "change": "added"},
+            "$unset": {"pending": ""},
+        },
+    )
+
+
+@pytest.mark.anyio
+async def test_async_add_task_user_not_found(
+    async_tasks: AsyncTasks, fake_add_task: AddTask
+) -> None:
+    """
+    Test the async add_task method when user is not found
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    async_tasks.users.find_one_and_update.return_value = None
+
+    with pytest.raises(UserNotFound):
+        await async_tasks.add_task(add_task_request=fake_add_task)
+
+    async_tasks.tasks.delete_one.assert_awaited_once()
+    async_tasks.tasks.update_many.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_async_add_task_task_already_exists(
+    async_tasks: AsyncTasks, fake_add_task: AddTask
+) -> None:
+    """
+    Test the async add_task method when task already exists
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    async_tasks.tasks.insert_one.side_effect = DuplicateKeyError("duplicate key")
+
+    with pytest.raises(TaskAlreadyExists):
+        await async_tasks.add_task(add_task_request=fake_add_task)
+
+
+@pytest.mark.anyio
+async def test_async_add_task_new_task(
+    async_tasks: AsyncTasks, fake_add_task: AddTask
+) -> None:
+    """
+    Test the async add_task method when task is new
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    async_tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+
+    await async_tasks.add_task(add_task_request=fake_add_task)
+
+    async_tasks.tasks.insert_one.assert_awaited_once()
+    async_tasks.tasks.update_many.assert_awaited_once()
 
 
 def test_tasks_add_task_route_201(
@@ -106,11 +177,11 @@ def test_tasks_add_task_route_201(
     """
 
     with (
-        patch("src.tasks.router.Tasks") as tasks_mock,
-        patch("src.tasks.router.verify_access_token") as verify_access_token_mock,
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
     ):
         tasks_mock.return_value.add_task.return_value = fake_add_task_response
-        verify_access_token_mock.return_value = True
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
 
         fake_add_task_dict = fake_add_task.__dict__
         fake_add_task_dict["task"] = fake_add_task_dict["task"].__dict__
@@ -0,0 +1,308 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import BulkWriteError
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import UserNotFound
+from src.tasks.schemas import AddTaskOutcome, AddTasks, AddTasksResponse, Task
+from src.tasks.Tasks import Tasks
+from src.tasks.utils import get_add_tasks_statuses
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def fake_add_tasks() -> AddTasks:
+    """
+    Returns an AddTasks instance with a title repeated in the batch
+
+    Returns
+    -------
+    AddTasks
+        AddTasks instance
+    """
+
+    return AddTasks(
+        email="fake_email",
+        tasks=[
+            Task(
+                title=title,
+                description="fake_description",
+                status="fake_status",
+                priority="fake_priority",
+                deadline=datetime(2021, 1, 1),
+            )
+            for title in ["first", "second", "first", "third"]
+        ],
+    )
+
+
+def test_get_add_tasks_statuses() -> None:
+    """
+    Test that repeated and existing titles are not added
+    """
+
+    statuses = get_add_tasks_statuses(
+        titles=["first", "second", "first", "third"], existing_titles={"second"}
+    )
+
+    assert statuses == ["added", "already_exists", "duplicate_in_batch", "added"]
+
+
+def test_add_tasks_user_not_found(tasks: Tasks, fake_add_tasks: AddTasks) -> None:
+    """
+    Test add_tasks method when user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    tasks.tasks.insert_many.assert_not_called()
+
+
+def test_add_tasks_user_deleted_during_write(
+    tasks: Tasks, fake_add_tasks: AddTasks
+) -> None:
+    """
+    Test that add_tasks deletes the tasks it inserted when the
+    user is deleted before the tasks version is bumped
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+    tasks.users.find_one_and_update.return_value = None
+    tasks.tasks.find.return_value = iter([])
+
+    with pytest.raises(UserNotFound):
+        tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    write = tasks.tasks.insert_many.call_args.args[0][0]["pending"]
+
+    tasks.tasks.delete_many.assert_called_once_with(
+        {"owner": "fake_email", "pending": write}
+    )
+    tasks.tasks.update_many.assert_not_called()
+
+
+def test_add_tasks_single_write(tasks: Tasks, fake_add_tasks: AddTasks) -> None:
+    """
+    Test that add_tasks inserts the new tasks in one write
+    and reports the outcome of each task
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+    tasks.tasks.find.return_value = iter([{"title": "second"}])
+
+    response = tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    inserted = tasks.tasks.insert_many.call_args.args[0]
+
+    assert [task["title"] for task in inserted] == ["first", "third"]
+    assert tasks.tasks.insert_many.call_args.kwargs["ordered"] is False
+    assert response == AddTasksResponse(
+        added=2,
+        outcomes=[
+            AddTaskOutcome(title="first", id=str(inserted[0]["_id"]), status="added"),
+            AddTaskOutcome(title="second", status="already_exists"),
+            AddTaskOutcome(title="first", status="duplicate_in_batch"),
+            AddTaskOutcome(title="third", id=str(inserted[1]["_id"]), status="added"),
+        ],
+    )
+    tasks.users.find_one_and_update.assert_called_once()
+
+
+def test_add_tasks_concurrent_duplicate(tasks: Tasks, fake_add_tasks: AddTasks) -> None:
+    """
+    Test that a title rejected by the unique index
+    during the bulk insert is reported as already existing
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+    tasks.tasks.find.return_value = iter([])
+    tasks.tasks.insert_many.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 2, "code": 11000}]}
+    )
+
+    response = tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    assert response.added == 2
+    assert response.outcomes[3].status == "already_exists"
+
+
+def test_add_tasks_nothing_to_add(tasks: Tasks, fake_add_tasks: AddTasks) -> None:
+    """
+    Test that add_tasks does not write when every title exists
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+    tasks.tasks.find.return_value = iter(
+        [{"title": "first"}, {"title": "second"}, {"title": "third"}]
+    )
+
+    response = tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    assert response.added == 0
+    tasks.tasks.insert_many.assert_not_called()
+    tasks.users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_async_add_tasks_single_write(
+    async_tasks: AsyncTasks, fake_add_tasks: AddTasks
+) -> None:
+    """
+    Test that the async add_tasks inserts the new tasks in one write
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    async def fake_cursor() -> AsyncIterator[Dict[str, Any]]:
+        yield {"title": "second"}
+
+    async_tasks.users.find_one.return_value = {"_id": "fake_id"}
+    async_tasks.tasks.find.return_value = fake_cursor()
+
+    response = await async_tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    assert response.added == 2
+    async_tasks.tasks.insert_many.assert_awaited_once()
+
+
+def test_tasks_add_tasks_route_200() -> None:
+    """
+    Test /tasks/add-tasks route when status code is 200
+    """
+
+    fake_response = AddTasksResponse(
+        added=1, outcomes=[AddTaskOutcome(title="fake_title", status="added")]
+    )
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.add_tasks.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.post(
+            "/tasks/add-tasks",
+            json={
+                "email": "fake_email",
+                "tasks": [
+                    {
+                        "title": "fake_title",
+                        "description": "fake_description",
+                        "status": "fake_status",
+                        "priority": "fake_priority",
+                        "deadline": "2021-01-01T00:00:00",
+                    }
+                ],
+            },
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == fake_response.model_dump()
+
+
+def test_tasks_add_tasks_route_empty_batch() -> None:
+    """
+    Test that /tasks/add-tasks rejects an empty batch
+    """
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.post(
+            "/tasks/add-tasks",
+            json={"email": "fake_email", "tasks": []},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    tasks_mock.return_value.add_tasks.assert_not_called()
+
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_async_add_tasks_user_deleted_during_write(
+    async_tasks: AsyncTasks, fake_add_tasks: AddTasks
+) -> None:
+    """
+    Test that the async add_tasks deletes the tasks it inserted
+    when the user is deleted before the tasks version is bumped
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_tasks : AddTasks
+        AddTasks instance
+    """
+
+    async def fake_cursor() -> AsyncIterator[Dict[str, Any]]:
+        return
+        yield
+
+    async_tasks.users.find_one.return_value = {"_id": "fake_id"}
+    async_tasks.users.find_one_and_update.return_value = None
+    async_tasks.tasks.find.return_value = fake_cursor()
+
+    with pytest.raises(UserNotFound):
+        await async_tasks.add_tasks(add_tasks_request=fake_add_tasks)
+
+    write = async_tasks.tasks.insert_many.call_args.args[0][0]["pending"]
+
+    async_tasks.tasks.delete_many.assert_awaited_once_with(
+        {"owner": "fake_email", "pending": write}
+    )
+    async_tasks.tasks.update_many.assert_not_awaited()
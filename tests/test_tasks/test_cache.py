@@ -0,0 +1,301 @@
+from typing import Dict, List
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.cache import TasksCache, get_page_key
+from src.tasks.schemas import AddTask, CacheStatsResponse, GetTasksResponse
+from src.tasks.Tasks import Tasks
+
+client = TestClient(app)
+
+
+def test_cache_hit_and_miss() -> None:
+    """
+    Test that a cached page is returned and counted as a hit
+    """
+
+    cache = TasksCache()
+    key = get_page_key(limit=10, cursor=None, tasks_filter=None)
+    response = GetTasksResponse(tasks=[])
+
+    assert cache.get(email="fake_email", key=key, version=1) is None
+
+    cache.set(email="fake_email", key=key, response=response, generation=0, version=1)
+
+    assert cache.get(email="fake_email", key=key, version=1) is response
+    assert cache.stats().hits == 1
+    assert cache.stats().misses == 1
+
+
+def test_cache_expiration() -> None:
+    """
+    Test that a page is dropped once its time to live is over
+    """
+
+    now = [0.0]
+    cache = TasksCache(ttl=5, clock=lambda: now[0])
+    key = get_page_key(limit=10, cursor=None, tasks_filter=None)
+
+    cache.set(
+        email="fake_email",
+        key=key,
+        response=GetTasksResponse(tasks=[]),
+        generation=0,
+        version=1,
+    )
+    now[0] = 5.0
+
+    assert cache.get(email="fake_email", key=key, version=1) is None
+    assert cache.stats().expirations == 1
+
+
+def test_cache_evicts_least_recently_used_user() -> None:
+    """
+    Test that the least recently used user is evicted
+    """
+
+    cache = TasksCache(max_users=1)
+    key = get_page_key(limit=10, cursor=None, tasks_filter=None)
+    response = GetTasksResponse(tasks=[])
+
+    cache.set(email="fake_email", key=key, response=response, generation=0, version=1)
+    cache.set(
+        email="fake_email_other", key=key, response=response, generation=0, version=1
+    )
+
+    assert cache.get(email="fake_email", key=key, version=1) is None
+    assert cache.get(email="fake_email_other", key=key, version=1) is response
+    assert cache.stats().evictions == 1
+
+
+def test_cache_skips_pages_read_before_invalidation() -> None:
+    """
+    Test that a page read before an invalidation is not stored
+    """
+
+    cache = TasksCache()
+    key = get_page_key(limit=10, cursor=None, tasks_filter=None)
+    generation = cache.generation
+
+    cache.invalidate(email="fake_email")
+    cache.set(
+        email="fake_email",
+        key=key,
+        response=GetTasksResponse(tasks=[]),
+        generation=generation,
+        version=1,
+    )
+
+    assert cache.get(email="fake_email", key=key, version=1) is None
+
+
+def test_cache_skips_pages_of_another_version() -> None:
+    """
+    Test that a page cached at an older tasks version is not
+    served once the version is bumped by another process
+    """
+
+    cache = TasksCache()
+    key = get_page_key(limit=10, cursor=None, tasks_filter=None)
+
+    cache.set(
+        email="fake_email",
+        key=key,
+        response=GetTasksResponse(tasks=[]),
+        generation=0,
+        version=1,
+    )
+
+    assert cache.get(email="fake_email", key=key, version=2) is None
+    assert cache.get(email="fake_email", key=key, version=1) is None
+    assert cache.stats().pages == 0
+
+
+def test_get_tasks_served_from_cache(
+    tasks: Tasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that a repeated get_tasks does not query the database
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter(
+        fake_tasks
+    )
+
+    first_response = tasks.get_tasks(email="fake_email", version=1)
+    second_response = tasks.get_tasks(email="fake_email", version=1)
+
+    assert first_response is second_response
+    tasks.tasks.find.assert_called_once()
+
+
+def test_add_task_invalidates_cache(tasks: Tasks, fake_add_task: AddTask) -> None:
+    """
+    Test that add_task drops the cached pages of the user
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    key = get_page_key(limit=10, cursor=None, tasks_filter=None)
+    tasks.cache.set(
+        email=fake_add_task.email,
+        key=key,
+        response=GetTasksResponse(tasks=[]),
+        generation=0,
+        version=1,
+    )
+    tasks.users.find_one_and_update.return_value = {"tasks_version": 1}
+
+    tasks.add_task(add_task_request=fake_add_task)
+
+    assert tasks.cache.get(email=fake_add_task.email, key=key, version=1) is None
+
+
+@pytest.mark.anyio
+async def test_async_get_tasks_served_from_cache(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that a repeated async get_tasks does not query the database
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    find_mock = async_tasks.tasks.find
+    find_mock.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(
+        return_value=fake_tasks
+    )
+
+    first_response = await async_tasks.get_tasks(email="fake_email", version=1)
+    second_response = await async_tasks.get_tasks(email="fake_email", version=1)
+
+    assert first_response is second_response
+    find_mock.assert_called_once()
+    assert async_tasks.cache.stats().hits == 1
+
+
+@pytest.mark.anyio
+async def test_async_add_task_invalidates_cache(
+    async_tasks: AsyncTasks,
+    fake_tasks: List[Dict[str, str]],
+    fake_add_task: AddTask,
+) -> None:
+    """
+    Test that the async add_task drops the cached pages
+    of the user so the next get_tasks reads the database
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    find_mock = async_tasks.tasks.find
+    find_mock.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(
+        return_value=fake_tasks
+    )
+    async_tasks.users.find_one_and_update.return_value = {"tasks_version": 1}
+
+    await async_tasks.get_tasks(email=fake_add_task.email, version=1)
+    await async_tasks.add_task(add_task_request=fake_add_task)
+    await async_tasks.get_tasks(email=fake_add_task.email, version=1)
+
+    assert find_mock.call_count == 2
+    assert async_tasks.cache.stats().hits == 0
+
+
+@pytest.mark.anyio
+async def test_async_get_tasks_skips_cache_after_outside_write(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that a version bumped without going through this
+    process's cache makes the async get_tasks read the database
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    find_mock = async_tasks.tasks.find
+    find_mock.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(
+        side_effect=[[], fake_tasks]
+    )
+    async_tasks.users.find_one.return_value = {"_id": "fake_id"}
+
+    first_response = await async_tasks.get_tasks(email="fake_email", version=1)
+    second_response = await async_tasks.get_tasks(email="fake_email", version=2)
+
+    assert first_response.tasks == []
+    assert len(second_response.tasks) == 1
+    assert find_mock.call_count == 2
+
+
+def test_get_tasks_without_version_bypasses_cache(
+    tasks: Tasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that get_tasks neither reads nor fills the
+    cache when the caller did not read the tasks version
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    tasks.tasks.find.return_value.sort.return_value.limit.side_effect = lambda _: iter(
+        fake_tasks
+    )
+
+    tasks.get_tasks(email="fake_email")
+    tasks.get_tasks(email="fake_email")
+
+    assert tasks.tasks.find.call_count == 2
+    assert tasks.cache.stats().pages == 0
+
+
+def test_tasks_cache_stats_route_200() -> None:
+    """
+    Test that the route /tasks/cache-stats returns the cache counters
+    """
+
+    with patch("src.auth.router.decode_access_token") as decode_access_token_mock:
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/cache-stats", headers={"Authorization": "Bearer fake_token"}
+        )
+
+    assert response.status_code == 200
+    assert CacheStatsResponse(**response.json())
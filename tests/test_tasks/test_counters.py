@@ -0,0 +1,170 @@
+from typing import Dict
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.counters import (
+    build_tasks_summary,
+    get_count_deltas,
+    get_counter_writes,
+    rebuild_task_counters,
+)
+from src.tasks.exceptions import UserNotFound
+from src.tasks.schemas import TasksSummaryResponse
+from src.tasks.Tasks import Tasks
+
+client = TestClient(app)
+
+
+def test_get_count_deltas() -> None:
+    """
+    Test that only the counters of changed fields move
+    """
+
+    before = {"status": "todo", "priority": "high"}
+
+    assert get_count_deltas(before=None, after=before) == {
+        ("status", "todo"): 1,
+        ("priority", "high"): 1,
+    }
+    assert get_count_deltas(before=before, after={**before, "status": "done"}) == {
+        ("status", "todo"): -1,
+        ("status", "done"): 1,
+    }
+    assert get_count_deltas(before=before, after=before) == {}
+
+
+def test_get_counter_writes() -> None:
+    """
+    Test that every changed counter is upserted
+    """
+
+    writes = get_counter_writes(email="fake_email", deltas={("status", "todo"): -1})
+
+    assert len(writes) == 1
+    assert writes[0]._filter == {
+        "owner": "fake_email",
+        "field": "status",
+        "value": "todo",
+    }
+    assert writes[0]._doc == {"$inc": {"count": -1}}
+    assert writes[0]._upsert is True
+
+
+def test_build_tasks_summary() -> None:
+    """
+    Test that empty counters are left out of the summary
+    """
+
+    summary = build_tasks_summary(
+        counters=[
+            {"field": "status", "value": "todo", "count": 2},
+            {"field": "status", "value": "done", "count": 0},
+            {"field": "priority", "value": "high", "count": 2},
+        ],
+        overdue=1,
+    )
+
+    assert summary == TasksSummaryResponse(
+        total=2, status={"todo": 2}, priority={"high": 2}, overdue=1
+    )
+
+
+def test_rebuild_task_counters() -> None:
+    """
+    Test that the counters of a user are recounted from its tasks
+    """
+
+    collections: Dict[str, MagicMock] = {
+        "tasks": MagicMock(),
+        "task_counters": MagicMock(),
+    }
+    collections["tasks"].aggregate.side_effect = [
+        [{"_id": {"owner": "fake_email", "value": "todo"}, "count": 2}],
+        [{"_id": {"owner": "fake_email", "value": "high"}, "count": 2}],
+    ]
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    assert rebuild_task_counters(database=database, email="fake_email") == 2
+
+    collections["task_counters"].delete_many.assert_called_once_with(
+        {"owner": "fake_email"}
+    )
+    assert [
+        counter["field"]
+        for counter in collections["task_counters"].insert_many.call_args.args[0]
+    ] == ["status", "priority"]
+
+
+def test_get_tasks_summary_user_not_found(tasks: Tasks) -> None:
+    """
+    Test get_tasks_summary method when user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.task_counters.find.return_value = iter([])
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.get_tasks_summary(email="fake_email")
+
+
+@pytest.mark.anyio
+async def test_async_get_tasks_summary(async_tasks: AsyncTasks) -> None:
+    """
+    Test that the async get_tasks_summary reads the counters
+    and counts the overdue tasks
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    """
+
+    async_tasks.task_counters.find.return_value.to_list = AsyncMock(
+        return_value=[{"field": "status", "value": "todo", "count": 3}]
+    )
+    async_tasks.tasks.count_documents.return_value = 1
+
+    summary = await async_tasks.get_tasks_summary(email="fake_email")
+
+    assert summary == TasksSummaryResponse(
+        total=3, status={"todo": 3}, priority={}, overdue=1
+    )
+    query = async_tasks.tasks.count_documents.call_args.args[0]
+    assert query["owner"] == "fake_email"
+    assert "$lt" in query["deadline"]
+
+
+def test_tasks_summary_route_200() -> None:
+    """
+    Test that the route /tasks/summary returns 200
+    """
+
+    fake_response = TasksSummaryResponse(
+        total=1, status={"todo": 1}, priority={"high": 1}, overdue=0
+    )
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_tasks_summary.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/summary",
+            params={"email": "fake_email"},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == fake_response.model_dump()
@@ -0,0 +1,139 @@
+from unittest.mock import ANY, patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import TaskNotFound
+from src.tasks.schemas import DeleteTaskResponse
+from src.tasks.Tasks import Tasks
+
+client = TestClient(app)
+
+FAKE_TASK_ID = "65a000000000000000000001"
+
+
+def test_delete_task(tasks: Tasks) -> None:
+    """
+    Test that delete_task removes the task document
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    """
+
+    tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    tasks.tasks.find_one_and_delete.return_value = {
+        "status": "todo",
+        "priority": "high",
+    }
+
+    tasks.delete_task(email="fake_email", task_id=FAKE_TASK_ID)
+
+    tasks.tasks.find_one_and_delete.assert_called_once_with(
+        {"_id": ObjectId(FAKE_TASK_ID), "owner": "fake_email"},
+        projection={"_id": 0, "status": 1, "priority": 1},
+    )
+    assert [
+        (write._filter["field"], write._doc["$inc"]["count"])
+        for write in tasks.task_counters.bulk_write.call_args.args[0]
+    ] == [("status", -1), ("priority", -1)]
+    tasks.tombstones.insert_one.assert_called_once_with(
+        {
+            "owner": "fake_email",
+            "task_id": ObjectId(FAKE_TASK_ID),
+            "pending": ANY,
+            "updated_at": ANY,
+        }
+    )
+    tasks.tombstones.update_many.assert_called_once_with(
+        {
+            "owner": "fake_email",
+            "pending": tasks.tombstones.insert_one.call_args.args[0]["pending"],
+        },
+        {
+            "$set": {"version": 2, "change": "deleted"},
+            "$unset": {"pending": ""},
+        },
+    )
+
+
+def test_delete_task_task_not_found(tasks: Tasks) -> None:
+    """
+    Test delete_task method when task is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    """
+
+    tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    tasks.tasks.find_one_and_delete.return_value = None
+
+    with pytest.raises(TaskNotFound):
+        tasks.delete_task(email="fake_email", task_id=FAKE_TASK_ID)
+
+    tasks.tombstones.insert_one.assert_not_called()
+    tasks.users.find_one_and_update.assert_not_called()
+
+
+def test_delete_task_malformed_id(tasks: Tasks) -> None:
+    """
+    Test that delete_task reports a malformed id as not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    """
+
+    with pytest.raises(TaskNotFound):
+        tasks.delete_task(email="fake_email", task_id="not_an_id")
+
+    tasks.tasks.find_one_and_delete.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_async_delete_task_task_not_found(async_tasks: AsyncTasks) -> None:
+    """
+    Test the async delete_task method when task is not found
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    """
+
+    async_tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    async_tasks.tasks.find_one_and_delete.return_value = None
+
+    with pytest.raises(TaskNotFound):
+        await async_tasks.delete_task(email="fake_email", task_id=FAKE_TASK_ID)
+
+
+def test_tasks_delete_task_route_200() -> None:
+    """
+    Test /tasks/delete-task route when status code is 200
+    """
+
+    fake_response = DeleteTaskResponse(detail="Task deleted successfully")
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.delete_task.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.delete(
+            "/tasks/delete-task",
+            params={"email": "fake_email", "id": FAKE_TASK_ID},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == fake_response.model_dump()
@@ -0,0 +1,313 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from pymongo.errors import OperationFailure
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.events import (
+    TaskEventBroker,
+    get_change_event,
+    start_change_stream,
+    stream_task_events,
+)
+from src.tasks.schemas import AddTask, TaskEvent
+
+client = TestClient(app)
+
+
+@pytest.mark.anyio
+async def test_broker_publishes_to_user_subscribers() -> None:
+    """
+    Test that an event only reaches the subscribers of its user
+    """
+
+    broker = TaskEventBroker()
+    queue = broker.subscribe(email="fake_email")
+    other_queue = broker.subscribe(email="other_email")
+    event = TaskEvent(type="updated", version=2, id="fake_id")
+
+    broker.publish(email="fake_email", event=event)
+
+    assert queue.get_nowait() == event
+    assert other_queue.empty()
+
+    broker.unsubscribe(email="fake_email", queue=queue)
+    broker.unsubscribe(email="other_email", queue=other_queue)
+
+    assert broker.subscribers() == 0
+
+
+@pytest.mark.anyio
+async def test_broker_drops_oldest_event_when_full() -> None:
+    """
+    Test that a subscriber falling behind loses its oldest events
+    """
+
+    broker = TaskEventBroker(max_queue_size=2)
+    queue = broker.subscribe(email="fake_email")
+
+    for version in range(1, 4):
+        broker.publish(
+            email="fake_email", event=TaskEvent(type="updated", version=version)
+        )
+
+    assert [queue.get_nowait().version for _ in range(2)] == [2, 3]
+
+
+@pytest.mark.anyio
+async def test_broker_ignores_writes_while_change_stream_runs() -> None:
+    """
+    Test that handler writes are not published twice
+    """
+
+    broker = TaskEventBroker()
+    queue = broker.subscribe(email="fake_email")
+    broker.publish_writes = False
+
+    broker.publish_write(email="fake_email", event=TaskEvent(type="updated", version=1))
+
+    assert queue.empty()
+
+
+def test_get_change_event(fake_tasks: List[Dict[str, Any]]) -> None:
+    """
+    Test that task and tombstone changes become task events
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    task = {"owner": "fake_email", "version": 3, **fake_tasks[0]}
+    task_id = ObjectId()
+
+    owner, added = get_change_event(
+        {"ns": {"coll": "tasks"}, "operationType": "insert", "fullDocument": task}
+    )
+    _, deleted = get_change_event(
+        {
+            "ns": {"coll": "task_tombstones"},
+            "operationType": "insert",
+            "fullDocument": {"owner": "fake_email", "task_id": task_id, "version": 4},
+        }
+    )
+
+    assert owner == "fake_email"
+    assert (added.type, added.version, added.task.title) == ("added", 3, "fake_title")
+    assert (deleted.type, deleted.id) == ("deleted", str(task_id))
+    assert (
+        get_change_event(
+            {"ns": {"coll": "tasks"}, "operationType": "update", "fullDocument": None}
+        )
+        is None
+    )
+
+
+def test_get_change_event_waits_for_the_version_stamp(
+    fake_tasks: List[Dict[str, Any]],
+) -> None:
+    """
+    Test that a pending write is only published once stamped with its version
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    task = {"owner": "fake_email", **fake_tasks[0]}
+
+    assert (
+        get_change_event(
+            {
+                "ns": {"coll": "tasks"},
+                "operationType": "insert",
+                "fullDocument": {**task, "pending": ObjectId()},
+            }
+        )
+        is None
+    )
+
+    _, added = get_change_event(
+        {
+            "ns": {"coll": "tasks"},
+            "operationType": "update",
+            "updateDescription": {
+                "updatedFields": {"version": 5, "change": "added"},
+                "removedFields": ["pending"],
+            },
+            "fullDocument": {**task, "version": 5, "change": "added"},
+        }
+    )
+
+    assert (added.type, added.version) == ("added", 5)
+
+
+def test_get_change_event_publishes_an_update_once(
+    fake_tasks: List[Dict[str, Any]],
+) -> None:
+    """
+    Test that the pending mark and the stamp of one update,
+    both read after the stamp, publish a single event
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    stamped = {
+        "owner": "fake_email",
+        **fake_tasks[0],
+        "version": 5,
+        "change": "updated",
+    }
+    changes = [
+        {
+            "ns": {"coll": "tasks"},
+            "operationType": "update",
+            "updateDescription": {
+                "updatedFields": {
+                    "status": "done",
+                    "pending": ObjectId(),
+                    "updated_at": "fake_date",
+                },
+                "removedFields": [],
+            },
+            "fullDocument": stamped,
+        },
+        {
+            "ns": {"coll": "tasks"},
+            "operationType": "update",
+            "updateDescription": {
+                "updatedFields": {"version": 5, "change": "updated"},
+                "removedFields": ["pending"],
+            },
+            "fullDocument": stamped,
+        },
+    ]
+
+    events = [get_change_event(change) for change in changes]
+
+    assert events[0] is None
+    assert (events[1][1].type, events[1][1].version) == ("updated", 5)
+
+
+@pytest.mark.anyio
+async def test_start_change_stream_unsupported() -> None:
+    """
+    Test that handlers keep publishing their writes
+    when the deployment does not support change streams
+    """
+
+    broker = TaskEventBroker()
+    database = MagicMock()
+    database.watch.return_value.try_next = AsyncMock(
+        side_effect=OperationFailure("not a replica set", code=40573)
+    )
+    database.watch.return_value.close = AsyncMock()
+
+    assert await start_change_stream(database=database, broker=broker) is None
+    assert broker.publish_writes is True
+
+
+@pytest.mark.anyio
+async def test_stream_task_events() -> None:
+    """
+    Test that the stream starts with the tasks version, sends
+    a comment while idle and unsubscribes once closed
+    """
+
+    broker = TaskEventBroker()
+    stream = stream_task_events(
+        email="fake_email", version=5, broker=broker, heartbeat=0.01
+    )
+
+    ready = await stream.__anext__()
+    heartbeat = await stream.__anext__()
+
+    broker.publish(
+        email="fake_email", event=TaskEvent(type="deleted", version=6, id="fake_id")
+    )
+    deleted = await stream.__anext__()
+    await stream.aclose()
+
+    assert ready.startswith("event: ready\n")
+    assert heartbeat == ": keep-alive\n\n"
+    assert deleted.startswith("event: deleted\n")
+    assert json.loads(deleted.split("data: ")[1])["id"] == "fake_id"
+    assert broker.subscribers() == 0
+
+
+@pytest.mark.anyio
+async def test_async_add_task_publishes_event(
+    async_tasks: AsyncTasks, fake_add_task: AddTask
+) -> None:
+    """
+    Test that the async add_task publishes the added task
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    async_tasks.events = TaskEventBroker()
+    queue = async_tasks.events.subscribe(email=fake_add_task.email)
+    async_tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    async_tasks.tasks.insert_one.return_value.inserted_id = ObjectId()
+
+    await async_tasks.add_task(add_task_request=fake_add_task)
+
+    event = await asyncio.wait_for(queue.get(), timeout=1)
+
+    assert (event.type, event.version) == ("added", 2)
+    assert event.task.title == fake_add_task.task.title
+
+
+def test_tasks_events_route_query_token() -> None:
+    """
+    Test that /tasks/events accepts the access token in the
+    query string, as sent by a browser EventSource
+    """
+
+    async def fake_stream(**kwargs: Any) -> AsyncIterator[str]:
+        yield "event: ready\ndata: {}\n\n"
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.tasks.router.stream_task_events", side_effect=fake_stream),
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_tasks_version.return_value = 5
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/events",
+            params={"email": "fake_email", "access_token": "fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.text.startswith("event: ready\n")
+    decode_access_token_mock.assert_called_once_with(token="fake_token")
+
+
+def test_tasks_events_route_401() -> None:
+    """
+    Test that /tasks/events rejects a request without a token
+    """
+
+    with patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock:
+        response = client.get("/tasks/events", params={"email": "fake_email"})
+
+    assert response.status_code == 401
+    tasks_mock.return_value.get_tasks_version.assert_not_called()
@@ -0,0 +1,114 @@
+import json
+from typing import AsyncIterator, Dict, List
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import UserNotFound
+from src.tasks.schemas import StoredTask
+from src.tasks.Tasks import Tasks
+
+client = TestClient(app)
+
+
+def test_export_tasks_user_not_found(tasks: Tasks) -> None:
+    """
+    Test that export_tasks raises UserNotFound before streaming
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.export_tasks(email="fake_email")
+
+    tasks.tasks.find.assert_not_called()
+
+
+def test_export_tasks_lines(tasks: Tasks, fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that export_tasks yields one JSON encoded task per line
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+    tasks.tasks.find.return_value.sort.return_value = iter(fake_tasks)
+
+    lines = list(tasks.export_tasks(email="fake_email"))
+
+    assert lines == [StoredTask(**fake_tasks[0]).model_dump_json() + "\n"]
+    assert tasks.tasks.find.call_args.kwargs["batch_size"] > 0
+
+
+@pytest.mark.anyio
+async def test_async_export_tasks_lines(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that the async export_tasks yields one JSON encoded task per line
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    async def fake_cursor() -> AsyncIterator[Dict[str, str]]:
+        for task in fake_tasks:
+            yield task
+
+    async_tasks.users.find_one.return_value = {"_id": "fake_id"}
+    async_tasks.tasks.find.return_value.sort.return_value = fake_cursor()
+
+    lines = [line async for line in await async_tasks.export_tasks(email="fake_email")]
+
+    assert lines == [StoredTask(**fake_tasks[0]).model_dump_json() + "\n"]
+
+
+def test_tasks_export_tasks_route_200(fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that the route /tasks/export-tasks streams newline delimited JSON
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    async def fake_lines() -> AsyncIterator[str]:
+        for task in fake_tasks:
+            yield StoredTask(**task).model_dump_json() + "\n"
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.export_tasks.return_value = fake_lines()
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/export-tasks",
+            params={"email": "fake_email"},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == [
+        task["title"] for task in fake_tasks
+    ]
@@ -0,0 +1,132 @@
+import os
+from typing import Dict, List
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import TaskNotFound, UserNotFound
+from src.tasks.schemas import StoredTask
+from src.tasks.Tasks import Tasks
+from src.tasks.utils import TASK_PROJECTION
+
+client = TestClient(app)
+
+
+def test_get_task(tasks: Tasks, fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that get_task looks the task up by id and owner
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    task_id = str(fake_tasks[0]["_id"])
+    tasks.tasks.find_one.return_value = fake_tasks[0]
+
+    task = tasks.get_task(email="fake_email", task_id=task_id)
+
+    assert task.id == task_id
+    tasks.tasks.find_one.assert_called_once_with(
+        {"_id": fake_tasks[0]["_id"], "owner": "fake_email"},
+        projection=TASK_PROJECTION,
+    )
+
+
+def test_get_task_task_not_found(
+    tasks: Tasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test get_task method when task is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    tasks.tasks.find_one.return_value = None
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+
+    with pytest.raises(TaskNotFound):
+        tasks.get_task(email="fake_email", task_id=str(fake_tasks[0]["_id"]))
+
+
+@pytest.mark.anyio
+async def test_async_get_task_user_not_found(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test the async get_task method when user is not found
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    async_tasks.tasks.find_one.return_value = None
+    async_tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        await async_tasks.get_task(
+            email="fake_email", task_id=str(fake_tasks[0]["_id"])
+        )
+
+
+def test_tasks_get_task_route_200(fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that the route /tasks/get-task returns 200
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    task = StoredTask.model_validate(fake_tasks[0])
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_task.return_value = task
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/get-task",
+            params={"email": "fake_email", "id": task.id},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["id"] == task.id
+
+
+def test_tasks_get_task_route_401() -> None:
+    """
+    Test that the route /tasks/get-task rejects an invalid token
+    """
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch.dict(os.environ, {"JWT_SECRET_KEY": "fake_jwt_secret_key"}),
+    ):
+        response = client.get(
+            "/tasks/get-task",
+            params={"email": "fake_email", "id": "fake_id"},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 401
+    tasks_mock.return_value.get_task.assert_not_called()
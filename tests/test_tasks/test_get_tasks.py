@@ -1,13 +1,26 @@
+from datetime import datetime
 from typing import Dict, List
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
 from src.main import app
-from src.tasks.exceptions import UserNotFound
-from src.tasks.schemas import GetTasksResponse
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.cache import get_page_key
+from src.tasks.exceptions import InvalidCursor, UserNotFound
+from src.tasks.schemas import GetTasksResponse, TasksFilter
 from src.tasks.Tasks import Tasks
+from src.tasks.utils import (
+    DEFAULT_TASKS_PAGE_SIZE,
+    TASK_PROJECTION,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+    get_tasks_etag,
+    get_tasks_page_query,
+    get_tasks_sort,
+)
 
 client = TestClient(app)
 
@@ -22,6 +35,7 @@ def test_get_tasks_user_not_found(tasks: Tasks) -> None:
         The tasks instance
     """
 
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter([])
     tasks.users.find_one.return_value = None
 
     with pytest.raises(UserNotFound):
@@ -40,9 +54,191 @@ def test_get_tasks_response(tasks: Tasks, fake_tasks: List[Dict[str, str]]) -> N
         The fake tasks
     """
 
-    tasks.users.find_one.return_value = {"tasks": fake_tasks}
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter(
+        fake_tasks
+    )
 
     assert tasks.get_tasks(email="fake_email") == GetTasksResponse(tasks=fake_tasks)
+    tasks.tasks.find.assert_called_once_with(
+        {"owner": "fake_email"}, projection=TASK_PROJECTION
+    )
+    tasks.tasks.find.return_value.sort.assert_called_once_with(
+        [("deadline", 1), ("title", 1)]
+    )
+    tasks.tasks.find.return_value.sort.return_value.limit.assert_called_once_with(
+        DEFAULT_TASKS_PAGE_SIZE + 1
+    )
+    tasks.users.find_one.assert_not_called()
+
+
+def test_get_tasks_user_without_tasks(tasks: Tasks) -> None:
+    """
+    Test that get_tasks returns an empty list
+    when the user exists but has no tasks
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter([])
+    tasks.users.find_one.return_value = {"_id": "fake_id"}
+
+    assert tasks.get_tasks(email="fake_email") == GetTasksResponse(tasks=[])
+
+
+def test_get_tasks_next_cursor(tasks: Tasks, fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that get_tasks trims the extra task and
+    returns a cursor pointing after the last task
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    extra_task = {**fake_tasks[0], "title": "fake_title_extra"}
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter(
+        fake_tasks + [extra_task]
+    )
+
+    response = tasks.get_tasks(email="fake_email", limit=1)
+
+    assert response.tasks == GetTasksResponse(tasks=fake_tasks).tasks
+    assert decode_cursor(response.next_cursor) == {
+        "deadline": fake_tasks[0]["deadline"],
+        "title": fake_tasks[0]["title"],
+    }
+
+
+def test_get_tasks_page_query_after_cursor(fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that the page query resumes after the cursor position
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    cursor = encode_cursor(fake_tasks[0])
+
+    query = get_tasks_page_query(email="fake_email", cursor=cursor)
+
+    assert query == {
+        "owner": "fake_email",
+        "$or": [
+            {"deadline": {"$gt": fake_tasks[0]["deadline"]}},
+            {
+                "deadline": fake_tasks[0]["deadline"],
+                "title": {"$gt": fake_tasks[0]["title"]},
+            },
+        ],
+    }
+
+
+def test_get_tasks_page_query_filters(fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that the page query filters in the database
+    and combines the filter with the cursor position
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    tasks_filter = TasksFilter(
+        status=["done"],
+        priority=["high", "medium"],
+        deadline_from=datetime(2021, 1, 1),
+        deadline_to=datetime(2021, 1, 8),
+        order="desc",
+    )
+    cursor = encode_cursor(fake_tasks[0])
+
+    query = get_tasks_page_query(
+        email="fake_email", cursor=cursor, tasks_filter=tasks_filter
+    )
+
+    assert query == {
+        "owner": "fake_email",
+        "status": {"$in": ["done"]},
+        "priority": {"$in": ["high", "medium"]},
+        "deadline": {"$gte": datetime(2021, 1, 1), "$lt": datetime(2021, 1, 8)},
+        "$or": [
+            {"deadline": {"$lt": fake_tasks[0]["deadline"]}},
+            {
+                "deadline": fake_tasks[0]["deadline"],
+                "title": {"$lt": fake_tasks[0]["title"]},
+            },
+        ],
+    }
+    assert get_tasks_sort(order=tasks_filter.order) == [
+        ("deadline", -1),
+        ("title", -1),
+    ]
+
+
+def test_get_tasks_invalid_cursor(tasks: Tasks) -> None:
+    """
+    Test that get_tasks raises InvalidCursor when the cursor is malformed
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    with pytest.raises(InvalidCursor):
+        tasks.get_tasks(email="fake_email", cursor="fake_cursor")
+
+
+@pytest.mark.anyio
+async def test_async_get_tasks_user_not_found(async_tasks: AsyncTasks) -> None:
+    """
+    Test that the async get_tasks raises
+    UserNotFound when the user is not found
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    """
+
+    find_mock = async_tasks.tasks.find.return_value.sort.return_value.limit
+    find_mock.return_value.to_list = AsyncMock(return_value=[])
+    async_tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        await async_tasks.get_tasks(email="fake_email")
+
+
+@pytest.mark.anyio
+async def test_async_get_tasks_response(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that the async get_tasks returns the correct response
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    find_mock = async_tasks.tasks.find.return_value.sort.return_value.limit
+    find_mock.return_value.to_list = AsyncMock(return_value=fake_tasks)
+
+    response = await async_tasks.get_tasks(email="fake_email")
+
+    assert response == GetTasksResponse(tasks=fake_tasks)
 
 
 def test_tasks_get_tasks_route_200(fake_tasks: List[Dict[str, str]]) -> None:
@@ -57,15 +253,14 @@ def test_tasks_get_tasks_route_200(fake_tasks: List[Dict[str, str]]) -> None:
     """
 
     with (
-        patch("src.tasks.router.Tasks") as tasks_mock,
-        patch("src.tasks.router.verify_access_token") as verify_access_token_mock,
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
     ):
         tasks_mock.return_value.get_tasks.return_value = GetTasksResponse(
             tasks=fake_tasks
         )
-        verify_access_token_mock.return_value = True
-
-        fake_tasks[0]["deadline"] = fake_tasks[0]["deadline"].isoformat()
+        tasks_mock.return_value.get_tasks_version.return_value = 1
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
 
         response = client.get(
             "/tasks/get-tasks",
@@ -74,4 +269,139 @@ def test_tasks_get_tasks_route_200(fake_tasks: List[Dict[str, str]]) -> None:
         )
 
     assert response.status_code == 200
-    assert response.json()["tasks"] == fake_tasks
+    assert response.json()["tasks"] == [
+        {
+            "id": str(fake_tasks[0]["_id"]),
+            "title": fake_tasks[0]["title"],
+            "description": fake_tasks[0]["description"],
+            "status": fake_tasks[0]["status"],
+            "priority": fake_tasks[0]["priority"],
+            "deadline": fake_tasks[0]["deadline"].isoformat(),
+            "version": 0,
+            "updated_at": None,
+        }
+    ]
+    assert response.headers["ETag"] == get_tasks_etag(
+        version=1,
+        page_key=get_page_key(
+            limit=DEFAULT_TASKS_PAGE_SIZE, cursor=None, tasks_filter=TasksFilter()
+        ),
+    )
+
+
+def test_tasks_get_tasks_route_filters(fake_tasks: List[Dict[str, str]]) -> None:
+    """
+    Test that the route /tasks/get-tasks passes
+    the query parameters as a tasks filter
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_tasks.return_value = GetTasksResponse(tasks=[])
+        tasks_mock.return_value.get_tasks_version.return_value = 1
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/get-tasks",
+            params={
+                "email": "fake_email",
+                "status": ["todo", "doing"],
+                "deadline_to": "2021-01-08T00:00:00",
+                "order": "desc",
+            },
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    tasks_mock.return_value.get_tasks.assert_awaited_once_with(
+        email="fake_email",
+        limit=DEFAULT_TASKS_PAGE_SIZE,
+        cursor=None,
+        tasks_filter=TasksFilter(
+            status=["todo", "doing"], deadline_to=datetime(2021, 1, 8), order="desc"
+        ),
+        version=1,
+    )
+
+
+def test_tasks_get_tasks_route_304() -> None:
+    """
+    Test that the route /tasks/get-tasks answers a current
+    If-None-Match with 304 without reading the tasks
+    """
+
+    etag = get_tasks_etag(
+        version=1,
+        page_key=get_page_key(
+            limit=DEFAULT_TASKS_PAGE_SIZE, cursor=None, tasks_filter=TasksFilter()
+        ),
+    )
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_tasks_version.return_value = 1
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/get-tasks",
+            params={"email": "fake_email"},
+            headers={"Authorization": "Bearer fake_token", "If-None-Match": etag},
+        )
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    tasks_mock.return_value.get_tasks.assert_not_awaited()
+
+
+def test_get_tasks_version(tasks: Tasks) -> None:
+    """
+    Test that get_tasks_version reads only the version of the user
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.users.find_one.return_value = {"_id": "fake_id", "tasks_version": 3}
+
+    assert tasks.get_tasks_version(email="fake_email") == 3
+    tasks.users.find_one.assert_called_once_with(
+        {"email": "fake_email"}, projection={"tasks_version": 1}
+    )
+
+
+def test_get_tasks_version_user_not_found(tasks: Tasks) -> None:
+    """
+    Test that get_tasks_version raises UserNotFound when the user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.get_tasks_version(email="fake_email")
+
+
+def test_etag_matches() -> None:
+    """
+    Test If-None-Match comparison against an entity tag
+    """
+
+    assert etag_matches(if_none_match='"a", W/"b"', etag='"b"')
+    assert etag_matches(if_none_match="*", etag='"b"')
+    assert not etag_matches(if_none_match='"a"', etag='"b"')
+    assert not etag_matches(if_none_match=None, etag='"b"')
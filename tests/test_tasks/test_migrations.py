@@ -0,0 +1,106 @@
+from collections import defaultdict
+from typing import Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from src.tasks.migrations import migrate_embedded_tasks
+
+
+@pytest.fixture
+def fake_database() -> MagicMock:
+    """
+    Returns a database mock with a mock per collection
+
+    Returns
+    -------
+    MagicMock
+        Database mock
+    """
+
+    collections = defaultdict(MagicMock)
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    return database
+
+
+def test_migrate_embedded_tasks_moves_tasks(
+    fake_database: MagicMock, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that embedded tasks are inserted in the
+    tasks collection and removed from the user
+
+    Parameters
+    ----------
+    fake_database : MagicMock
+        Database mock
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    fake_database["users"].find.return_value = [
+        {"_id": "fake_id", "email": "fake_email", "tasks": fake_tasks}
+    ]
+
+    assert migrate_embedded_tasks(database=fake_database) == 1
+
+    fake_database["tasks"].bulk_write.assert_called_once_with(
+        [InsertOne({"owner": "fake_email", **fake_tasks[0]})], ordered=False
+    )
+    fake_database["users"].update_one.assert_called_once_with(
+        {"_id": "fake_id"}, {"$unset": {"tasks": ""}, "$inc": {"tasks_version": 1}}
+    )
+
+
+def test_migrate_embedded_tasks_skips_moved_tasks(
+    fake_database: MagicMock, fake_tasks: List[Dict[str, str]]
+) -> None:
+    """
+    Test that tasks already in the tasks collection
+    do not stop the migration of a user
+
+    Parameters
+    ----------
+    fake_database : MagicMock
+        Database mock
+    fake_tasks : List[Dict[str, str]]
+        The fake tasks
+    """
+
+    fake_database["users"].find.return_value = [
+        {"_id": "fake_id", "email": "fake_email", "tasks": fake_tasks}
+    ]
+    fake_database["tasks"].bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"code": 11000}]}
+    )
+
+    assert migrate_embedded_tasks(database=fake_database) == 1
+
+    fake_database["users"].update_one.assert_called_once()
+
+
+def test_migrate_embedded_tasks_ensures_indexes_first(
+    fake_database: MagicMock,
+) -> None:
+    """
+    Test that the indexes, among them the unique (owner, title)
+    one, are ensured before any task is inserted
+
+    Parameters
+    ----------
+    fake_database : MagicMock
+        Database mock
+    """
+
+    calls = MagicMock()
+    fake_database["users"].find.return_value = []
+    calls.attach_mock(fake_database["tasks"].create_indexes, "create_indexes")
+    calls.attach_mock(fake_database["users"].find, "find")
+
+    migrate_embedded_tasks(database=fake_database)
+
+    assert [name for name, *_ in calls.mock_calls[:2]] == ["create_indexes", "find"]
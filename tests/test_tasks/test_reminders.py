@@ -0,0 +1,362 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Tuple
+
+import pytest
+from bson import ObjectId
+
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.events import TaskEventBroker
+from src.tasks.reminders import ReminderScheduler, benchmark_reminders
+from src.tasks.schemas import AddTask, DueTask, TaskEvent, TaskReminder
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def get_due_task(task_id: str, deadline: datetime, status: str = "todo") -> DueTask:
+    """
+    Returns a task due at a deadline
+
+    Parameters
+    ----------
+    task_id : str
+        Id of the task
+    deadline : datetime
+        Deadline of the task
+    status : str
+        Status of the task
+
+    Returns
+    -------
+    DueTask
+        DueTask instance
+    """
+
+    return DueTask(
+        id=task_id,
+        owner="fake_email",
+        title=f"title {task_id}",
+        description="fake_description",
+        status=status,
+        priority="fake_priority",
+        deadline=deadline,
+    )
+
+
+def get_due_tasks_reader(
+    due_tasks: List[DueTask], windows: List[Tuple[datetime, datetime]]
+):
+    """
+    Returns a due tasks reader recording the read windows
+
+    Parameters
+    ----------
+    due_tasks : List[DueTask]
+        Tasks returned by every read
+    windows : List[Tuple[datetime, datetime]]
+        List the read windows are appended to
+
+    Returns
+    -------
+    Callable[[datetime, datetime], AsyncIterator[DueTask]]
+        Due tasks reader
+    """
+
+    async def get_due_tasks(start: datetime, end: datetime) -> AsyncIterator[DueTask]:
+        windows.append((start, end))
+
+        for task in due_tasks:
+            yield task
+
+    return get_due_tasks
+
+
+@pytest.mark.anyio
+async def test_reminders_fire_in_deadline_order() -> None:
+    """
+    Test that reminders fire a lead time before their deadline, in order
+    """
+
+    scheduler = ReminderScheduler(lead=600, horizon=3600, clock=NOW.timestamp)
+    due_tasks = [
+        get_due_task(task_id="late", deadline=NOW + timedelta(minutes=40)),
+        get_due_task(task_id="early", deadline=NOW + timedelta(minutes=20)),
+        get_due_task(
+            task_id="done", deadline=NOW + timedelta(minutes=30), status="done"
+        ),
+        get_due_task(task_id="later", deadline=NOW + timedelta(hours=2)),
+    ]
+
+    scheduled = await scheduler.load(
+        get_due_tasks=get_due_tasks_reader(due_tasks=due_tasks, windows=[]),
+        until=NOW.timestamp() + 3600,
+        now=NOW.timestamp(),
+    )
+
+    assert scheduled == 2
+    assert scheduler.next_due() == NOW.timestamp() + 600
+    assert scheduler.pop_due(now=NOW.timestamp()) == []
+
+    reminders = scheduler.pop_due(now=NOW.timestamp() + 3600)
+
+    assert [reminder.id for reminder in reminders] == ["early", "late"]
+    assert reminders[0].remind_at == NOW + timedelta(minutes=10)
+    assert reminders[0].deadline == NOW + timedelta(minutes=20)
+    assert len(scheduler) == 0
+
+
+@pytest.mark.anyio
+async def test_reschedule_and_cancel_replace_the_reminder() -> None:
+    """
+    Test that a rescheduled or cancelled reminder does not fire
+    """
+
+    scheduler = ReminderScheduler(lead=0, horizon=3600, clock=NOW.timestamp)
+
+    await scheduler.load(
+        get_due_tasks=get_due_tasks_reader(due_tasks=[], windows=[]),
+        until=NOW.timestamp() + 3600,
+        now=NOW.timestamp(),
+    )
+
+    for task_id in ("moved", "cancelled", "finished"):
+        scheduler.schedule(
+            email="fake_email",
+            task_id=task_id,
+            task={
+                "title": task_id,
+                "status": "todo",
+                "deadline": NOW + timedelta(minutes=5),
+            },
+        )
+
+    scheduler.schedule(
+        email="fake_email",
+        task_id="moved",
+        task={
+            "title": "moved",
+            "status": "todo",
+            "deadline": NOW + timedelta(minutes=30),
+        },
+    )
+    scheduler.schedule(
+        email="fake_email",
+        task_id="finished",
+        task={
+            "title": "finished",
+            "status": "done",
+            "deadline": NOW + timedelta(minutes=5),
+        },
+    )
+
+    assert scheduler.cancel(task_id="cancelled")
+    assert not scheduler.cancel(task_id="cancelled")
+    assert scheduler.pop_due(now=NOW.timestamp() + 600) == []
+    assert [
+        reminder.id for reminder in scheduler.pop_due(now=NOW.timestamp() + 1800)
+    ] == ["moved"]
+
+
+def test_schedule_ignores_writes_before_load() -> None:
+    """
+    Test that writes are not scheduled while the scheduler does not run
+    """
+
+    scheduler = ReminderScheduler(lead=0, horizon=3600, clock=NOW.timestamp)
+
+    assert not scheduler.schedule(
+        email="fake_email",
+        task_id="fake_id",
+        task={
+            "title": "fake_title",
+            "status": "todo",
+            "deadline": NOW + timedelta(minutes=5),
+        },
+    )
+    assert len(scheduler) == 0
+
+
+@pytest.mark.anyio
+async def test_load_only_reads_the_uncovered_window() -> None:
+    """
+    Test that extending the horizon only reads the new part
+    of the window while a change stream feeds the scheduler
+    """
+
+    broker = TaskEventBroker()
+    broker.publish_writes = False
+    scheduler = ReminderScheduler(
+        lead=600, horizon=3600, clock=NOW.timestamp, broker=broker
+    )
+    windows: List[Tuple[datetime, datetime]] = []
+    get_due_tasks = get_due_tasks_reader(due_tasks=[], windows=windows)
+
+    await scheduler.load(
+        get_due_tasks=get_due_tasks, until=NOW.timestamp() + 3600, now=NOW.timestamp()
+    )
+    await scheduler.load(
+        get_due_tasks=get_due_tasks,
+        until=NOW.timestamp() + 5400,
+        now=NOW.timestamp() + 1800,
+    )
+
+    assert windows == [
+        (NOW, NOW + timedelta(seconds=4200)),
+        (NOW + timedelta(seconds=4200), NOW + timedelta(seconds=6000)),
+    ]
+
+
+@pytest.mark.anyio
+async def test_load_rereads_the_horizon_without_change_stream() -> None:
+    """
+    Test that without a change stream a reload reads the whole
+    window again, dropping reminders of tasks changed elsewhere
+    """
+
+    scheduler = ReminderScheduler(lead=600, horizon=3600, clock=NOW.timestamp)
+    windows: List[Tuple[datetime, datetime]] = []
+    due_tasks = [
+        get_due_task(task_id="due", deadline=NOW + timedelta(minutes=5)),
+        get_due_task(task_id="deleted", deadline=NOW + timedelta(minutes=50)),
+    ]
+    get_due_tasks = get_due_tasks_reader(due_tasks=due_tasks, windows=windows)
+
+    await scheduler.load(
+        get_due_tasks=get_due_tasks, until=NOW.timestamp() + 3600, now=NOW.timestamp()
+    )
+    due_tasks[:] = [get_due_task(task_id="moved", deadline=NOW + timedelta(minutes=40))]
+    await scheduler.load(
+        get_due_tasks=get_due_tasks,
+        until=NOW.timestamp() + 5400,
+        now=NOW.timestamp() + 60,
+    )
+
+    assert windows[1] == (
+        NOW + timedelta(seconds=660),
+        NOW + timedelta(seconds=6000),
+    )
+    assert [
+        reminder.id for reminder in scheduler.pop_due(now=NOW.timestamp() + 3600)
+    ] == ["due", "moved"]
+
+
+def test_change_stream_reschedules_reminders() -> None:
+    """
+    Test that changes of the change stream reschedule and cancel
+    reminders, while handler writes of this process are ignored
+    """
+
+    broker = TaskEventBroker()
+    scheduler = ReminderScheduler(
+        lead=600, horizon=3600, clock=NOW.timestamp, broker=broker
+    )
+    scheduler._loaded_until = NOW.timestamp() + 3600
+    task = get_due_task(task_id="fake_id", deadline=NOW + timedelta(minutes=30))
+    event = TaskEvent(type="added", version=1, id="fake_id", task=task)
+
+    broker.listen(scheduler.apply)
+    broker.publish_write(email="fake_email", event=event)
+
+    assert len(scheduler) == 0
+
+    broker.publish_change(email="fake_email", event=event)
+
+    assert len(scheduler) == 1
+
+    broker.publish_change(
+        email="fake_email", event=TaskEvent(type="deleted", version=2, id="fake_id")
+    )
+    broker.unlisten(scheduler.apply)
+
+    assert len(scheduler) == 0
+
+
+@pytest.mark.anyio
+async def test_run_delivers_reminders_through_the_sink() -> None:
+    """
+    Test that run delivers due reminders and survives a failing sink
+    """
+
+    delivered: List[TaskReminder] = []
+    done = asyncio.Event()
+
+    async def sink(reminder: TaskReminder) -> None:
+        if reminder.id == "failing":
+            raise RuntimeError("sink failed")
+
+        delivered.append(reminder)
+        done.set()
+
+    now = datetime.now(timezone.utc)
+    scheduler = ReminderScheduler(sink=sink, lead=0, horizon=3600)
+    due_tasks = [
+        get_due_task(task_id="failing", deadline=now + timedelta(milliseconds=20)),
+        get_due_task(task_id="fake_id", deadline=now + timedelta(milliseconds=50)),
+    ]
+    runner = asyncio.create_task(
+        scheduler.run(
+            get_due_tasks=get_due_tasks_reader(due_tasks=due_tasks, windows=[])
+        )
+    )
+
+    await asyncio.wait_for(done.wait(), timeout=5)
+
+    runner.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await runner
+
+    assert [reminder.id for reminder in delivered] == ["fake_id"]
+    assert len(scheduler) == 0
+
+
+@pytest.mark.anyio
+async def test_async_task_writes_reschedule_reminders(
+    async_tasks: AsyncTasks, fake_add_task: AddTask
+) -> None:
+    """
+    Test that adding and deleting a task schedules and cancels its reminder
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_add_task : AddTask
+        AddTask instance
+    """
+
+    task_id = ObjectId()
+    fake_add_task.task.deadline = datetime.now(timezone.utc) + timedelta(hours=2)
+    async_tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    async_tasks.tasks.insert_one.return_value.inserted_id = task_id
+    async_tasks.tasks.find_one_and_delete.return_value = {
+        "status": "fake_status",
+        "priority": "fake_priority",
+    }
+
+    await async_tasks.reminders.load(
+        get_due_tasks=get_due_tasks_reader(due_tasks=[], windows=[]),
+        until=datetime.now(timezone.utc).timestamp() + 86400,
+        now=datetime.now(timezone.utc).timestamp(),
+    )
+    await async_tasks.add_task(add_task_request=fake_add_task)
+
+    assert len(async_tasks.reminders) == 1
+
+    await async_tasks.delete_task(email="fake_email", task_id=str(task_id))
+
+    assert len(async_tasks.reminders) == 0
+
+
+def test_benchmark_reminders() -> None:
+    """
+    Test that the benchmark times every step
+    """
+
+    assert list(benchmark_reminders(count=100)) == [
+        "schedule",
+        "reschedule 10%",
+        "cancel 10%",
+        "next due",
+        "fire all",
+    ]
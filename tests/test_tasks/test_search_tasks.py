@@ -0,0 +1,217 @@
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import UserNotFound
+from src.tasks.schemas import SearchTasksResponse
+from src.tasks.search import (
+    MAX_SEARCH_RESULTS,
+    SEARCH_PROJECTION,
+    SEARCH_SORT,
+    benchmark_search,
+    get_search_page,
+    get_search_query,
+)
+from src.tasks.Tasks import Tasks
+
+client = TestClient(app)
+
+
+def get_hits(fake_tasks: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """
+    Returns search hits with decreasing scores
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    count : int
+        Number of hits
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Search hits
+    """
+
+    return [
+        {**fake_tasks[0], "title": f"fake_title_{index}", "score": 1 / (index + 1)}
+        for index in range(count)
+    ]
+
+
+def test_get_search_page(fake_tasks: List[Dict[str, Any]]) -> None:
+    """
+    Test that the extra hit is trimmed and pages stop at the maximum results
+
+    Parameters
+    ----------
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    page = get_search_page(hits=get_hits(fake_tasks, 3), limit=2, offset=4)
+
+    assert [hit.title for hit in page.hits] == ["fake_title_0", "fake_title_1"]
+    assert page.next_offset == 6
+    assert (
+        get_search_page(hits=get_hits(fake_tasks, 2), limit=2, offset=0).next_offset
+        is None
+    )
+    assert (
+        get_search_page(
+            hits=get_hits(fake_tasks, 3), limit=2, offset=MAX_SEARCH_RESULTS - 2
+        ).next_offset
+        is None
+    )
+
+
+def test_search_tasks(tasks: Tasks, fake_tasks: List[Dict[str, Any]]) -> None:
+    """
+    Test that search_tasks ranks a page of the user's text matches
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    find_mock = tasks.tasks.find
+    find_mock.return_value.sort.return_value.skip.return_value.limit.return_value = (
+        iter(get_hits(fake_tasks, 2))
+    )
+
+    response = tasks.search_tasks(email="fake_email", text="fake", limit=5, offset=10)
+
+    assert [hit.score for hit in response.hits] == [1.0, 0.5]
+    assert response.next_offset is None
+    find_mock.assert_called_once_with(
+        get_search_query(email="fake_email", text="fake"),
+        projection=SEARCH_PROJECTION,
+    )
+    find_mock.return_value.sort.assert_called_once_with(SEARCH_SORT)
+    find_mock.return_value.sort.return_value.skip.assert_called_once_with(10)
+    find_mock.return_value.sort.return_value.skip.return_value.limit.assert_called_once_with(
+        6
+    )
+
+
+def test_search_tasks_user_not_found(tasks: Tasks) -> None:
+    """
+    Test search_tasks method when user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    find_mock = tasks.tasks.find
+    find_mock.return_value.sort.return_value.skip.return_value.limit.return_value = (
+        iter([])
+    )
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.search_tasks(email="fake_email", text="fake")
+
+
+@pytest.mark.anyio
+async def test_async_search_tasks(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, Any]]
+) -> None:
+    """
+    Test that the async search_tasks returns the ranked hits
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    cursor_mock = async_tasks.tasks.find.return_value.sort.return_value
+    cursor_mock.skip.return_value.limit.return_value.to_list = AsyncMock(
+        return_value=get_hits(fake_tasks, 3)
+    )
+
+    response = await async_tasks.search_tasks(email="fake_email", text="fake", limit=2)
+
+    assert len(response.hits) == 2
+    assert response.next_offset == 2
+
+
+def test_tasks_search_tasks_route_200() -> None:
+    """
+    Test that the route /tasks/search-tasks returns 200
+    """
+
+    fake_response = SearchTasksResponse(hits=[])
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.search_tasks.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/search-tasks",
+            params={"email": "fake_email", "text": "fake words", "offset": 20},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"hits": [], "next_offset": None}
+    tasks_mock.return_value.search_tasks.assert_awaited_once_with(
+        email="fake_email", text="fake words", limit=20, offset=20
+    )
+
+
+def test_tasks_search_tasks_route_422() -> None:
+    """
+    Test that the route /tasks/search-tasks rejects an empty search
+    """
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True),
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/search-tasks",
+            params={"email": "fake_email", "text": ""},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 422
+
+
+def test_benchmark_search_removes_its_tasks() -> None:
+    """
+    Test that the search benchmark deletes the tasks it inserted
+    """
+
+    collections: Dict[str, MagicMock] = {}
+    database = MagicMock()
+    database.__getitem__.side_effect = lambda name: collections.setdefault(
+        name, MagicMock()
+    )
+
+    timings = benchmark_search(database=database, count=1000, queries=10)
+
+    tasks_collection = collections["tasks"]
+    owner = tasks_collection.delete_many.call_args.args[0]["owner"]
+
+    assert set(timings) == {"insert", "p50", "p95", "max"}
+    assert tasks_collection.insert_many.call_count == 1
+    assert tasks_collection.find.call_count == 10
+    assert tasks_collection.find.call_args.args[0]["owner"] == owner
@@ -0,0 +1,491 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Set, Tuple
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.cache import TasksCache
+from src.tasks.exceptions import UserNotFound
+from src.tasks.reminders import ReminderScheduler
+from src.tasks.schemas import AddTask, Task, TaskChangesResponse
+from src.tasks.Tasks import Tasks
+from src.tasks.utils import TASK_PROJECTION
+
+client = TestClient(app)
+
+
+def matches(document: Mapping[str, Any], query: Mapping[str, Any]) -> bool:
+    """
+    Check if a document matches a query using
+    equality, $gt, $exists and $or
+
+    Parameters
+    ----------
+    document : Mapping[str, Any]
+        The document
+    query : Mapping[str, Any]
+        The query
+
+    Returns
+    -------
+    bool
+        Whether the document matches
+    """
+
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if "$gt" in condition and not document.get(field, 0) > condition["$gt"]:
+                return False
+            if "$exists" in condition and (field in document) != condition["$exists"]:
+                return False
+        elif document.get(field) != condition:
+            return False
+
+    return True
+
+
+class FakeCollection:
+    """
+    In-memory async collection whose operations
+    can be paused right before they land
+    """
+
+    def __init__(self) -> None:
+        self.documents: List[Dict[str, Any]] = []
+        self.gates: Dict[str, Tuple[asyncio.Event, asyncio.Event]] = {}
+
+    def pause(self, operation: str) -> Tuple[asyncio.Event, asyncio.Event]:
+        reached, release = asyncio.Event(), asyncio.Event()
+        self.gates[operation] = (reached, release)
+
+        return reached, release
+
+    async def _land(self, operation: str) -> None:
+        gate = self.gates.pop(operation, None)
+
+        if gate is not None:
+            gate[0].set()
+            await gate[1].wait()
+
+    def _update(self, document: Dict[str, Any], update: Mapping[str, Any]) -> None:
+        document.update(update.get("$set", {}))
+
+        for field in update.get("$unset", {}):
+            document.pop(field, None)
+
+        for field, increment in update.get("$inc", {}).items():
+            document[field] = document.get(field, 0) + increment
+
+    async def insert_one(self, document: Dict[str, Any]) -> MagicMock:
+        await self._land("insert_one")
+        document.setdefault("_id", ObjectId())
+        self.documents.append(dict(document))
+
+        return MagicMock(inserted_id=document["_id"])
+
+    async def find_one(
+        self, query: Mapping[str, Any], projection: Any = None
+    ) -> Optional[Dict[str, Any]]:
+        return next(
+            (dict(document) for document in self.documents if matches(document, query)),
+            None,
+        )
+
+    async def find_one_and_update(
+        self, query: Mapping[str, Any], update: Mapping[str, Any], **kwargs: Any
+    ) -> Optional[Dict[str, Any]]:
+        await self._land("find_one_and_update")
+
+        for document in self.documents:
+            if matches(document, query):
+                self._update(document=document, update=update)
+                return dict(document)
+
+        return None
+
+    async def find_one_and_delete(
+        self, query: Mapping[str, Any], **kwargs: Any
+    ) -> Optional[Dict[str, Any]]:
+        await self._land("find_one_and_delete")
+
+        for document in self.documents:
+            if matches(document, query):
+                self.documents.remove(document)
+                return dict(document)
+
+        return None
+
+    async def update_many(
+        self, query: Mapping[str, Any], update: Mapping[str, Any]
+    ) -> None:
+        await self._land("update_many")
+
+        for document in self.documents:
+            if matches(document, query):
+                self._update(document=document, update=update)
+
+    async def bulk_write(self, requests: Any, ordered: bool = True) -> None:
+        await self._land("bulk_write")
+
+    def find(self, query: Mapping[str, Any], projection: Any = None) -> MagicMock:
+        found = [
+            dict(document) for document in self.documents if matches(document, query)
+        ]
+
+        async def iterate() -> AsyncIterator[Dict[str, Any]]:
+            for document in found:
+                yield document
+
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=found)
+        cursor.__aiter__.side_effect = iterate
+
+        return cursor
+
+
+@pytest.fixture
+def fake_database() -> Dict[str, FakeCollection]:
+    """
+    Returns in-memory collections with a user at tasks version 1
+
+    Returns
+    -------
+    Dict[str, FakeCollection]
+        Collections by name
+    """
+
+    collections: Dict[str, FakeCollection] = defaultdict(FakeCollection)
+    collections["users"].documents.append({"email": "fake_email", "tasks_version": 1})
+
+    return collections
+
+
+@pytest.fixture
+def fake_async_tasks(fake_database: Dict[str, FakeCollection]) -> AsyncTasks:
+    """
+    Returns an AsyncTasks instance on the in-memory collections
+
+    Parameters
+    ----------
+    fake_database : Dict[str, FakeCollection]
+        Collections by name
+
+    Returns
+    -------
+    AsyncTasks
+        AsyncTasks instance
+    """
+
+    with patch("src.tasks.AsyncTasks.AsyncDatabase.get_client") as get_client_mock:
+        database_mock = get_client_mock.return_value.__getitem__.return_value
+        database_mock.__getitem__.side_effect = fake_database.__getitem__
+
+        async_tasks = AsyncTasks()
+
+    async_tasks.cache = TasksCache()
+    async_tasks.reminders = ReminderScheduler()
+
+    return async_tasks
+
+
+def test_get_task_changes_user_not_found(tasks: Tasks) -> None:
+    """
+    Test get_task_changes method when user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.get_task_changes(email="fake_email", since=1)
+
+
+def test_get_task_changes_since_version(
+    tasks: Tasks, fake_tasks: List[Dict[str, Any]]
+) -> None:
+    """
+    Test that get_task_changes only reads the tasks
+    and tombstones written after the given version
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    deleted_id = ObjectId()
+    tasks.users.find_one.return_value = {"tasks_version": 5}
+    tasks.tasks.find.return_value = iter(fake_tasks)
+    tasks.tombstones.find.return_value = iter([{"task_id": deleted_id}])
+
+    response = tasks.get_task_changes(email="fake_email", since=3)
+
+    query = {
+        "owner": "fake_email",
+        "$or": [{"version": {"$gt": 3}}, {"pending": {"$exists": True}}],
+    }
+
+    assert response.version == 5
+    assert response.full is False
+    assert [task.id for task in response.tasks] == [str(fake_tasks[0]["_id"])]
+    assert response.deleted == [str(deleted_id)]
+    tasks.tasks.find.assert_called_once_with(query, projection=TASK_PROJECTION)
+    assert tasks.tombstones.find.call_args.args == (query,)
+
+
+@pytest.mark.parametrize("since", [0, 6])
+def test_get_task_changes_full(
+    tasks: Tasks, fake_tasks: List[Dict[str, Any]], since: int
+) -> None:
+    """
+    Test that a client without a copy or ahead of
+    the server gets every task and no tombstones
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    since : int
+        Tasks version of the client copy
+    """
+
+    tasks.users.find_one.return_value = {"tasks_version": 5}
+    tasks.tasks.find.return_value = iter(fake_tasks)
+
+    response = tasks.get_task_changes(email="fake_email", since=since)
+
+    assert response.full is True
+    assert response.deleted == []
+    tasks.tasks.find.assert_called_once_with(
+        {"owner": "fake_email"}, projection=TASK_PROJECTION
+    )
+    tasks.tombstones.find.assert_not_called()
+
+
+def test_get_task_changes_behind_compacted_tombstones(
+    tasks: Tasks, fake_tasks: List[Dict[str, Any]]
+) -> None:
+    """
+    Test that a client synced before the newest compacted
+    tombstone gets every task instead of missing deletes
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    tasks.users.find_one.side_effect = [
+        {"tasks_version": 5},
+        {"tombstones_version": 4},
+    ]
+    tasks.tasks.find.side_effect = [iter([]), iter(fake_tasks)]
+    tasks.tombstones.find.return_value = iter([])
+
+    response = tasks.get_task_changes(email="fake_email", since=3)
+
+    assert response.version == 5
+    assert response.full is True
+    assert response.deleted == []
+    assert [task.id for task in response.tasks] == [str(fake_tasks[0]["_id"])]
+    assert tasks.tasks.find.call_args.args == ({"owner": "fake_email"},)
+
+
+@pytest.mark.anyio
+async def test_async_get_task_changes_since_version(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, Any]]
+) -> None:
+    """
+    Test that the async get_task_changes returns tasks and tombstones
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    deleted_id = ObjectId()
+
+    async def fake_tombstones() -> AsyncIterator[Dict[str, Any]]:
+        yield {"task_id": deleted_id}
+
+    async_tasks.users.find_one.return_value = {"tasks_version": 5}
+    async_tasks.tasks.find.return_value.to_list = AsyncMock(return_value=fake_tasks)
+    async_tasks.tombstones.find.return_value = fake_tombstones()
+
+    response = await async_tasks.get_task_changes(email="fake_email", since=3)
+
+    assert len(response.tasks) == 1
+    assert response.deleted == [str(deleted_id)]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "collection, operation",
+    [
+        ("tasks", "insert_one"),
+        ("users", "find_one_and_update"),
+        ("tasks", "update_many"),
+        ("task_counters", "bulk_write"),
+    ],
+)
+async def test_sync_during_add_task_never_skips_it(
+    fake_async_tasks: AsyncTasks,
+    fake_database: Dict[str, FakeCollection],
+    collection: str,
+    operation: str,
+) -> None:
+    """
+    Test that a client syncing while a task is being added
+    gets the task, whatever step the write is paused before
+
+    Parameters
+    ----------
+    fake_async_tasks : AsyncTasks
+        AsyncTasks instance on in-memory collections
+    fake_database : Dict[str, FakeCollection]
+        Collections by name
+    collection : str
+        Collection of the paused operation
+    operation : str
+        Operation the write is paused before
+    """
+
+    reached, release = fake_database[collection].pause(operation)
+    write = asyncio.create_task(
+        fake_async_tasks.add_task(
+            add_task_request=AddTask(
+                email="fake_email",
+                task=Task(
+                    title="fake_title",
+                    description="fake_description",
+                    status="todo",
+                    priority="high",
+                    deadline="2021-01-01T00:00:00",
+                ),
+            )
+        )
+    )
+
+    await asyncio.wait_for(reached.wait(), timeout=5)
+
+    during = await fake_async_tasks.get_task_changes(email="fake_email", since=1)
+    release.set()
+    added = await write
+    after = await fake_async_tasks.get_task_changes(
+        email="fake_email", since=during.version
+    )
+    synced = {task.id for task in during.tasks} | {task.id for task in after.tasks}
+
+    assert added.id in synced
+    assert after.version == 2
+    assert "pending" not in fake_database["tasks"].documents[0]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "collection, operation",
+    [
+        ("task_tombstones", "insert_one"),
+        ("users", "find_one_and_update"),
+        ("task_tombstones", "update_many"),
+    ],
+)
+async def test_sync_during_delete_task_never_skips_it(
+    fake_async_tasks: AsyncTasks,
+    fake_database: Dict[str, FakeCollection],
+    collection: str,
+    operation: str,
+) -> None:
+    """
+    Test that a client syncing while a task is being deleted
+    gets the deletion, whatever step the write is paused before
+
+    Parameters
+    ----------
+    fake_async_tasks : AsyncTasks
+        AsyncTasks instance on in-memory collections
+    fake_database : Dict[str, FakeCollection]
+        Collections by name
+    collection : str
+        Collection of the paused operation
+    operation : str
+        Operation the write is paused before
+    """
+
+    task_id = ObjectId()
+    fake_database["tasks"].documents.append(
+        {
+            "_id": task_id,
+            "owner": "fake_email",
+            "status": "todo",
+            "priority": "high",
+            "version": 1,
+        }
+    )
+    reached, release = fake_database[collection].pause(operation)
+    write = asyncio.create_task(
+        fake_async_tasks.delete_task(email="fake_email", task_id=str(task_id))
+    )
+
+    await asyncio.wait_for(reached.wait(), timeout=5)
+
+    during = await fake_async_tasks.get_task_changes(email="fake_email", since=1)
+    release.set()
+    await write
+    after = await fake_async_tasks.get_task_changes(
+        email="fake_email", since=during.version
+    )
+    deleted: Set[str] = {*during.deleted, *after.deleted}
+
+    assert str(task_id) in deleted
+    assert after.version == 2
+
+
+def test_tasks_sync_tasks_route_200() -> None:
+    """
+    Test that the route /tasks/sync-tasks returns 200
+    """
+
+    fake_response = TaskChangesResponse(
+        version=5, full=False, tasks=[], deleted=["65a000000000000000000001"]
+    )
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_task_changes.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/sync-tasks",
+            params={"email": "fake_email", "since": 3},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == fake_response.model_dump()
+    tasks_mock.return_value.get_task_changes.assert_awaited_once_with(
+        email="fake_email", since=3
+    )
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.tasks.tombstones import compact_tombstones
+
+
+@pytest.fixture
+def fake_database() -> MagicMock:
+    """
+    Returns a database mock with users and tombstones collections
+
+    Returns
+    -------
+    MagicMock
+        Database mock
+    """
+
+    collections = {"users": MagicMock(), "task_tombstones": MagicMock()}
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    return database
+
+
+def test_compact_tombstones_raises_floor_before_deleting(
+    fake_database: MagicMock,
+) -> None:
+    """
+    Test that the tombstones version of a user is raised
+    to the newest compacted tombstone before deleting
+
+    Parameters
+    ----------
+    fake_database : MagicMock
+        Database mock
+    """
+
+    before = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    calls = MagicMock()
+    fake_database["task_tombstones"].aggregate.return_value = [
+        {"_id": "fake_email", "version": 7}
+    ]
+    fake_database["task_tombstones"].delete_many.return_value.deleted_count = 3
+    calls.attach_mock(fake_database["users"].update_one, "update_one")
+    calls.attach_mock(fake_database["task_tombstones"].delete_many, "delete_many")
+
+    assert compact_tombstones(database=fake_database, before=before) == 3
+
+    assert fake_database["task_tombstones"].aggregate.call_args.args[0][0] == {
+        "$match": {"updated_at": {"$lt": before}, "version": {"$exists": True}}
+    }
+    assert [name for name, *_ in calls.mock_calls[:2]] == ["update_one", "delete_many"]
+    fake_database["users"].update_one.assert_called_once_with(
+        {"email": "fake_email"}, {"$max": {"tombstones_version": 7}}
+    )
+    fake_database["task_tombstones"].delete_many.assert_called_once_with(
+        {"owner": "fake_email", "version": {"$lte": 7}}
+    )
+
+
+def test_compact_tombstones_nothing_to_compact(fake_database: MagicMock) -> None:
+    """
+    Test that no user is touched when no tombstone is old enough
+
+    Parameters
+    ----------
+    fake_database : MagicMock
+        Database mock
+    """
+
+    fake_database["task_tombstones"].aggregate.return_value = []
+
+    assert (
+        compact_tombstones(database=fake_database, before=datetime.now(timezone.utc))
+        == 0
+    )
+
+    fake_database["users"].update_one.assert_not_called()
+    fake_database["task_tombstones"].delete_many.assert_not_called()
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import UserNotFound
+from src.tasks.schemas import UpcomingTasksResponse
+from src.tasks.Tasks import Tasks
+from src.tasks.utils import get_deadline_window, get_deadline_window_query
+
+client = TestClient(app)
+
+
+def test_get_deadline_window_query() -> None:
+    """
+    Test that the window query only selects tasks that are not done
+    """
+
+    start, end = get_deadline_window(hours=24, now=datetime(2021, 1, 1))
+
+    assert end - start == timedelta(hours=24)
+    assert get_deadline_window_query(start=start, end=end, email="fake_email") == {
+        "owner": "fake_email",
+        "deadline": {"$gte": start, "$lt": end},
+        "status": {"$nin": ["done"]},
+    }
+    assert "owner" not in get_deadline_window_query(start=start, end=end)
+
+
+def test_get_upcoming_tasks(tasks: Tasks, fake_tasks: List[Dict[str, Any]]) -> None:
+    """
+    Test that get_upcoming_tasks reads the window ordered by deadline
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter(
+        fake_tasks
+    )
+
+    response = tasks.get_upcoming_tasks(email="fake_email", hours=12, limit=10)
+
+    query = tasks.tasks.find.call_args.args[0]
+
+    assert response.end - response.start == timedelta(hours=12)
+    assert [task.title for task in response.tasks] == ["fake_title"]
+    assert query["owner"] == "fake_email"
+    assert query["deadline"] == {"$gte": response.start, "$lt": response.end}
+    tasks.tasks.find.return_value.sort.assert_called_once_with(
+        [("deadline", 1), ("title", 1)]
+    )
+    tasks.tasks.find.return_value.sort.return_value.limit.assert_called_once_with(10)
+
+
+def test_get_upcoming_tasks_user_not_found(tasks: Tasks) -> None:
+    """
+    Test get_upcoming_tasks method when user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    """
+
+    tasks.tasks.find.return_value.sort.return_value.limit.return_value = iter([])
+    tasks.users.find_one.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.get_upcoming_tasks(email="fake_email")
+
+
+def test_get_due_tasks(tasks: Tasks, fake_tasks: List[Dict[str, Any]]) -> None:
+    """
+    Test that get_due_tasks scans the window of every user
+
+    Parameters
+    ----------
+    tasks : Tasks
+        The tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    start, end = get_deadline_window(hours=1)
+    tasks.tasks.find.return_value.sort.return_value = iter(
+        [{"owner": "fake_email", **fake_tasks[0]}]
+    )
+
+    due_tasks = list(tasks.get_due_tasks(start=start, end=end))
+
+    assert [task.owner for task in due_tasks] == ["fake_email"]
+    assert tasks.tasks.find.call_args.args[0] == get_deadline_window_query(
+        start=start, end=end
+    )
+    tasks.tasks.find.return_value.sort.assert_called_once_with([("deadline", 1)])
+
+
+@pytest.mark.anyio
+async def test_async_get_due_tasks(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, Any]]
+) -> None:
+    """
+    Test that the async get_due_tasks yields the tasks and their owners
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    async def fake_cursor() -> AsyncIterator[Dict[str, Any]]:
+        yield {"owner": "fake_email", **fake_tasks[0]}
+
+    start, end = get_deadline_window(hours=1)
+    async_tasks.tasks.find.return_value.sort.return_value = fake_cursor()
+
+    due_tasks = [task async for task in async_tasks.get_due_tasks(start=start, end=end)]
+
+    assert [task.owner for task in due_tasks] == ["fake_email"]
+
+
+@pytest.mark.anyio
+async def test_async_get_upcoming_tasks(
+    async_tasks: AsyncTasks, fake_tasks: List[Dict[str, Any]]
+) -> None:
+    """
+    Test that the async get_upcoming_tasks returns the window tasks
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        The async tasks instance
+    fake_tasks : List[Dict[str, Any]]
+        The fake tasks
+    """
+
+    find_mock = async_tasks.tasks.find
+    find_mock.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(
+        return_value=fake_tasks
+    )
+
+    response = await async_tasks.get_upcoming_tasks(email="fake_email")
+
+    assert len(response.tasks) == 1
+
+
+def test_tasks_upcoming_tasks_route_200() -> None:
+    """
+    Test that the route /tasks/upcoming-tasks returns 200
+    """
+
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    fake_response = UpcomingTasksResponse(
+        start=start, end=start + timedelta(hours=6), tasks=[]
+    )
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.get_upcoming_tasks.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.get(
+            "/tasks/upcoming-tasks",
+            params={"email": "fake_email", "hours": 6},
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["tasks"] == []
+    tasks_mock.return_value.get_upcoming_tasks.assert_awaited_once_with(
+        email="fake_email", hours=6, limit=100
+    )
@@ -0,0 +1,221 @@
+from datetime import datetime
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError
+
+from src.main import app
+from src.tasks.AsyncTasks import AsyncTasks
+from src.tasks.exceptions import TaskAlreadyExists, TaskNotFound, UserNotFound
+from src.tasks.schemas import TaskChanges, UpdateTask, UpdateTaskResponse
+from src.tasks.Tasks import Tasks
+from src.tasks.utils import TASK_PROJECTION
+
+client = TestClient(app)
+
+FAKE_TASK_ID = "65a000000000000000000001"
+
+
+@pytest.fixture
+def fake_update_task() -> UpdateTask:
+    """
+    Returns an UpdateTask instance
+
+    Returns
+    -------
+    UpdateTask
+        UpdateTask instance
+    """
+
+    return UpdateTask(
+        email="fake_email", id=FAKE_TASK_ID, changes=TaskChanges(status="done")
+    )
+
+
+def test_task_changes_empty() -> None:
+    """
+    Test that a change set without any field is rejected
+    """
+
+    with pytest.raises(ValueError):
+        TaskChanges()
+
+
+def test_update_task_in_place(tasks: Tasks, fake_update_task: UpdateTask) -> None:
+    """
+    Test that update_task only sets the changed fields
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_update_task : UpdateTask
+        UpdateTask instance
+    """
+
+    tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    tasks.tasks.find_one_and_update.return_value = {
+        "status": "todo",
+        "priority": "high",
+    }
+
+    tasks.update_task(update_task_request=fake_update_task)
+
+    tasks.tasks.find_one_and_update.assert_called_once_with(
+        {"_id": ObjectId(FAKE_TASK_ID), "owner": "fake_email"},
+        {"$set": {"status": "done", "pending": ANY, "updated_at": ANY}},
+        projection={"_id": 0, "status": 1, "priority": 1},
+    )
+    tasks.tasks.update_many.assert_called_once_with(
+        {
+            "owner": "fake_email",
+            "pending": tasks.tasks.find_one_and_update.call_args.args[1]["$set"][
+                "pending"
+            ],
+        },
+        {"$set": {"version": 2, "change": "updated"}, "$unset": {"pending": ""}},
+    )
+    assert [
+        (write._filter["value"], write._doc["$inc"]["count"])
+        for write in tasks.task_counters.bulk_write.call_args.args[0]
+    ] == [("todo", -1), ("done", 1)]
+
+
+def test_update_task_task_not_found(tasks: Tasks, fake_update_task: UpdateTask) -> None:
+    """
+    Test update_task method when task is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_update_task : UpdateTask
+        UpdateTask instance
+    """
+
+    tasks.tasks.find_one_and_update.return_value = None
+
+    with pytest.raises(TaskNotFound):
+        tasks.update_task(update_task_request=fake_update_task)
+
+    tasks.users.find_one_and_update.assert_not_called()
+    tasks.task_counters.bulk_write.assert_not_called()
+
+
+def test_update_task_user_not_found(tasks: Tasks, fake_update_task: UpdateTask) -> None:
+    """
+    Test update_task method when user is not found
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    fake_update_task : UpdateTask
+        UpdateTask instance
+    """
+
+    tasks.users.find_one.return_value = None
+    tasks.tasks.find_one_and_update.return_value = None
+
+    with pytest.raises(UserNotFound):
+        tasks.update_task(update_task_request=fake_update_task)
+
+    tasks.users.find_one_and_update.assert_not_called()
+
+
+def test_update_task_title_taken(tasks: Tasks) -> None:
+    """
+    Test update_task method when the new title is already taken
+
+    Parameters
+    ----------
+    tasks : Tasks
+        Tasks instance
+    """
+
+    tasks.tasks.find_one_and_update.side_effect = DuplicateKeyError("duplicate key")
+
+    with pytest.raises(TaskAlreadyExists):
+        tasks.update_task(
+            update_task_request=UpdateTask(
+                email="fake_email",
+                id=FAKE_TASK_ID,
+                changes=TaskChanges(title="taken_title"),
+            )
+        )
+
+
+@pytest.mark.anyio
+async def test_async_update_task_in_place(
+    async_tasks: AsyncTasks, fake_update_task: UpdateTask
+) -> None:
+    """
+    Test that the async update_task only sets the changed
+    fields and publishes the updated task
+
+    Parameters
+    ----------
+    async_tasks : AsyncTasks
+        AsyncTasks instance
+    fake_update_task : UpdateTask
+        UpdateTask instance
+    """
+
+    async_tasks.events = MagicMock()
+    async_tasks.users.find_one_and_update.return_value = {"tasks_version": 2}
+    async_tasks.tasks.find_one_and_update.return_value = {
+        "_id": ObjectId(FAKE_TASK_ID),
+        "title": "fake_title",
+        "description": "fake_description",
+        "status": "todo",
+        "priority": "high",
+        "deadline": datetime(2021, 1, 1),
+        "version": 1,
+    }
+
+    await async_tasks.update_task(update_task_request=fake_update_task)
+
+    async_tasks.tasks.find_one_and_update.assert_awaited_once_with(
+        {"_id": ObjectId(FAKE_TASK_ID), "owner": "fake_email"},
+        {"$set": {"status": "done", "pending": ANY, "updated_at": ANY}},
+        projection=TASK_PROJECTION,
+    )
+    async_tasks.tasks.update_many.assert_awaited_once()
+    async_tasks.task_counters.bulk_write.assert_awaited_once()
+
+    event = async_tasks.events.publish_write.call_args.kwargs["event"]
+
+    assert (event.type, event.version, event.id) == ("updated", 2, FAKE_TASK_ID)
+    assert (event.task.status, event.task.version) == ("done", 2)
+    assert event.task.updated_at is not None
+
+
+def test_tasks_update_task_route_200(fake_update_task: UpdateTask) -> None:
+    """
+    Test /tasks/update-task route when status code is 200
+
+    Parameters
+    ----------
+    fake_update_task : UpdateTask
+        UpdateTask instance
+    """
+
+    fake_response = UpdateTaskResponse(detail="Task updated successfully")
+
+    with (
+        patch("src.tasks.router.AsyncTasks", autospec=True) as tasks_mock,
+        patch("src.auth.router.decode_access_token") as decode_access_token_mock,
+    ):
+        tasks_mock.return_value.update_task.return_value = fake_response
+        decode_access_token_mock.return_value = {"sub": "fake_email"}
+
+        response = client.patch(
+            "/tasks/update-task",
+            json=fake_update_task.model_dump(exclude_none=True),
+            headers={"Authorization": "Bearer fake_token"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == fake_response.model_dump()